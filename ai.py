@@ -0,0 +1,68 @@
+import math
+import time
+
+from settings import AI_MAX_STRIDE, AI_APPROACH_SPEED, AI_STATS_FRAMES
+
+ASLEEP = "ASLEEP"  # Stats bucket for enemies skipped this frame
+
+
+class AIScheduler:
+    # Decides which enemies think each frame. Anything that is awake (chasing,
+    # attacking, stunned) or idle near the player updates every frame. An idle
+    # enemy further out sleeps for as many frames as the player would need to
+    # reach its detection range at AI_APPROACH_SPEED, capped at AI_MAX_STRIDE,
+    # so it still notices the player on time. Sleepers wake on their own
+    # staggered frames (or at once when hit) and their animation catches up
+    # by the frames they missed.
+    def __init__(self):
+        self.frame = 0
+        self.counts = {}         # state -> enemies in it this frame
+        self.times = {}          # state -> seconds spent updating, last window
+        self.updates = {}        # state -> updates run, last window
+        self._times = {}
+        self._updates = {}
+
+    def stride(self, enemy, player):
+        if enemy.state != "IDLE":
+            return 1
+        gap = math.hypot(player.pos_x - enemy.x, player.pos_y - enemy.y)
+        frames = int((gap - enemy.detection_range) // AI_APPROACH_SPEED)
+        return max(1, min(AI_MAX_STRIDE, frames))
+
+    def update(self, enemies, player, flow=None):
+        self.frame += 1
+        frame = self.frame
+        counts = {}
+        for enemy in enemies:
+            if enemy.next_think > frame:
+                counts[ASLEEP] = counts.get(ASLEEP, 0) + 1
+                continue
+            state = enemy.state
+            ticks = min(AI_MAX_STRIDE, frame - enemy.last_think) if enemy.last_think else 1
+            start = time.perf_counter()
+            enemy.update(player, enemies, flow, ticks)
+            self._times[state] = self._times.get(state, 0.0) + time.perf_counter() - start
+            self._updates[state] = self._updates.get(state, 0) + 1
+
+            stride = self.stride(enemy, player)
+            if not enemy.last_think:
+                stride = 1 + enemy.uid % stride  # Spread the first wave out
+            enemy.last_think = frame
+            enemy.next_think = frame + stride
+            counts[enemy.state] = counts.get(enemy.state, 0) + 1
+        self.counts = counts
+
+        if frame % AI_STATS_FRAMES == 0:
+            self.times, self._times = self._times, {}
+            self.updates, self._updates = self._updates, {}
+
+    def summary(self):
+        # One line for the debug HUD, e.g. "ASLEEP 12 | CHASE 3 (0.40ms/180)":
+        # enemies per state, then update time and count over the last window
+        parts = []
+        for state in sorted(self.counts):
+            text = f"{state} {self.counts[state]}"
+            if state in self.times:
+                text += f" ({self.times[state] * 1000:.2f}ms/{self.updates[state]})"
+            parts.append(text)
+        return " | ".join(parts) or "no enemies"
@@ -0,0 +1,168 @@
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+
+import pygame
+
+from savecodec import Writer, Reader, SaveFormatError
+from settings import ASSET_PACK
+
+# --- ASSET PACK ---
+# An offline bake of every sprite the game uses: the atlas pages as raw RGBA
+# plus an index of where each sprite sits. At startup the file is memory
+# mapped and the pages are wrapped in place, so no PNG is decoded and no
+# pixel is copied until the pages are converted for the display.
+#
+# Layout: header (magic, version, index length), the index (savecodec
+# primitives), then each page's pixels at a 16 byte aligned offset.
+MAGIC = b"KNPK"
+PACK_VERSION = 2
+HEADER = struct.Struct("<4sBI")
+PAGE_ALIGN = 16
+ASSET_DIR = "assets"
+
+
+def source_stamp(files):
+    # Changes whenever a source PNG is added, removed or touched, or the list
+    # of expected files itself changes (new manifest entries)
+    parts = []
+    for name in files:
+        try:
+            st = os.stat(os.path.join(ASSET_DIR, f"{name}.png"))
+            parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{name}:-")
+    return zlib.crc32("\n".join(parts).encode("utf-8"))
+
+
+def _aligned(n):
+    return (n + PAGE_ALIGN - 1) // PAGE_ALIGN * PAGE_ALIGN
+
+
+# --- WRITING ---
+def write_pack(atlas, files, path=ASSET_PACK):
+    pages = [pygame.image.tobytes(page, "RGBA") for page in atlas.pages]
+    w = Writer(None)
+    w.uvarint(source_stamp(files))
+    w.uvarint(atlas.page_size)
+    w.uvarint(len(pages))
+    w.uvarint(len(atlas.rects))
+    for name, (idx, rect) in atlas.rects.items():
+        w.raw_str(name)
+        w.uvarint(idx)
+        for v in (rect.x, rect.y, rect.w, rect.h):
+            w.uvarint(v)
+    index = bytes(w.buf)
+
+    # Same write-then-rename as the save files
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, PACK_VERSION, len(index)))
+        f.write(index)
+        for data in pages:
+            f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+            f.write(data)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+# --- READING ---
+def read_index(data):
+    magic, version, index_len = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise SaveFormatError("not an asset pack")
+    if version != PACK_VERSION:
+        raise SaveFormatError(f"asset pack version {version}, expected {PACK_VERSION}")
+    r = Reader(bytes(data[HEADER.size:HEADER.size + index_len]))
+    stamp = r.uvarint()
+    page_size = r.uvarint()
+    page_count = r.uvarint()
+    rects = {}
+    for _ in range(r.uvarint()):
+        name = r.raw_str()
+        idx = r.uvarint()
+        rects[name] = (idx, pygame.Rect(r.uvarint(), r.uvarint(), r.uvarint(), r.uvarint()))
+
+    offsets = []
+    pos = HEADER.size + index_len
+    page_bytes = page_size * page_size * 4
+    for _ in range(page_count):
+        pos = _aligned(pos)
+        offsets.append(pos)
+        pos += page_bytes
+    if pos > len(data):
+        raise SaveFormatError("asset pack is truncated")
+    return stamp, page_size, offsets, rects
+
+
+def load_pack(atlas, files, path=ASSET_PACK):
+    # Fills `atlas` from the pack and returns name -> sprite, or None when
+    # there is no usable pack and the caller should decode the PNGs instead.
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        stamp, page_size, offsets, rects = read_index(mm)
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        print(f"Ignoring asset pack: {e}")
+        return None
+    # A release build may ship only the pack; with no sources there is
+    # nothing for it to be stale against
+    if os.path.isdir(ASSET_DIR) and stamp != source_stamp(files):
+        print("Asset pack is out of date; run `python assetpack.py` to rebuild it")
+        mm.close()
+        return None
+
+    view = memoryview(mm)
+    size = (page_size, page_size)
+    page_bytes = page_size * page_size * 4
+    pages = []
+    for offset in offsets:
+        page = pygame.image.frombuffer(view[offset:offset + page_bytes], size, "RGBA")
+        if pygame.display.get_init() and pygame.display.get_surface():
+            page = page.convert_alpha()
+        pages.append(page)
+    # Unconverted pages read straight from the mapping; keep it alive with them
+    atlas.mapping = mm
+    atlas.page_size = page_size
+    return atlas.adopt(pages, rects)
+
+
+# --- BUILD ---
+def build(path=ASSET_PACK):
+    # Imported here: assets imports this module to load the pack
+    import assets
+    from atlas import SpriteAtlas
+
+    pygame.init()
+    files = assets.expected_files()
+    missing = [name for name in files if not os.path.exists(assets.asset_path(name))]
+
+    start = time.perf_counter()
+    atlas = SpriteAtlas()
+    atlas.pack(assets.decode_all())
+    decode_ms = (time.perf_counter() - start) * 1000
+    size = write_pack(atlas, files, path)
+
+    start = time.perf_counter()
+    check = SpriteAtlas()
+    if load_pack(check, files, path) is None:
+        sys.exit("Pack failed to load back")
+    load_ms = (time.perf_counter() - start) * 1000
+
+    stats = atlas.stats()
+    print(f"Wrote {path}: {stats['sprites']} sprites on {stats['pages']} page(s), "
+          f"{stats['fill']:.0%} full, {size / 1024:.0f}KB")
+    print(f"Decode + pack from PNGs: {decode_ms:.1f}ms, load from pack: {load_ms:.1f}ms")
+    if missing:
+        print(f"{len(missing)} of {len(files)} source images missing (placeholders baked in):")
+        for name in missing:
+            print(f"  {assets.asset_path(name)}")
+
+
+if __name__ == "__main__":
+    build()
@@ -0,0 +1,302 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+import pygame
+
+from atlas import SpriteAtlas
+from settings import ASSET_WORKERS, BIOME_ENEMIES
+import assetpack
+import enemy
+import profiler
+
+ASSET_DIR = "assets"
+
+# --- MANIFEST ---
+# Static images: key, file (without .png), fallback colour, fallback size
+IMAGE_MANIFEST = [
+    ('keeper', "keeper", (100, 100, 255), (20, 30)),
+    ('pyre', "pyre", (80, 80, 80), (30, 40)),
+    ('tent', "tent", (200, 50, 50), (60, 40)),
+
+    # Terrain Objects
+    ('tree', "tree", (50, 100, 50), (40, 80)),
+    ('cactus', "cactus", (50, 150, 50), (30, 60)),
+    ('rock', "rock", (100, 100, 100), (30, 30)),
+
+    # Items
+    ('Wood', "wood", (139, 69, 19), (20, 20)),
+    ('branch', "branch", (160, 82, 45), (20, 20)),
+    ('Rope', "rope", (193, 154, 107), (20, 20)),
+    ('Reeds', "reeds", (100, 255, 100), (20, 20)),
+    ('Flint', "flint", (50, 50, 50), (20, 20)),
+    ('Fur', "fur", (220, 220, 220), (20, 20)),
+    ('Oil', "oil", (20, 0, 50), (20, 20)),
+    ('Iron', "iron", (150, 50, 0), (20, 20)),
+    ('Fabric', "fabric", (255, 255, 255), (20, 20)),
+]
+
+# Sprite sheets: key, file, frame count, fallback colour, fallback frame size
+SHEET_MANIFEST = [
+    ('fire', "fire", 8, (255, 100, 0), (20, 20)),
+
+    # Player
+    ('idle_down', "idle_down", 2, (255, 255, 255), (20, 30)),
+    ('idle_up', "idle_up", 2, (255, 255, 255), (20, 30)),
+    ('idle_left', "idle_left", 4, (255, 255, 255), (20, 30)),
+    ('idle_right', "idle_right", 4, (255, 255, 255), (20, 30)),
+    ('walk_down', "walk_down", 4, (255, 255, 255), (20, 30)),
+    ('walk_up', "walk_up", 4, (255, 255, 255), (20, 30)),
+    ('walk_left', "walk_left", 4, (255, 255, 255), (20, 30)),
+    ('walk_right', "walk_right", 4, (255, 255, 255), (20, 30)),
+]
+
+# Images only drawn in some biomes. They (and the biome's enemies) load on
+# first visit; everything else is needed in the hub.
+BIOME_IMAGES = {
+    'desert': ['cactus'],
+}
+HUB_BIOMES = ['forest']  # The hub sits in the forest
+
+
+# --- LOADING HELPERS ---
+def make_placeholder(color, size=(20, 30)):
+    s = pygame.Surface(size)
+    s.fill(color)
+    pygame.draw.rect(s, (0, 0, 0), s.get_rect(), 1)  # Border
+    return s
+
+
+def asset_path(name):
+    return os.path.join(ASSET_DIR, f"{name}.png")
+
+
+def load_surface(name):
+    # No convert_alpha: this runs on loader threads, and every image is
+    # copied into a display-format atlas page anyway
+    return pygame.image.load(asset_path(name))
+
+
+def load_img(name, fallback_color, size=(20, 20)):
+    try:
+        return load_surface(name)
+    except (pygame.error, OSError):
+        return make_placeholder(fallback_color, size)
+
+
+def slice_sheet(sheet, frames):
+    w = sheet.get_width() // frames
+    h = sheet.get_height()
+    return [sheet.subsurface((i*w, 0, w, h)) for i in range(frames)]
+
+
+def load_sheet(name, frames, fallback_color, size=(20, 30)):
+    try:
+        return slice_sheet(load_surface(name), frames)
+    except (pygame.error, OSError):
+        return [make_placeholder(fallback_color, size) for _ in range(frames)]
+
+
+def flip_frames(frames):
+    return [pygame.transform.flip(f, True, False) for f in frames]
+
+
+def mirror_key(key):
+    # "walk_left" <-> "walk_right"; None for sheets with no mirror image
+    for a, b in (("_left", "_right"), ("_right", "_left")):
+        if key.endswith(a):
+            return key[:-len(a)] + b
+    return None
+
+
+def expected_files():
+    # Every PNG the game looks for, for build-time reporting
+    files = [name for _, name, _, _ in IMAGE_MANIFEST]
+    files += [name for _, name, _, _, _ in SHEET_MANIFEST]
+    for variant in enemy.VARIANT_NAMES:
+        for action in enemy.ACTIONS:
+            for direction in enemy.DIRECTIONS:
+                files.append(f"{variant}_{action}_{direction}")
+    return files
+
+
+def add_sheets(loose, sheets):
+    # sheets: atlas prefix -> (frames, whether the file exists). A missing
+    # left/right sheet is stood in for by mirroring the opposite side, so the
+    # atlas (and the pack built from it) holds both facings of every sheet
+    # and nothing is flipped while drawing.
+    for prefix, (frames, found) in sheets.items():
+        other = mirror_key(prefix)
+        if not found and other in sheets and sheets[other][1]:
+            frames = flip_frames(sheets[other][0])
+        for i, frame in enumerate(frames):
+            loose[f"{prefix}:{i}"] = frame
+    return loose
+
+
+# --- LOAD JOBS ---
+# A job is the unit handed to a loader thread: "img:<key>", "sheets" (all of
+# SHEET_MANIFEST, so left/right pairs stay together) or "enemy:<variant>".
+# Each decodes into loose surfaces keyed by atlas name.
+def decode_job(job):
+    with profiler.step(job, "asset"):
+        return _decode_job(job)
+
+
+def _decode_job(job):
+    kind, _, key = job.partition(":")
+    if kind == "img":
+        for k, name, color, size in IMAGE_MANIFEST:
+            if k == key:
+                return {job: load_img(name, color, size)}
+    if kind == "sheets":
+        return add_sheets({}, {
+            f"anim:{k}": (load_sheet(name, frames, color, size),
+                          os.path.exists(asset_path(name)))
+            for k, name, frames, color, size in SHEET_MANIFEST})
+    if kind == "enemy":
+        return add_sheets({}, {
+            f"enemy:{key}:{k}": (frames, os.path.exists(asset_path(f"{key}_{k}")))
+            for k, frames in enemy.load_variant_animations(key).items()})
+    raise ValueError(f"unknown asset job {job}")
+
+
+def all_jobs():
+    jobs = [f"img:{key}" for key, _, _, _ in IMAGE_MANIFEST]
+    jobs.append("sheets")
+    jobs += [f"enemy:{variant}" for variant in enemy.VARIANT_NAMES]
+    return jobs
+
+
+def biome_jobs(biome):
+    jobs = [f"img:{key}" for key in BIOME_IMAGES.get(biome, [])]
+    base = BIOME_ENEMIES.get(biome, "wolf")
+    variants = enemy.WOLF_VARIANTS if base == "wolf" else [base]
+    return jobs + [f"enemy:{variant}" for variant in variants]
+
+
+def hub_jobs():
+    lazy = set()
+    for biome in BIOME_ENEMIES:
+        lazy.update(biome_jobs(biome))
+    for biome in HUB_BIOMES:
+        lazy.difference_update(biome_jobs(biome))
+    return [job for job in all_jobs() if job not in lazy]
+
+
+def decode_all():
+    # Every sprite the game uses, decoded on this thread (see assetpack.py)
+    loose = {}
+    for job in all_jobs():
+        loose.update(decode_job(job))
+    return loose
+
+
+def frame_list(sprites, prefix):
+    frames = []
+    while f"{prefix}:{len(frames)}" in sprites:
+        frames.append(sprites[f"{prefix}:{len(frames)}"])
+    return frames
+
+
+class AssetManager:
+    # Everything drawn comes from the sprite atlas. With a baked pack (see
+    # assetpack.py) it is all there at once. Otherwise PNGs are decoded on a
+    # thread pool: hub assets first (the game shows a splash until they are
+    # in), biome assets on first visit or when a neighbouring room is entered.
+    # Finished jobs are packed into the atlas on the main thread by poll().
+    def __init__(self, background=False):
+        self.images = {}
+        self.animations = {}
+        self.atlas = SpriteAtlas()
+        self.from_pack = False
+        self.pool = None
+        self.pending = {}    # job -> Future still decoding
+        self.loaded = set()  # Jobs already in the atlas
+        self.hub = hub_jobs()
+        enemy.ANIMATION_LOADER = self.variant_animations
+        self.start()
+        if not background:
+            self.require(all_jobs())
+
+    def start(self):
+        with profiler.step("asset pack", "asset"):
+            sprites = assetpack.load_pack(self.atlas, expected_files())
+        if sprites is not None:
+            self.from_pack = True
+            self.loaded.update(all_jobs())
+            self.assemble(sprites)
+            return
+        self.pool = ThreadPoolExecutor(ASSET_WORKERS, thread_name_prefix="assets")
+        self.submit(self.hub)
+
+    def submit(self, jobs):
+        for job in jobs:
+            if job not in self.loaded and job not in self.pending:
+                self.pending[job] = self.pool.submit(decode_job, job)
+
+    def poll(self, wait_for=()):
+        # Packs every finished job into the atlas, first blocking on
+        # `wait_for`. Main thread only: the atlas pages are display surfaces.
+        for job in wait_for:
+            if job in self.pending:
+                self.pending[job].result()
+        done = [job for job, future in self.pending.items() if future.done()]
+        if not done:
+            return
+        loose = {}
+        for job in done:
+            loose.update(self.pending.pop(job).result())
+            self.loaded.add(job)
+        # One pack per batch keeps the tallest-first ordering
+        self.assemble(self.atlas.pack(loose))
+
+    def wait(self, timeout):
+        # Returns once every pending job is done, or after `timeout` seconds
+        wait_futures(list(self.pending.values()), timeout)
+
+    def require(self, jobs):
+        missing = [job for job in jobs if job not in self.loaded]
+        if missing:
+            self.submit(missing)
+            self.poll(missing)
+
+    def progress(self):
+        # (done, total) for the hub assets, for the loading splash
+        done = sum(1 for job in self.hub
+                   if job in self.loaded or (job in self.pending and self.pending[job].done()))
+        return done, len(self.hub)
+
+    def hub_ready(self):
+        return all(job in self.loaded for job in self.hub)
+
+    def prefetch_biome(self, biome):
+        if self.pool:
+            self.submit(biome_jobs(biome))
+
+    def require_biome(self, biome):
+        self.require(biome_jobs(biome))
+
+    def variant_animations(self, name):
+        self.require([f"enemy:{name}"])
+        return enemy.ANIMATIONS[name]
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def assemble(self, sprites):
+        # Picks up whatever `sprites` holds; lazily loaded jobs arrive in parts
+        for key, name, color, size in IMAGE_MANIFEST:
+            if f"img:{key}" in sprites:
+                self.images[key] = sprites[f"img:{key}"]
+        for key, name, frames, color, size in SHEET_MANIFEST:
+            if f"anim:{key}:0" in sprites:
+                self.animations[key] = frame_list(sprites, f"anim:{key}")
+        for variant in enemy.VARIANT_NAMES:
+            if f"enemy:{variant}:idle_down:0" in sprites:
+                enemy.register_animations(variant, {
+                    f"{action}_{direction}": frame_list(
+                        sprites, f"enemy:{variant}:{action}_{direction}")
+                    for action in enemy.ACTIONS for direction in enemy.DIRECTIONS})
+
+    def get_image(self, name):
+        return self.images.get(name, self.images['branch'])
@@ -0,0 +1,87 @@
+import pygame
+
+ATLAS_PAGE_SIZE = 1024
+ATLAS_PADDING = 1  # Keeps scaled blits from bleeding into the neighbour
+
+
+class SpriteAtlas:
+    # Packs many small sprites into a few large pages using shelves (rows of
+    # sprites sharing a height band). Callers get back subsurfaces of a page,
+    # so every draw blits from one shared source surface and the individual
+    # decoded images can be thrown away.
+    def __init__(self, page_size=ATLAS_PAGE_SIZE, padding=ATLAS_PADDING):
+        self.page_size = page_size
+        self.padding = padding
+        self.pages = []
+        self.rects = {}    # name -> (page index, Rect)
+        self.sprites = {}  # name -> subsurface
+        self.shelves = []  # per page: list of [y, height, next_x]
+        self.used_area = 0
+        self.mapping = None  # mmap backing adopted pages, if any
+
+    def new_page(self):
+        page = pygame.Surface((self.page_size, self.page_size), pygame.SRCALPHA)
+        if pygame.display.get_init() and pygame.display.get_surface():
+            page = page.convert_alpha()
+        page.fill((0, 0, 0, 0))
+        self.pages.append(page)
+        self.shelves.append([])
+        return len(self.pages) - 1
+
+    def find_space(self, w, h):
+        pad = self.padding
+        for idx, shelves in enumerate(self.shelves):
+            for shelf in shelves:
+                y, height, next_x = shelf
+                if h <= height and next_x + w <= self.page_size:
+                    shelf[2] = next_x + w + pad
+                    return idx, next_x, y
+            top = shelves[-1][0] + shelves[-1][1] + pad if shelves else 0
+            if top + h <= self.page_size:
+                shelves.append([top, h, w + pad])
+                return idx, 0, top
+        idx = self.new_page()
+        self.shelves[idx].append([0, h, w + pad])
+        return idx, 0, 0
+
+    def add(self, name, surface):
+        if name in self.sprites:
+            return self.sprites[name]
+        w, h = surface.get_size()
+        if w > self.page_size or h > self.page_size:
+            # Too big to share a page; keep it as its own surface
+            self.sprites[name] = surface
+            return surface
+        idx, x, y = self.find_space(w, h)
+        rect = pygame.Rect(x, y, w, h)
+        # MAX onto a cleared page copies pixels (and alpha) exactly
+        self.pages[idx].blit(surface, rect, special_flags=pygame.BLEND_RGBA_MAX)
+        self.rects[name] = (idx, rect)
+        self.sprites[name] = self.pages[idx].subsurface(rect)
+        self.used_area += w * h
+        return self.sprites[name]
+
+    def pack(self, surfaces):
+        # Tallest first gives much tighter shelves than arrival order
+        order = sorted(surfaces.items(), key=lambda kv: -kv[1].get_height())
+        for name, surface in order:
+            self.add(name, surface)
+        return {name: self.sprites[name] for name in surfaces}
+
+    def adopt(self, pages, rects):
+        # Take over pages that were packed offline (see assetpack.py)
+        self.pages = list(pages)
+        self.shelves = [[[0, self.page_size, self.page_size]] for _ in self.pages]
+        for name, (idx, rect) in rects.items():
+            self.rects[name] = (idx, rect)
+            self.sprites[name] = self.pages[idx].subsurface(rect)
+            self.used_area += rect.w * rect.h
+        return self.sprites
+
+    def get(self, name):
+        return self.sprites.get(name)
+
+    def stats(self):
+        total = len(self.pages) * self.page_size * self.page_size
+        fill = self.used_area / total if total else 0
+        return {"pages": len(self.pages), "sprites": len(self.rects), "fill": fill}
@@ -0,0 +1,333 @@
+import argparse
+import collections
+import math
+import multiprocessing
+import random
+import statistics
+import time
+
+import settings
+from settings import WIDTH, HEIGHT, FPS, MAX_FUEL, MAX_CARRY_BASE
+from main import Game
+
+# --- BALANCE RUNNER ---
+# `python balance.py --runs 2000` plays that many headless games with a
+# scripted bot, each on its own world seed, spread over a process pool, and
+# prints how long the bot survives, what killed it, what it gathered in each
+# biome and how far it got through the crafting milestones. Runs share
+# nothing, so throughput scales with the number of worker processes.
+# The bot is deliberately simple and the same for every run: it is a fixed
+# yardstick for comparing ENEMY_DATA / RECIPES / fire decay changes, not a
+# model of a real player.
+MILESTONES = ["Fabric", "Campfire", "Tent", "Lantern", "keeper", "pyre"]
+BOT_CARRY = MAX_CARRY_BASE + 3   # Items gathered before heading home
+BOT_RANGE = 4                    # Furthest room (each axis) a trip aims for
+BOT_MARGIN = 15                  # Fire kept in reserve on top of the walk home
+BOT_FIRE_PER_ROOM = 3            # Fire the walk through one room costs, roughly
+STUCK_FRAMES = FPS               # Barely moving this long means stuck
+WATER_LOOKAHEAD = 25             # Px ahead the bot checks for water
+HUB = (0, 0)
+
+
+def toward(x0, y0, x1, y1):
+    dx, dy = x1 - x0, y1 - y0
+    d = math.hypot(dx, dy)
+    return (dx / d, dy / d) if d > 1 else (0, 0)
+
+
+class Bot:
+    # Gathers on trips out from the hub and comes back to feed the fire when
+    # its pack is full or the fire gets low. In the hub it first stocks the
+    # pile and hires the keeper, then feeds the fire and stores the rest.
+    # Fights back when something is chasing it and crafts what it can.
+    def __init__(self, game, rng):
+        self.game = game
+        self.rng = rng
+        self.target = None       # Room a trip is heading for
+        self.home = False
+        self.milestones = {}     # name -> frame first reached
+        self.gathered = collections.Counter()  # (biome, item) -> count
+        self.kills = collections.Counter()
+        self.last_pos = (0, 0)
+        self.last_check = 0
+        self.unstick = 0
+        self.unstick_dir = (0, 0)
+
+    def reach(self, name):
+        self.milestones.setdefault(name, self.game.world_tick)
+
+    def distance_home(self):
+        x, y = self.game.current_room_coords
+        return abs(x) + abs(y)
+
+    def walk_to_room(self, target):
+        # Out through the edge that gets closer to target, one axis at a time
+        game = self.game
+        player = game.player
+        x, y = game.current_room_coords
+        if target[0] != x:
+            edge = (WIDTH + 30 if target[0] > x else -30, HEIGHT // 2)
+        else:
+            edge = (WIDTH // 2, HEIGHT + 30 if target[1] > y else -30)
+        return toward(player.pos_x, player.pos_y, *edge)
+
+    def stuck_check(self):
+        game = self.game
+        player = game.player
+        if game.world_tick - self.last_check >= STUCK_FRAMES:
+            moved = math.hypot(player.pos_x - self.last_pos[0], player.pos_y - self.last_pos[1])
+            if moved < 20:
+                self.unstick = FPS // 2
+                angle = self.rng.uniform(0, 2 * math.pi)
+                self.unstick_dir = (math.cos(angle), math.sin(angle))
+            self.last_pos = (player.pos_x, player.pos_y)
+            self.last_check = game.world_tick
+
+    def try_craft(self):
+        game = self.game
+        inventory = game.player.inventory
+        wanted = ["Lantern", "Tent", "Fabric"]
+        if game.fire_health < 40:
+            wanted.insert(0, "Campfire")
+        for name in wanted:
+            if name in ("Lantern", "Tent") and name in self.milestones:
+                continue
+            if name == "Fabric" and "Tent" in self.milestones:
+                continue
+            if game.crafter.plan(inventory, name):
+                game.craft(name)
+                if game.state == "SLOT_MENU":
+                    game.state = "PLAY"  # The tent's save menu; the bot never saves
+                self.reach(name)
+                return
+
+    def fight(self):
+        # Steer into the nearest enemy that is after us and swing
+        game = self.game
+        player = game.player
+        best, best_d = None, 60
+        for enemy in game.current_room.enemies:
+            if enemy.state == "IDLE":
+                continue
+            d = math.hypot(enemy.rect.centerx - player.pos_x, enemy.rect.centery - player.pos_y)
+            if d < best_d:
+                best, best_d = enemy, d
+        if best is None:
+            return None
+        if player.attack():
+            before = len(game.current_room.enemies)
+            game.handle_combat()
+            if len(game.current_room.enemies) < before:
+                self.kills[best.name] += 1
+        return toward(player.pos_x, player.pos_y, best.rect.centerx, best.rect.centery)
+
+    def in_hub(self):
+        game = self.game
+        player = game.player
+        inventory = player.inventory
+        px, py = player.pos_x, player.pos_y
+        if not game.automation_unlocked:
+            if len(game.wood_stockpile) >= 5:
+                spot = game.npc.rect.center
+            elif len(inventory):
+                spot = game.stockpile_rect.center
+            else:
+                spot = None
+        elif len(inventory) and game.fire_health <= MAX_FUEL - 15:
+            spot = (WIDTH // 2, HEIGHT // 2)
+        elif len(inventory):
+            spot = game.stockpile_rect.center
+        else:
+            spot = None
+
+        if spot is None:
+            self.home = False
+            self.target = None
+            return None
+        if math.hypot(spot[0] - px, spot[1] - py) < 30:
+            game.handle_interaction()
+            if game.automation_unlocked:
+                self.reach("keeper")
+            return (0, 0)
+        return toward(px, py, *spot)
+
+    def gather(self):
+        # Nearest item in this room, picked up once close enough
+        game = self.game
+        player = game.player
+        items = game.current_room.items
+        if not items:
+            return None
+        item = min(items, key=lambda i: math.hypot(i.centerx - player.pos_x, i.centery - player.pos_y))
+        if math.hypot(item.centerx - player.pos_x, item.centery - player.pos_y) < 40:
+            biome = game.current_room.biome
+            game.handle_interaction()
+            if item not in items:
+                self.gathered[(biome, item.name)] += 1
+            return (0, 0)
+        return toward(player.pos_x, player.pos_y, item.centerx, item.centery)
+
+    def light_pyres(self):
+        game = self.game
+        player = game.player
+        if not (player.has_lantern or player.carrying_torch):
+            return None
+        for pyre in game.current_room.pyres:
+            if not pyre.lit:
+                cx, cy = pyre.rect.center
+                if math.hypot(cx - player.pos_x, cy - player.pos_y) < 50:
+                    game.handle_interaction()
+                    if pyre.lit:
+                        self.reach("pyre")
+                    return (0, 0)
+                return toward(player.pos_x, player.pos_y, cx, cy)
+        return None
+
+    def avoid_water(self, steer):
+        # Turn aside from water a step ahead: left, right, then back
+        game = self.game
+        player = game.player
+        water = game.current_room.water_tiles
+        if not water or steer == (0, 0):
+            return steer
+        dx, dy = steer
+        for cand in ((dx, dy), (-dy, dx), (dy, -dx), (-dx, -dy)):
+            ax, ay = player.pos_x + cand[0] * WATER_LOOKAHEAD, player.pos_y + cand[1] * WATER_LOOKAHEAD
+            if not any(w.collidepoint(ax, ay) for w in water):
+                return cand
+        return steer
+
+    def act(self):
+        game = self.game
+        self.stuck_check()
+        self.try_craft()
+        steer = self.fight()
+        if steer is None and self.unstick:
+            self.unstick -= 1
+            steer = self.unstick_dir
+        if steer is None:
+            room = game.current_room_coords
+            if not self.home and (len(game.player.inventory) >= BOT_CARRY or
+                                  game.fire_health < BOT_MARGIN + BOT_FIRE_PER_ROOM * self.distance_home()):
+                self.home = True
+            if room == HUB and (self.home or self.target is None):
+                steer = self.in_hub()
+            if steer is None and not self.home:
+                steer = self.gather() or self.light_pyres()
+            if steer is None:
+                if self.home:
+                    steer = self.walk_to_room(HUB)
+                else:
+                    if self.target is None or self.target == room:
+                        self.target = (self.rng.randint(-BOT_RANGE, BOT_RANGE),
+                                       self.rng.randint(-BOT_RANGE, BOT_RANGE))
+                    if self.target == room:
+                        steer = (0, 0)
+                    else:
+                        steer = self.walk_to_room(self.target)
+            steer = self.avoid_water(steer)
+        game.steer = steer
+
+
+def play(seed, max_frames):
+    # One game on its own seed. Everything random (world, keeper, bot) is
+    # derived from it, so a run can be replayed exactly.
+    random.seed(seed)
+    game = play.game
+    game.reset_game(seed)
+    game.free_crafting = False
+    game.state = "PLAY"
+    bot = Bot(game, random.Random(seed ^ 0x5EED))
+    rooms = set()
+    while game.state == "PLAY" and game.world_tick < max_frames:
+        bot.act()
+        game.update()
+        rooms.add(game.current_room_coords)
+    died = game.state == "GAME_OVER"
+    return {
+        "seed": seed,
+        "frames": game.world_tick,
+        "cause": game.death_cause if died else None,
+        "gathered": dict(bot.gathered),
+        "milestones": bot.milestones,
+        "kills": dict(bot.kills),
+        "rooms": len(rooms),
+    }
+
+
+def init_worker(fire_decay):
+    if fire_decay is not None:
+        settings.FIRE_DECAY = fire_decay  # Game and rest.py read it from settings
+    play.game = Game(headless=True)
+
+
+def run(runs, minutes, seed=0, workers=None, fire_decay=None):
+    workers = workers or multiprocessing.cpu_count()
+    max_frames = int(minutes * 60 * FPS)
+    seeds = [seed + i for i in range(runs)]
+    start = time.perf_counter()
+    if workers == 1:
+        init_worker(fire_decay)
+        results = [play(s, max_frames) for s in seeds]
+    else:
+        with multiprocessing.get_context("spawn").Pool(
+                workers, init_worker, (fire_decay,)) as pool:
+            results = pool.starmap(play, [(s, max_frames) for s in seeds],
+                                   chunksize=max(1, runs // (workers * 8)))
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def report(results, minutes, elapsed, workers):
+    n = len(results)
+    minutes_lived = sorted(r["frames"] / (60 * FPS) for r in results)
+    quantile = lambda q: minutes_lived[min(n - 1, int(q * n))]
+    print(f"{n} runs of up to {minutes:g} min in {elapsed:.1f}s "
+          f"on {workers} workers ({n / elapsed:.1f} runs/s)")
+    print(f"survival (min): mean {statistics.mean(minutes_lived):.2f}  "
+          f"p10 {quantile(0.1):.2f}  median {quantile(0.5):.2f}  p90 {quantile(0.9):.2f}  "
+          f"rooms/run {statistics.mean(r['rooms'] for r in results):.1f}")
+
+    causes = collections.Counter(r["cause"] or "survived" for r in results)
+    print("\noutcome                 runs      %")
+    for cause, count in causes.most_common():
+        print(f"{cause:<20}{count:8d} {100 * count / n:6.1f}")
+
+    gathered = collections.Counter()
+    for r in results:
+        gathered.update(r["gathered"])
+    print("\nbiome       item        per run")
+    for (biome, item), count in sorted(gathered.items()):
+        print(f"{biome:<12}{item:<12}{count / n:7.2f}")
+
+    print("\nmilestone     reached   median min")
+    for name in MILESTONES:
+        times = [r["milestones"][name] / (60 * FPS) for r in results if name in r["milestones"]]
+        median = f"{statistics.median(times):.2f}" if times else "-"
+        print(f"{name:<12}{100 * len(times) / n:8.1f}% {median:>12}")
+
+    kills = collections.Counter()
+    for r in results:
+        kills.update(r["kills"])
+    if kills:
+        print("\nenemy          kills/run")
+        for name, count in kills.most_common():
+            print(f"{name:<16}{count / n:8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Monte Carlo balance runs")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--minutes", type=float, default=10, help="Game minutes per run at most")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first run")
+    parser.add_argument("--workers", type=int, default=None, help="Default: one per core")
+    parser.add_argument("--fire-decay", type=float, default=None,
+                        help=f"Fuel lost per frame (default {settings.FIRE_DECAY})")
+    args = parser.parse_args()
+    workers = args.workers or multiprocessing.cpu_count()
+    results, elapsed = run(args.runs, args.minutes, args.seed, workers, args.fire_decay)
+    report(results, args.minutes, elapsed, workers)
+
+
+if __name__ == "__main__":
+    main()
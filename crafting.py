@@ -0,0 +1,93 @@
+from settings import RECIPES
+
+MAX_PLAN_COUNT = 99  # Upper bound when counting how many of something we can make
+
+
+class CraftingEngine:
+    # Works out what can be crafted from an Inventory, including recipes whose
+    # ingredients are themselves craftable (Reeds -> Fabric -> Tent). The
+    # recipe graph is resolved once; per-recipe results are cached against
+    # the inventory's version so the menu costs nothing between changes.
+    def __init__(self, recipes=RECIPES):
+        self.recipes = recipes
+        self.deps = {name: [k for k in r['cost'] if k in recipes]
+                     for name, r in recipes.items()}
+        self.order = self._topological_order()
+        self._cache_key = None
+        self._status = {}
+
+    def _topological_order(self):
+        order = []
+        state = {}  # name -> 1 visiting, 2 done
+
+        def visit(name):
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"recipe cycle through {name}")
+            state[name] = 1
+            for dep in self.deps[name]:
+                visit(dep)
+            state[name] = 2
+            order.append(name)
+
+        for name in self.recipes:
+            visit(name)
+        return order
+
+    # --- PLANNING ---
+    def _plan(self, name, qty, avail, steps):
+        for ingredient, need in self.recipes[name]['cost'].items():
+            total = need * qty
+            have = avail.get(ingredient, 0)
+            if have >= total:
+                avail[ingredient] = have - total
+            elif ingredient in self.recipes:
+                avail[ingredient] = 0
+                if not self._plan(ingredient, total - have, avail, steps):
+                    return False
+            else:
+                return False
+        steps.append((name, qty))
+        return True
+
+    def plan(self, inventory, name, qty=1):
+        # Returns [(recipe, count), ...] with sub-crafts first, or None
+        steps = []
+        if self._plan(name, qty, dict(inventory.counts()), steps):
+            return steps
+        return None
+
+    def status(self, inventory):
+        # name -> (how many can be made, whether sub-crafts are needed)
+        key = (inventory, inventory.version)
+        if self._cache_key == key:
+            return self._status
+        counts = inventory.counts()
+        status = {}
+        for name in self.order:
+            avail = dict(counts)
+            made = 0
+            multi = False
+            while made < MAX_PLAN_COUNT:
+                trial = dict(avail)
+                steps = []
+                if not self._plan(name, 1, trial, steps):
+                    break
+                avail = trial
+                made += 1
+                multi = multi or len(steps) > 1
+            status[name] = (made, multi)
+        self._status = status
+        self._cache_key = key
+        return status
+
+    def execute(self, inventory, steps):
+        # Consumes every step's cost. Intermediate products go into the
+        # inventory (and are eaten by the next step); the final product is
+        # left to the caller, since most recipes are effects, not items.
+        for i, (name, qty) in enumerate(steps):
+            for k, v in self.recipes[name]['cost'].items():
+                inventory.remove(k, v * qty)
+            if i < len(steps) - 1:
+                inventory.extend([name] * qty)
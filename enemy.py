@@ -5,10 +5,89 @@ import os
 from settings import *
 
 
+ACTIONS = ["idle", "walk", "attack", "howl"]
+DIRECTIONS = ["down", "up", "left", "right"]
+WOLF_VARIANTS = ["grey_wolf", "brown_wolf", "black_wolf"]
+VARIANT_NAMES = WOLF_VARIANTS + [n for n in ENEMY_DATA if n != "wolf"]
+
+ANIMATIONS = {}  # variant name -> {"walk_down": [frames], ...}
+# Called with a variant name the first time one is drawn before its sheets
+# are in ANIMATIONS. The AssetManager swaps in its own (atlas backed) loader.
+ANIMATION_LOADER = None
+
+
+def variant_color(name):
+    if "black" in name:
+        return (50, 50, 50)
+    if "brown" in name:
+        return (139, 69, 19)
+    if "grey" in name:
+        return (128, 128, 128)
+    return ENEMY_DATA.get(name, ENEMY_DATA["wolf"])[4]
+
+
+def make_placeholder(name, action):
+    c = variant_color(name)
+    if action == "attack":
+        c = (255, 0, 0)
+    if action == "howl":
+        c = (0, 0, 255)
+
+    s = pygame.Surface((30, 30))
+    s.fill(c)
+    pygame.draw.rect(s, (0, 0, 0), (0, 0, 30, 30), 1)
+    pygame.draw.rect(s, (0, 0, 0), (5, 5, 5, 5))
+    return [s]
+
+
+def load_variant_animations(name):
+    anims = {}
+    for action in ACTIONS:
+        for direction in DIRECTIONS:
+            # This now looks for "black_wolf_walk_down.png", etc.
+            filename = f"{name}_{action}_{direction}.png"
+            path = os.path.join("assets", filename)
+            key = f"{action}_{direction}"
+
+            if os.path.exists(path):
+                try:
+                    # No convert_alpha: this may run on a loader thread, and
+                    # the frames are copied into display-format atlas pages
+                    sheet = pygame.image.load(path)
+                    sprite_w, sprite_h = 32, 32
+                    sheet_w = sheet.get_width()
+                    frames_count = sheet_w // sprite_w
+
+                    frames = []
+                    for i in range(frames_count):
+                        frames.append(sheet.subsurface(
+                            (i * sprite_w, 0, sprite_w, sprite_h)))
+
+                    anims[key] = frames
+
+                except (pygame.error, ValueError) as e:
+                    print(f"Error loading {filename}: {e}")
+                    anims[key] = make_placeholder(name, action)
+            else:
+                anims[key] = make_placeholder(name, action)
+    return anims
+
+
+def load_all_animations():
+    return {name: load_variant_animations(name) for name in VARIANT_NAMES}
+
+
+def register_animations(name, anims):
+    ANIMATIONS[name] = anims
+    return anims
+
+
 class Enemy:
-    def __init__(self, x, y, biome_type):
+    def __init__(self, x, y, biome_type, rng=random, variant=None):
+        self.uid = 0
         self.x = x
         self.y = y
+        self.home = (x, y)  # Where it walks back to when left alone
         self.rect = pygame.Rect(x, y, 30, 30)
 
         # 1. Base Stats
@@ -24,18 +103,21 @@ class Enemy:
         self.detection_range = stats[3]
         self.color = stats[4]
 
-        if base_name == "wolf":
+        if variant is None and base_name == "wolf":
             # Roll for variant
-            roll = random.randint(1, 100)
-            if roll <= 60:
+            roll = rng.randint(1, 100)
+            variant = "grey_wolf" if roll <= 60 else "brown_wolf" if roll <= 90 else "black_wolf"
+        if variant:
+            # Given outright when a stored room is rebuilt, see worldstore.py
+            if variant == "grey_wolf":
                 self.name = "grey_wolf"
                 # Standard stats
-            elif roll <= 90:
+            elif variant == "brown_wolf":
                 self.name = "brown_wolf"
                 self.speed += 0.5  # Faster
                 self.hp += 20
                 self.max_hp += 20
-            else:
+            elif variant == "black_wolf":
                 self.name = "black_wolf"
                 self.damage = 50  # 2-Shot Kill (Player has 100 HP)
                 self.hp += 50
@@ -45,6 +127,8 @@ class Enemy:
 
         # AI State Machine
         self.state = "IDLE"  # IDLE, CHASE, ATTACK, HOWL, HIT
+        self.last_think = 0  # Frames of the AIScheduler, see ai.py
+        self.next_think = 0
         self.cooldown_timer = 0
         self.stun_timer = 0
 
@@ -53,70 +137,27 @@ class Enemy:
         self.frame_index = 0
         self.anim_timer = 0
 
-        # Load Assets
-        self.animations = {}
-        self.load_animations()
-
-    def load_animations(self):
-        actions = ["idle", "walk", "attack", "howl"]
-        directions = ["down", "up", "left", "right"]
-
-        for action in actions:
-            for direction in directions:
-                # This now looks for "black_wolf_walk_down.png", etc.
-                filename = f"{self.name}_{action}_{direction}.png"
-                path = os.path.join("assets", filename)
-                key = f"{action}_{direction}"
-
-                if os.path.exists(path):
-                    try:
-                        sheet = pygame.image.load(path).convert_alpha()
-                        sprite_w, sprite_h = 32, 32
-                        sheet_w = sheet.get_width()
-                        frames_count = sheet_w // sprite_w
-
-                        frames = []
-                        for i in range(frames_count):
-                            frames.append(sheet.subsurface(
-                                (i * sprite_w, 0, sprite_w, sprite_h)))
-
-                        self.animations[key] = frames
-
-                    except Exception as e:
-                        print(f"Error loading {filename}: {e}")
-                        self.animations[key] = self.make_placeholder(action)
-                else:
-                    self.animations[key] = self.make_placeholder(action)
+    @property
+    def animations(self):
+        # Shared by every enemy of the same variant and only looked up when
+        # drawn, so rooms built off screen (save replay) never load sheets
+        anims = ANIMATIONS.get(self.name)
+        if anims is None:
+            loader = ANIMATION_LOADER or load_variant_animations
+            anims = register_animations(self.name, loader(self.name))
+        return anims
 
     def make_placeholder(self, action):
-        frames = []
-        c = self.color
-        if "black" in self.name:
-            c = (50, 50, 50)
-        elif "brown" in self.name:
-            c = (139, 69, 19)
-        elif "grey" in self.name:
-            c = (128, 128, 128)
-
-        if action == "attack":
-            c = (255, 0, 0)
-        if action == "howl":
-            c = (0, 0, 255)
-
-        s = pygame.Surface((30, 30))
-        s.fill(c)
-        pygame.draw.rect(s, (0, 0, 0), (0, 0, 30, 30), 1)
-        pygame.draw.rect(s, (0, 0, 0), (5, 5, 5, 5))
-        return [s]
-
-    def update(self, player, all_enemies):
+        return make_placeholder(self.name, action)
+
+    def update(self, player, all_enemies, flow=None, ticks=1):
+        # ticks: frames since the last update (see ai.py), for the animation
         dist = math.hypot(player.pos_x - self.x, player.pos_y - self.y)
 
-        # Animation Tick
-        self.anim_timer += 1
-        if self.anim_timer > 10:
-            self.anim_timer = 0
-            self.frame_index += 1
+        # Animation Tick: a frame every 11 ticks, however many were skipped
+        self.anim_timer += ticks
+        self.frame_index += self.anim_timer // 11
+        self.anim_timer %= 11
 
         # --- FIX 1: STUN LOGIC ---
         if self.state == "HIT":
@@ -141,11 +182,17 @@ class Enemy:
             elif dist > self.detection_range * 1.5:
                 self.state = "IDLE"
             else:
-                # Move towards player
-                angle = math.atan2(player.pos_y - self.y,
-                                   player.pos_x - self.x)
-                dx = math.cos(angle)
-                dy = math.sin(angle)
+                # Move towards player, round obstacles if the room has a
+                # flow field (see navigation.py), else in a straight line
+                half = self.rect.width / 2
+                steer = flow.direction(self.x + half, self.y + half) if flow else None
+                if steer:
+                    dx, dy = steer
+                else:
+                    angle = math.atan2(player.pos_y - self.y,
+                                       player.pos_x - self.x)
+                    dx = math.cos(angle)
+                    dy = math.sin(angle)
 
                 # --- FIX 2: SEPARATION (Don't stack) ---
                 for other in all_enemies:
@@ -159,18 +206,28 @@ class Enemy:
                             dy += math.sin(push_angle) * 0.5
                 # ----------------------------------------
 
-                self.x += dx * self.speed
-                self.y += dy * self.speed
+                nx = self.x + dx * self.speed
+                ny = self.y + dy * self.speed
+                if flow and flow.is_blocked(nx + half, ny + half) \
+                        and not flow.is_blocked(self.x + half, self.y + half):
+                    # Slide along whatever is in the way instead of entering it
+                    if not flow.is_blocked(nx + half, self.y + half):
+                        ny = self.y
+                    elif not flow.is_blocked(self.x + half, ny + half):
+                        nx = self.x
+                    else:
+                        nx, ny = self.x, self.y
+                self.x, self.y = nx, ny
 
         elif self.state == "ATTACK":
             attack_key = f"attack_{self.facing}"
             frames = self.animations.get(
-                attack_key, self.make_placeholder("attack"))
+                attack_key) or self.make_placeholder("attack")
             duration = len(frames) * 10
 
             if self.frame_index * 10 >= max(30, duration):
                 if dist < 40:
-                    player.take_damage(self.damage)
+                    player.take_damage(self.damage, self.name)
 
                 self.state = "HOWL"
                 self.frame_index = 0
@@ -178,7 +235,7 @@ class Enemy:
         elif self.state == "HOWL":
             howl_key = f"howl_{self.facing}"
             frames = self.animations.get(
-                howl_key, self.make_placeholder("howl"))
+                howl_key) or self.make_placeholder("howl")
             duration = len(frames) * 10
 
             if self.frame_index * 10 >= max(30, duration):
@@ -199,15 +256,34 @@ class Enemy:
 
         self.rect.topleft = (self.x, self.y)
 
+    def return_home(self, frames):
+        # Closed form for `frames` updates with nobody around: whatever it
+        # was doing, it walks straight back to where it spawned and idles
+        self.state = "IDLE"
+        self.stun_timer = 0
+        self.frame_index = 0
+        hx, hy = self.home
+        dist = math.hypot(hx - self.x, hy - self.y)
+        step = self.speed * frames
+        if dist <= step:
+            self.x, self.y = hx, hy
+        else:
+            self.x += (hx - self.x) * step / dist
+            self.y += (hy - self.y) * step / dist
+        self.rect.topleft = (self.x, self.y)
+
     def take_damage(self, dmg):
         self.hp -= dmg
         # --- FIX 1 PART B: FORCE HIT STATE ---
         self.state = "HIT"
         self.stun_timer = 20  # 20 frames of stun
+        self.next_think = 0  # Wake up now if the scheduler had us asleep
 
-        # Knockback
+        # Knockback, applied to the rect at once: update() leaves the rect
+        # alone while stunned and may not run this frame anyway
         self.x += random.randint(-15, 15)
         self.y += random.randint(-15, 15)
+        self.rect.topleft = (self.x, self.y)
 
     def draw(self, screen):
         action = "idle"
@@ -225,7 +301,7 @@ class Enemy:
 
         if not frames:
             frames = self.animations.get(
-                f"idle_{self.facing}", self.make_placeholder(action))
+                f"idle_{self.facing}") or self.make_placeholder(action)
 
         img = frames[self.frame_index % len(frames)]
         screen.blit(img, (self.x, self.y))
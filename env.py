@@ -0,0 +1,264 @@
+import math
+import multiprocessing
+import random
+import time
+
+import numpy as np
+
+from settings import WIDTH, HEIGHT, MAX_FUEL, RECIPES
+from main import Game
+from raster import Rasterizer, RASTER_CELL
+
+# --- TRAINING ENVIRONMENT ---
+# Gym-style wrapper around a headless Game: reset() -> (obs, info) and
+# step(action) -> (obs, reward, terminated, truncated, info). Nothing is drawn
+# and no window is opened; the game runs exactly as it does when played, with
+# the agent standing in for the keyboard. An action is a pair (move, button):
+#   move   0 stand still, 1-8 walk E, NE, N, NW, W, SW, S, SE
+#   button 0 nothing, 1 jump, 2 attack, 3 interact
+# Each step holds the action for FRAME_SKIP game frames. VectorEnv steps N
+# games in-process and ProcessVectorEnv spreads them over worker processes;
+# both take an (N, 2) action array and return stacked numpy arrays.
+# grid() / grids() give the spatial view of the same state from raster.py.
+MOVES = [(0, 0), (1, 0), (1, -1), (0, -1), (-1, -1),
+         (-1, 0), (-1, 1), (0, 1), (1, 1)]
+BUTTONS = ["none", "jump", "attack", "interact"]
+ITEM_NAMES = ["Wood", "branch", "Reeds", "Flint", "Fur", "Oil", "Iron"] + list(RECIPES)
+NEAREST_ENEMIES = 4
+FRAME_SKIP = 4
+MAX_STEPS = 5000
+
+# Observation layout, all float32
+OBS_PLAYER = 10  # fire, hp, x, y, z, room x, room y, torch, lantern, keeper
+OBS_ITEMS = 1 + len(ITEM_NAMES)  # stockpile size, then carried count per item
+OBS_ENEMY = 4  # dx, dy, hp fraction, awake; nearest first, zero padded
+OBS_TARGETS = 6  # nearest item dx, dy, present; nearest echo dx, dy, present
+OBS_SIZE = OBS_PLAYER + OBS_ITEMS + NEAREST_ENEMIES * OBS_ENEMY + OBS_TARGETS
+
+# Reward: fire and health gained (lost) as fractions, a bonus per item
+# picked up, and a penalty for dying
+REWARD_HP = 0.5
+REWARD_ITEM = 0.1
+REWARD_DEATH = -1.0
+
+
+class KindleEnv:
+    def __init__(self, seed=None, frame_skip=FRAME_SKIP, max_steps=MAX_STEPS,
+                 grid_cell=RASTER_CELL):
+        self.game = Game(headless=True)
+        self.rng = random.Random(seed)  # World seeds for successive episodes
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.steps = 0
+        self.raster = Rasterizer(grid_cell)
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng.seed(seed)
+        game = self.game
+        game.reset_game(self.rng.randrange(2**31))
+        game.state = "PLAY"
+        game.crafting_open = False
+        self.steps = 0
+        return self.observe(), {"seed": game.world_seed}
+
+    def step(self, action):
+        move, button = action
+        game = self.game
+        player = game.player
+        fire, hp, carried = game.fire_health, player.hp, len(player.inventory)
+
+        if button == 1:
+            player.jump()
+        elif button == 2:
+            if player.attack():
+                game.handle_combat()
+        elif button == 3:
+            game.handle_interaction()
+            if game.state in ("SLOT_MENU", "TYPING"):
+                game.state = "PLAY"  # Tents open the save menu; no saving here
+        game.steer = MOVES[move]
+        for _ in range(self.frame_skip):
+            game.update()
+            if game.state != "PLAY":
+                break
+        self.steps += 1
+
+        terminated = game.state == "GAME_OVER"
+        truncated = not terminated and self.steps >= self.max_steps
+        reward = ((game.fire_health - fire) / MAX_FUEL +
+                  REWARD_HP * (player.hp - hp) / player.max_hp +
+                  REWARD_ITEM * max(0, len(player.inventory) - carried))
+        if terminated:
+            reward += REWARD_DEATH
+        info = {"room": game.current_room_coords, "steps": self.steps}
+        return self.observe(), reward, terminated, truncated, info
+
+    def observe(self):
+        game = self.game
+        player = game.player
+        room = game.current_room
+        px, py = player.pos_x, player.pos_y
+        obs = np.zeros(OBS_SIZE, np.float32)
+        obs[:OBS_PLAYER] = (
+            game.fire_health / MAX_FUEL, player.hp / player.max_hp,
+            px / WIDTH, py / HEIGHT, player.z / 100,
+            game.current_room_coords[0], game.current_room_coords[1],
+            player.torch_health / 100 if player.carrying_torch else 0.0,
+            player.has_lantern, game.automation_unlocked)
+
+        i = OBS_PLAYER
+        obs[i] = len(game.wood_stockpile)
+        for j, name in enumerate(ITEM_NAMES):
+            obs[i + 1 + j] = player.inventory.count(name)
+
+        i += OBS_ITEMS
+        enemies = sorted(room.enemies, key=lambda e: math.hypot(e.x - px, e.y - py))
+        for e in enemies[:NEAREST_ENEMIES]:
+            obs[i:i + OBS_ENEMY] = ((e.x - px) / WIDTH, (e.y - py) / HEIGHT,
+                                    e.hp / e.max_hp, e.state != "IDLE")
+            i += OBS_ENEMY
+
+        i = OBS_SIZE - OBS_TARGETS
+        if room.items:
+            item = min(room.items, key=lambda t: math.hypot(t.centerx - px, t.centery - py))
+            obs[i:i + 3] = ((item.centerx - px) / WIDTH, (item.centery - py) / HEIGHT, 1)
+        if len(room.echoes):
+            offset = room.echoes.pos - (px, py)
+            ex, ey = offset[np.argmin(np.hypot(offset[:, 0], offset[:, 1]))]
+            obs[i + 3:i + 6] = (ex / WIDTH, ey / HEIGHT, 1)
+        return obs
+
+    def grid(self):
+        # (channels, rows, cols) view of the current room; reused next call
+        return self.raster.render(self.game.current_room, self.game.player)
+
+
+class VectorEnv:
+    # N environments stepped together in this process. Finished episodes
+    # reset on their own; the last observation of the finished episode is in
+    # that env's info as "final_observation".
+    def __init__(self, n, seed=None, **kwargs):
+        seeds = [None] * n if seed is None else [seed + i for i in range(n)]
+        self.envs = [KindleEnv(s, **kwargs) for s in seeds]
+
+    def __len__(self):
+        return len(self.envs)
+
+    def reset(self, seed=None):
+        results = [env.reset(None if seed is None else seed + i)
+                   for i, env in enumerate(self.envs)]
+        return np.stack([r[0] for r in results]), [r[1] for r in results]
+
+    def step(self, actions):
+        n = len(self.envs)
+        obs = np.empty((n, OBS_SIZE), np.float32)
+        rewards = np.empty(n, np.float32)
+        terminated = np.empty(n, bool)
+        truncated = np.empty(n, bool)
+        infos = []
+        for k, (env, action) in enumerate(zip(self.envs, actions)):
+            o, rewards[k], terminated[k], truncated[k], info = env.step(action)
+            if terminated[k] or truncated[k]:
+                info["final_observation"] = o
+                o, _ = env.reset()
+            obs[k] = o
+            infos.append(info)
+        return obs, rewards, terminated, truncated, infos
+
+    def grids(self):
+        return np.stack([env.grid() for env in self.envs])
+
+    def close(self):
+        pass
+
+
+def _worker(conn, n, seed, kwargs):
+    envs = VectorEnv(n, seed, **kwargs)
+    while True:
+        command, arg = conn.recv()
+        if command == "step":
+            conn.send(envs.step(arg))
+        elif command == "reset":
+            conn.send(envs.reset(arg))
+        elif command == "grids":
+            conn.send(envs.grids())
+        else:
+            conn.close()
+            return
+
+
+class ProcessVectorEnv:
+    # Same interface as VectorEnv, with the games split across worker
+    # processes that each run a VectorEnv of their share. Each step is one
+    # round trip per worker, so it pays off once a step costs more than the
+    # pickling (several games per worker, or heavy rooms).
+    def __init__(self, n, workers=None, seed=None, **kwargs):
+        workers = max(1, min(n, workers or multiprocessing.cpu_count()))
+        sizes = [n // workers + (w < n % workers) for w in range(workers)]
+        self.bounds = np.cumsum([0] + sizes)
+        self.conns = []
+        self.procs = []
+        ctx = multiprocessing.get_context("spawn")
+        for w, size in enumerate(sizes):
+            parent, child = ctx.Pipe()
+            s = None if seed is None else seed + int(self.bounds[w])
+            proc = ctx.Process(target=_worker, args=(child, size, s, kwargs), daemon=True)
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+
+    def __len__(self):
+        return int(self.bounds[-1])
+
+    def reset(self, seed=None):
+        for w, conn in enumerate(self.conns):
+            conn.send(("reset", None if seed is None else seed + int(self.bounds[w])))
+        results = [conn.recv() for conn in self.conns]
+        return (np.concatenate([r[0] for r in results]),
+                [info for r in results for info in r[1]])
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        for w, conn in enumerate(self.conns):
+            conn.send(("step", actions[self.bounds[w]:self.bounds[w + 1]]))
+        results = [conn.recv() for conn in self.conns]
+        return (np.concatenate([r[0] for r in results]),
+                np.concatenate([r[1] for r in results]),
+                np.concatenate([r[2] for r in results]),
+                np.concatenate([r[3] for r in results]),
+                [info for r in results for info in r[4]])
+
+    def grids(self):
+        for conn in self.conns:
+            conn.send(("grids", None))
+        return np.concatenate([conn.recv() for conn in self.conns])
+
+    def close(self):
+        for conn in self.conns:
+            conn.send(("close", None))
+            conn.close()
+        for proc in self.procs:
+            proc.join()
+
+
+def benchmark(n=16, steps=200, seed=0):
+    # Random-policy throughput in agent steps per second
+    rng = np.random.default_rng(seed)
+    for name, make in (("in-process", lambda: VectorEnv(n, seed)),
+                       ("processes", lambda: ProcessVectorEnv(n, seed=seed))):
+        envs = make()
+        envs.reset(seed)
+        start = time.perf_counter()
+        for _ in range(steps):
+            actions = np.stack([rng.integers(0, len(MOVES), n),
+                                rng.integers(0, len(BUTTONS), n)], axis=1)
+            envs.step(actions)
+        elapsed = time.perf_counter() - start
+        envs.close()
+        print(f"{name:<12}{n} envs  {n * steps / elapsed:9.0f} steps/s")
+
+
+if __name__ == "__main__":
+    benchmark()
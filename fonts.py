@@ -0,0 +1,55 @@
+import json
+import os
+import pygame
+
+from settings import FONT_CACHE_FILE
+import profiler
+
+# --- FONT CACHE ---
+# SysFont scans every installed font (fc-list on Linux) the first time it is
+# used in a process. The file each (name, bold, italic) resolves to is kept in
+# FONT_CACHE_FILE, so later runs open it directly and never scan.
+_cache = None
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        try:
+            with open(FONT_CACHE_FILE, "r") as f:
+                _cache = json.load(f)
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def _save_cache():
+    try:
+        with open(FONT_CACHE_FILE, "w") as f:
+            json.dump(_cache, f, indent=1)
+    except OSError as e:
+        print(f"Could not write font cache: {e}")
+
+
+def resolve(name, bold, italic):
+    # What SysFont would pick: the styled file if there is one, otherwise
+    # the plain one with the style faked (None path = pygame's default font)
+    path = pygame.font.match_font(name, bold, italic)
+    plain = pygame.font.match_font(name) if bold or italic else path
+    fake = path == plain
+    return {"path": path, "bold": bold and fake, "italic": italic and fake}
+
+
+def sys_font(name, size, bold=False, italic=False):
+    # Drop-in for pygame.font.SysFont
+    with profiler.step(f"{name} {size}", "font"):
+        cache = _load_cache()
+        key = f"{name}|{int(bold)}|{int(italic)}"
+        entry = cache.get(key)
+        if entry is None or (entry["path"] and not os.path.exists(entry["path"])):
+            entry = cache[key] = resolve(name, bold, italic)
+            _save_cache()
+        font = pygame.font.Font(entry["path"], size)
+        font.set_bold(entry["bold"])
+        font.set_italic(entry["italic"])
+        return font
@@ -0,0 +1,99 @@
+from collections import deque
+
+
+class Inventory:
+    # Counted item stacks that still remember the order items went in, so
+    # "pop the last thing picked up" (feeding the fire, the stockpile, echo
+    # theft) behaves exactly like the old plain list did. Every operation is
+    # O(1) per item. `version` bumps on each change so UI and crafting code can
+    # cache against it.
+    def __init__(self, items=()):
+        self._order = {}   # seq -> name, insertion ordered (dict popitem is LIFO)
+        self._stacks = {}  # name -> deque of seqs, oldest first
+        self._next_seq = 0
+        self._counts_cache = None
+        self._counts_version = -1
+        self.version = 0
+        self.extend(items)
+
+    def append(self, name):
+        seq = self._next_seq
+        self._next_seq += 1
+        self._order[seq] = name
+        stack = self._stacks.get(name)
+        if stack is None:
+            stack = self._stacks[name] = deque()
+        stack.append(seq)
+        self.version += 1
+
+    def extend(self, names):
+        for name in names:
+            self.append(name)
+
+    def pop(self):
+        if not self._order:
+            raise IndexError("pop from empty inventory")
+        seq, name = self._order.popitem()
+        stack = self._stacks[name]
+        stack.pop()  # The newest copy of an item is always the newest overall
+        if not stack:
+            del self._stacks[name]
+        self.version += 1
+        return name
+
+    def pop_many(self, n):
+        # Newest first, same order as calling pop() n times
+        return [self.pop() for _ in range(min(n, len(self._order)))]
+
+    def peek(self):
+        return next(reversed(self._order.values())) if self._order else None
+
+    def remove(self, name, n=1):
+        # Oldest copies first, like list.remove
+        stack = self._stacks.get(name)
+        if stack is None or len(stack) < n:
+            raise ValueError(f"not enough {name} in inventory")
+        for _ in range(n):
+            del self._order[stack.popleft()]
+        if not stack:
+            del self._stacks[name]
+        self.version += 1
+
+    def take(self, name, n=None):
+        # Remove up to n copies (all if None); returns how many went
+        have = self.count(name)
+        n = have if n is None else min(n, have)
+        if n:
+            self.remove(name, n)
+        return n
+
+    def count(self, name):
+        stack = self._stacks.get(name)
+        return len(stack) if stack else 0
+
+    def has(self, cost):
+        return all(self.count(k) >= v for k, v in cost.items())
+
+    def counts(self):
+        # name -> count, rebuilt at most once per change
+        if self._counts_version != self.version:
+            self._counts_cache = {k: len(v) for k, v in self._stacks.items()}
+            self._counts_version = self.version
+        return self._counts_cache
+
+    def clear(self):
+        self._order.clear()
+        self._stacks.clear()
+        self.version += 1
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        return iter(list(self._order.values()))
+
+    def __contains__(self, name):
+        return name in self._stacks
+
+    def __repr__(self):
+        return f"Inventory({list(self._order.values())!r})"
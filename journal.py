@@ -0,0 +1,269 @@
+import os
+import struct
+import threading
+
+from savecodec import Writer, Reader, SaveFormatError
+from settings import JOURNAL_FILE, RECIPES
+
+# --- SAVE JOURNAL ---
+# Between full snapshots, every state change is appended here as a small
+# event and flushed every few seconds. Loading replays the events on top of
+# the snapshot. Each event carries a sequence number and each snapshot records
+# the last one it folded in, so a crash mid-compaction never replays twice.
+RECORD_LEN = struct.Struct("<I")
+
+EV_PICK = 1      # coords, item uid, item name
+EV_CRAFT = 2     # recipe name, free (dev mode)
+EV_STORE = 3     # item moved from inventory top to stockpile
+EV_TAKE = 4      # item moved from stockpile top to inventory
+EV_FEED = 5      # inventory top burned in the hub fire
+EV_PYRE = 6      # coords, pyre index
+EV_TENT = 7      # coords
+EV_ROOM = 8      # coords
+EV_LOSE = 9      # inventory top stolen by an echo
+EV_BURN = 10     # stockpile top burned by the keeper
+EV_SLAY = 11     # coords, enemy uid
+EV_HURT = 12     # coords, enemy uid, hp
+EV_ICE = 13      # coords, ice index, integrity
+EV_VITALS = 14   # fire, hp, pos, automation, lantern
+EV_SAVE = 15     # slot name
+EV_STORE_N = 16  # count: that many inventory tops moved to the stockpile
+EV_STORE_TYPE = 17  # item name, count: every copy of one item stored
+EV_TAKE_N = 18   # count: that many stockpile tops moved to the inventory
+EV_FEED_N = 19   # count: that many inventory tops burned in the hub fire
+
+# Field kinds per event, read/written with the savecodec primitives
+EVENT_FIELDS = {
+    EV_PICK: ("coord", "uvarint", "str"),
+    EV_CRAFT: ("str", "bool"),
+    EV_STORE: ("str",),
+    EV_TAKE: ("str",),
+    EV_FEED: ("str",),
+    EV_PYRE: ("coord", "uvarint"),
+    EV_TENT: ("coord",),
+    EV_ROOM: ("coord",),
+    EV_LOSE: ("str",),
+    EV_BURN: (),
+    EV_SLAY: ("coord", "uvarint"),
+    EV_HURT: ("coord", "uvarint", "num"),
+    EV_ICE: ("coord", "uvarint", "num"),
+    EV_VITALS: ("num", "num", "point", "bool", "bool"),
+    EV_SAVE: ("str",),
+    EV_STORE_N: ("uvarint",),
+    EV_STORE_TYPE: ("str", "uvarint"),
+    EV_TAKE_N: ("uvarint",),
+    EV_FEED_N: ("uvarint",),
+}
+
+
+def journal_path(slot_num):
+    return JOURNAL_FILE.format(slot=slot_num)
+
+
+class Journal:
+    def __init__(self, slot_num, seq=0):
+        self.slot = slot_num
+        self.path = journal_path(slot_num)
+        self.old_path = self.path + ".old"  # Segment being compacted
+        self.seq = seq
+        self.pending = []
+        self.file = open(self.path, "ab")
+        self.size = self.file.tell()
+
+    # --- WRITING ---
+    def append(self, kind, *fields):
+        self.seq += 1
+        w = Writer(None)
+        w.uvarint(self.seq)
+        w.buf.append(kind)
+        for field_kind, value in zip(EVENT_FIELDS[kind], fields):
+            getattr(w, field_kind)(value)
+        self.pending.append(RECORD_LEN.pack(len(w.buf)))
+        self.pending.append(bytes(w.buf))
+
+    def flush(self):
+        if not self.pending:
+            return
+        data = b"".join(self.pending)
+        self.pending = []
+        self.file.write(data)
+        self.file.flush()
+        self.size += len(data)
+
+    def rotate(self):
+        # Start a fresh segment; the caller folds the old one into a snapshot
+        # and then calls discard_old().
+        self.flush()
+        self.file.close()
+        if os.path.exists(self.old_path):
+            # The last compaction failed, so its segment is still needed
+            with open(self.path, "rb") as src, open(self.old_path, "ab") as dst:
+                dst.write(src.read())
+            os.remove(self.path)
+        else:
+            os.replace(self.path, self.old_path)
+        self.file = open(self.path, "ab")
+        self.size = 0
+
+    def discard_old(self):
+        if os.path.exists(self.old_path):
+            os.remove(self.old_path)
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def reset(self):
+        # A full snapshot was just written; nothing before it matters
+        self.pending = []
+        self.file.close()
+        self.discard_old()
+        self.file = open(self.path, "wb")
+        self.size = 0
+
+    # --- READING ---
+    def read_events(self, after_seq):
+        events = []
+        for path in (self.old_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            pos = 0
+            while pos + RECORD_LEN.size <= len(data):
+                (length,) = RECORD_LEN.unpack_from(data, pos)
+                start = pos + RECORD_LEN.size
+                if start + length > len(data):
+                    break  # Torn tail from a crash mid-flush
+                try:
+                    r = Reader(data[start:start + length])
+                    seq = r.uvarint()
+                    kind = r.data[r.pos]
+                    r.pos += 1
+                    fields = [getattr(r, k)() for k in EVENT_FIELDS[kind]]
+                except (KeyError, IndexError, SaveFormatError):
+                    break
+                if seq > after_seq:
+                    events.append((seq, kind, fields))
+                pos = start + length
+        events.sort(key=lambda e: e[0])
+        if events:
+            self.seq = max(self.seq, events[-1][0])
+        return events
+
+
+# --- REPLAY ---
+def _find(objs, uid):
+    for o in objs:
+        if o.uid == uid:
+            return o
+    return None
+
+
+def apply_event(data, kind, fields, get_room):
+    # data is a slot dict as produced by savecodec; get_room(coords) returns a
+    # live Room with the stored delta already applied.
+    inv = data["inventory"]
+    pile = data["stockpile"]
+
+    if kind == EV_PICK:
+        coords, uid, name = fields
+        room = get_room(coords)
+        item = _find(room.items, uid)
+        if item:
+            room.items.remove(item)
+            room.dirty = True
+        inv.append(name)
+    elif kind == EV_CRAFT:
+        name, free = fields
+        if not free:
+            for k, v in RECIPES[name]["cost"].items():
+                for _ in range(v):
+                    if k in inv:
+                        inv.remove(k)
+        if name == "Lantern":
+            data["lantern"] = True
+        elif name not in ("Tent", "Campfire"):
+            inv.append(name)
+    elif kind == EV_STORE:
+        if inv:
+            pile.append(inv.pop())
+    elif kind == EV_TAKE:
+        if pile:
+            inv.append(pile.pop())
+    elif kind in (EV_FEED, EV_LOSE):
+        if inv:
+            inv.pop()
+    elif kind == EV_BURN:
+        if pile:
+            pile.pop()
+    elif kind == EV_STORE_N:
+        for _ in range(min(fields[0], len(inv))):
+            pile.append(inv.pop())
+    elif kind == EV_STORE_TYPE:
+        name, count = fields
+        for _ in range(count):
+            if name in inv:
+                inv.remove(name)
+                pile.append(name)
+    elif kind == EV_TAKE_N:
+        for _ in range(min(fields[0], len(pile))):
+            inv.append(pile.pop())
+    elif kind == EV_FEED_N:
+        del inv[max(0, len(inv) - fields[0]):]
+    elif kind == EV_PYRE:
+        coords, idx = fields
+        room = get_room(coords)
+        if idx < len(room.pyres):
+            room.pyres[idx].lit = True
+            room.dirty = True
+    elif kind == EV_TENT:
+        if fields[0] not in data["tents"]:
+            data["tents"].append(fields[0])
+    elif kind == EV_ROOM:
+        data["room"] = fields[0]
+        if fields[0] not in data["revealed"]:
+            data["revealed"].append(fields[0])
+    elif kind == EV_SLAY:
+        coords, uid = fields
+        room = get_room(coords)
+        enemy = _find(room.enemies, uid)
+        if enemy:
+            room.enemies.remove(enemy)
+            room.dirty = True
+    elif kind == EV_HURT:
+        coords, uid, hp = fields
+        room = get_room(coords)
+        enemy = _find(room.enemies, uid)
+        if enemy:
+            enemy.hp = hp
+            room.dirty = True
+    elif kind == EV_ICE:
+        coords, idx, integrity = fields
+        room = get_room(coords)
+        if idx < len(room.fragile_ice):
+            room.fragile_ice[idx]['integrity'] = integrity
+            room.dirty = True
+    elif kind == EV_VITALS:
+        data["fire"], data["hp"], data["pos"], data["automation"], data["lantern"] = fields
+    elif kind == EV_SAVE:
+        data["name"] = fields[0]
+
+
+# --- BACKGROUND COMPACTION ---
+class Compactor(threading.Thread):
+    # Writes a snapshot prepared on the main thread, then drops the journal
+    # segment it replaces. All game state it touches was copied beforehand.
+    def __init__(self, journal, write_snapshot):
+        super().__init__(daemon=True)
+        self.journal = journal
+        self.write_snapshot = write_snapshot
+        self.error = None
+
+    def run(self):
+        try:
+            self.write_snapshot()
+            self.journal.discard_old()
+        except OSError as e:
+            # Keep the old segment; it is replayed on load and retried next time
+            self.error = e
@@ -1,116 +1,67 @@
+import profiler  # First, so --profile-startup can time the imports below
 import pygame
 import sys
 import random
 import math
 import os
-import json
+import time
 
 # --- IMPORT COMPONENTS ---
+import settings
 from settings import *
+from fonts import sys_font
 from player import Player
-from world import Room, NPC
-
-
-class AssetManager:
-    def __init__(self):
-        self.images = {}
-        self.animations = {}
-        self.load_assets()
-
-    def load_assets(self):
-        # 1. Helper: Create colored rect if image fails
-        def make_placeholder(color, size=(20, 30)):
-            s = pygame.Surface(size)
-            s.fill(color)
-            pygame.draw.rect(s, (0, 0, 0), s.get_rect(), 1)  # Border
-            return s
-
-        # 2. Helper: Load single image
-        def load_img(name, fallback_color, size=(20, 20)):
-            path = os.path.join("assets", f"{name}.png")
-            try:
-                img = pygame.image.load(path).convert_alpha()
-                return img
-            except:
-                return make_placeholder(fallback_color, size)
-
-        # 3. Helper: Load Sprite Sheet
-        def load_sheet(name, frames, fallback_color, size=(20, 30)):
-            path = os.path.join("assets", f"{name}.png")
-            anim_list = []
-            try:
-                sheet = pygame.image.load(path).convert_alpha()
-                w = sheet.get_width() // frames
-                h = sheet.get_height()
-                for i in range(frames):
-                    anim_list.append(sheet.subsurface((i*w, 0, w, h)))
-            except:
-                for _ in range(frames):
-                    anim_list.append(make_placeholder(fallback_color, size))
-            return anim_list
-
-        # --- LOAD STATIC IMAGES ---
-        self.images['keeper'] = load_img("keeper", (100, 100, 255), (20, 30))
-        self.images['pyre'] = load_img("pyre", (80, 80, 80), (30, 40))
-        self.images['tent'] = load_img("tent", (200, 50, 50), (60, 40))
-
-        # Terrain Objects
-        self.images['tree'] = load_img("tree", (50, 100, 50), (40, 80))
-        self.images['cactus'] = load_img("cactus", (50, 150, 50), (30, 60))
-        self.images['rock'] = load_img("rock", (100, 100, 100), (30, 30))
-
-        # Items
-        self.images['Wood'] = load_img("wood", (139, 69, 19))
-        self.images['branch'] = load_img("branch", (160, 82, 45))
-        self.images['Rope'] = load_img("rope", (193, 154, 107))
-        self.images['Reeds'] = load_img("reeds", (100, 255, 100))
-        self.images['Flint'] = load_img("flint", (50, 50, 50))
-        self.images['Fur'] = load_img("fur", (220, 220, 220))
-        self.images['Oil'] = load_img("oil", (20, 0, 50))
-        self.images['Iron'] = load_img("iron", (150, 50, 0))
-        self.images['Fabric'] = load_img("fabric", (255, 255, 255))
-
-        # --- LOAD ANIMATIONS ---
-        self.animations['fire'] = load_sheet(
-            "fire", 8, (255, 100, 0), (20, 20))
-        self.animations['idle_down'] = load_sheet(
-            "idle_down", 2, (255, 255, 255))
-        self.animations['idle_up'] = load_sheet("idle_up", 2, (255, 255, 255))
-        self.animations['idle_left'] = load_sheet(
-            "idle_left", 4, (255, 255, 255))
-        self.animations['idle_right'] = load_sheet(
-            "idle_right", 4, (255, 255, 255))
-        self.animations['walk_down'] = load_sheet(
-            "walk_down", 4, (255, 255, 255))
-        self.animations['walk_up'] = load_sheet("walk_up", 4, (255, 255, 255))
-        self.animations['walk_left'] = load_sheet(
-            "walk_left", 4, (255, 255, 255))
-        self.animations['walk_right'] = load_sheet(
-            "walk_right", 4, (255, 255, 255))
-
-    def get_image(self, name):
-        return self.images.get(name, self.images['branch'])
+from world import Room, NPC, biome_for
+from assets import AssetManager
+import savecodec
+import worldstore
+import journal
+from inventory import Inventory
+from crafting import CraftingEngine
+from minimap import Minimap
+from worldmap import WorldMap, MAP_PAN_SPEED
+from ui import UICache, backdrop, blit_centered
+from ai import AIScheduler
+import rest
+import telemetry
 
 
 class Game:
-    def __init__(self):
-        pygame.init()
-        pygame.joystick.init()
-        self.joysticks = [pygame.joystick.Joystick(
-            x) for x in range(pygame.joystick.get_count())]
-        for joy in self.joysticks:
-            joy.init()
-
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption("Kindle: Survival RPG")
+    def __init__(self, headless=False, world=None):
+        # headless: game logic only, for training and batch runs (see env.py).
+        # No window, fonts, input devices or sprite atlas; input() and draw()
+        # must not be called, and the player moves by self.steer.
+        # world: a baked world from worldgen.py to read rooms from.
+        self.headless = headless
+        self.steer = None  # (dx, dy) overriding keyboard/controller, if set
         self.clock = pygame.time.Clock()
-
-        self.font = pygame.font.SysFont("Courier New", 16)
-        self.dialogue_font = pygame.font.SysFont("Georgia", 20, italic=True)
-        self.title_font = pygame.font.SysFont("Courier New", 60, bold=True)
-        self.ui_title = pygame.font.SysFont("Courier New", 24, bold=True)
-
-        self.assets = AssetManager()
+        self.assets = None
+        if not headless:
+            # Only what the game uses: pygame.init() would also open the audio
+            # device, which can take longer than everything else here
+            with profiler.step("pygame init"):
+                pygame.display.init()
+                pygame.font.init()
+                pygame.joystick.init()
+            with profiler.step("joysticks"):
+                self.joysticks = [pygame.joystick.Joystick(
+                    x) for x in range(pygame.joystick.get_count())]
+                for joy in self.joysticks:
+                    joy.init()
+
+            with profiler.step("window"):
+                self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+                pygame.display.set_caption("Kindle: Survival RPG")
+
+            with profiler.step("fonts"):
+                self.font = sys_font("Courier New", 16)
+                self.dialogue_font = sys_font("Georgia", 20, italic=True)
+                self.title_font = sys_font("Courier New", 60, bold=True)
+                self.ui_title = sys_font("Courier New", 24, bold=True)
+
+            with profiler.step("hub assets"):
+                self.assets = AssetManager(background=True)
+                self.show_loading()
 
         # ### STATE VARIABLES ###
         self.state = "MENU"  # MENU, PLAY, GAME_OVER, SLOT_MENU, TYPING
@@ -118,76 +69,256 @@ class Game:
 
         # Save System Variables
         self.save_mode = "LOAD"  # "LOAD" or "SAVE"
-        self.slots_data = self.load_all_slots()
+        self.journal = None  # Event log of the active slot (see journal.py)
+        self.compactor = None
+        self.save_name = ""
+        self.slots_data = {}  # Read when the slot menu opens
         self.input_text = ""
         self.selected_slot = 1
         # ###########################
 
         self.free_crafting = DEV_MODE_ENABLED
+        self.crafter = CraftingEngine()
+        self.recipe_panel = None  # Rendered recipe list, see draw_crafting
+        self.recipe_panel_key = None
+        self.backpack_panel = None
+        self.backpack_panel_key = None
+        self.ui = UICache()  # Menu chrome and text, see ui.py
+        self.ai = AIScheduler()
+        self.show_ai_stats = False
 
         self.fire_health = MAX_FUEL
-        self.wood_stockpile = []
+        self.wood_stockpile = Inventory()
         self.automation_unlocked = False
         self.visited_rooms = set()
-        self.revealed_map = set()
+        self.minimap = Minimap()  # Revealed rooms, see minimap.py
+        self.world_map = WorldMap()
+        self.world_map_open = False
         self.rooms = {}
         self.tents = []
+        self.baked = None
+        if world:
+            try:
+                self.baked = worldstore.BakedWorld(world)
+            except (OSError, savecodec.SaveFormatError) as e:
+                print(f"Could not open world {world}: {e}")
+        self.world_seed = self.baked.seed if self.baked else random.randrange(2**31)
+        self.world_store = None  # RoomStore of the slot we last saved/loaded
+        self.world_store_slot = None
 
         self.player = Player(WIDTH // 2, HEIGHT // 2)
         self.npc = NPC(WIDTH//2 + 90, HEIGHT//2 - 20)
         self.stockpile_rect = pygame.Rect(
             WIDTH//2 - 100, HEIGHT//2 - 20, 40, 40)
 
+        self.current_room = None
         self.current_room_coords = (0, 0)
-        self.load_room((0, 0))
+        self.world_tick = 0  # Frames of play; rooms catch up against it on entry
+        self.fuel_lost = (None, -2)  # Last sudden fire loss: (cause, tick)
+        self.death_cause = None
+        with profiler.step("hub room"):
+            self.load_room((0, 0))
 
         self.current_dialogue = ""
         self.dialogue_timer = 0
         self.show_map = False
         self.frame_count = 0
+        telemetry.start()
+
+    def show_loading(self):
+        # Hub assets decode on the loader threads; keep the window responsive
+        # and show progress until they are all in the atlas
+        while not self.assets.hub_ready():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.assets.close()
+                    pygame.quit()
+                    sys.exit()
+            self.assets.poll()
+            self.draw_loading(*self.assets.progress())
+            pygame.display.flip()
+            profiler.mark("loading splash")
+            self.assets.wait(1 / 30)
+
+    def draw_loading(self, done, total):
+        self.screen.fill((0, 0, 0))
+        t = self.title_font.render("KINDLE", True, (255, 255, 255))
+        self.screen.blit(t, (WIDTH//2 - t.get_width()//2, 200))
+        bar = pygame.Rect(WIDTH//2 - 150, HEIGHT//2, 300, 12)
+        pygame.draw.rect(self.screen, (80, 80, 80), bar, 1)
+        fill = bar.inflate(-4, -4)
+        fill.width = fill.width * done // max(1, total)
+        pygame.draw.rect(self.screen, (255, 140, 0), fill)
 
     ### SAVE SYSTEM METHODS ###
-    def load_all_slots(self):
-        default_data = {"1": None, "2": None, "3": None}
-        if not os.path.exists(SAVE_FILE):
-            return default_data
+    def read_slots(self):
+        # Falls back to the old JSON save (and migrates it) if no binary save exists yet
         try:
-            with open(SAVE_FILE, "r") as f:
-                return json.load(f)
-        except:
-            return default_data
+            return savecodec.load_slots()
+        except (OSError, savecodec.SaveFormatError) as e:
+            print(f"Could not read saves: {e}")
+            return {"1": None, "2": None, "3": None}
 
-    def perform_save(self, slot_num, save_name):
-        data = {
+    def load_all_slots(self):
+        # For the slot menu. The active slot's newest state lives in its
+        # journal, so show the live game for it instead of the last snapshot.
+        slots = self.read_slots()
+        if self.journal:
+            slots[str(self.journal.slot)] = self.snapshot_slot(self.save_name)
+        return slots
+
+    def snapshot_slot(self, save_name):
+        return {
             "name": save_name,
             "fire": self.fire_health,
-            "inventory": self.player.inventory,
-            "stockpile": self.wood_stockpile,
+            "inventory": list(self.player.inventory),
+            "stockpile": list(self.wood_stockpile),
             "room": self.current_room_coords,
             "pos": (self.player.pos_x, self.player.pos_y),
-            "revealed": list(self.revealed_map),
-            "tents": self.tents,
+            "revealed": list(self.minimap),
+            "tents": list(self.tents),
             "automation": self.automation_unlocked,
-            "hp": self.player.hp  # Save HP
+            "hp": self.player.hp,  # Save HP
+            "seed": self.world_seed,
+            "lantern": self.player.has_lantern,
+            "jseq": self.journal.seq if self.journal else 0
         }
-        self.slots_data[str(slot_num)] = data
+
+    def perform_save(self, slot_num, save_name):
+        self.save_name = save_name
+        if self.journal and self.journal.slot == slot_num:
+            # Same slot as last time: the journal already holds every change
+            # since the snapshot, so saving is just a flush.
+            self.record(journal.EV_SAVE, save_name)
+            self.autosave()
+            self.trigger_dialogue(f"Saved to Slot {slot_num}", 120)
+            return
+
+        self.close_journal()
+        slots = self.read_slots()
+        slots[str(slot_num)] = self.snapshot_slot(save_name)
         try:
-            with open(SAVE_FILE, "w") as f:
-                json.dump(self.slots_data, f)
+            with telemetry.timed("save", kind="full", slot=slot_num,
+                                 rooms=len(self.rooms)):
+                self.save_world(slot_num)
+                savecodec.save_slots(slots)
+                self.journal = journal.Journal(slot_num)
+                self.journal.reset()
             self.trigger_dialogue(f"Saved to Slot {slot_num}", 120)
-        except:
-            print("Save failed")
+        except OSError as e:
+            print(f"Save failed: {e}")
+        self.slots_data = slots
+
+    def save_world(self, slot_num):
+        # Only rooms touched since the last save are written. Saving into a
+        # different slot first carries over everything the current store has.
+        if self.world_store_slot != slot_num:
+            path = worldstore.store_path(slot_num)
+            if self.world_store:
+                self.world_store.copy_to(path)
+                self.world_store.close()
+            elif os.path.exists(path):
+                os.remove(path)  # Left over from an older game in this slot
+            self.world_store = worldstore.RoomStore(path)
+            self.world_store_slot = slot_num
+        dirty = [r for r in self.rooms.values() if r.dirty]
+        self.world_store.write(dirty)
+        for room in dirty:
+            room.dirty = False
+
+    def open_world(self, slot_num):
+        if self.world_store:
+            self.world_store.close()
+        self.world_store = None
+        self.world_store_slot = None
+        try:
+            self.world_store = worldstore.RoomStore(worldstore.store_path(slot_num))
+            self.world_store_slot = slot_num
+        except (OSError, savecodec.SaveFormatError) as e:
+            print(f"Could not read world state: {e}")
+
+    def record(self, kind, *fields):
+        if self.journal:
+            self.journal.append(kind, *fields)
+
+    def autosave(self):
+        self.record(journal.EV_VITALS, self.fire_health, self.player.hp,
+                    (self.player.pos_x, self.player.pos_y),
+                    self.automation_unlocked, self.player.has_lantern)
+        try:
+            with telemetry.timed("save", kind="autosave", slot=self.journal.slot):
+                self.journal.flush()
+        except OSError as e:
+            print(f"Autosave failed: {e}")
+
+    def compact_save(self):
+        # Fold the journal into a fresh snapshot. Everything the snapshot
+        # needs is copied here; the file writing happens on a worker thread.
+        if self.compactor and self.compactor.is_alive():
+            return
+        if not self.world_store:
+            return
+        self.autosave()
+        self.journal.rotate()
+        slot = self.journal.slot
+        data = self.snapshot_slot(self.save_name)
+        dirty = [r for r in self.rooms.values() if r.dirty]
+        records = worldstore.encode_rooms(dirty)
+        for room in dirty:
+            room.dirty = False
+        store = self.world_store
+
+        def write_snapshot():
+            with telemetry.timed("save", kind="compact", slot=slot, rooms=len(records)):
+                store.write_records(records)
+                slots = savecodec.load_slots()
+                slots[str(slot)] = data
+                savecodec.save_slots(slots)
+
+        self.compactor = journal.Compactor(self.journal, write_snapshot)
+        self.compactor.start()
+
+    def check_compactor(self):
+        if self.compactor and not self.compactor.is_alive():
+            if self.compactor.error:
+                print(f"Save compaction failed: {self.compactor.error}")
+                # The room deltas never reached the store; write them next time
+                for room in self.rooms.values():
+                    room.dirty = True
+            self.compactor = None
+
+    def close_journal(self):
+        if self.compactor:
+            self.compactor.join()
+            self.check_compactor()
+        if self.journal:
+            self.autosave()
+            self.journal.close()
+        self.journal = None
 
     def perform_load(self, slot_num):
-        slot_data = self.slots_data.get(str(slot_num))
+        self.close_journal()
+        slot_data = self.read_slots().get(str(slot_num))
         if slot_data:
+            self.world_seed = slot_data.get("seed", 0)
+            self.rooms = {}
+            self.open_world(slot_num)
+
+            # Replay whatever happened after the snapshot was taken
+            self.journal = journal.Journal(slot_num, slot_data["jseq"])
+            for seq, kind, fields in self.journal.read_events(slot_data["jseq"]):
+                journal.apply_event(slot_data, kind, fields, self.get_room)
+
+            self.save_name = slot_data["name"]
             self.fire_health = slot_data["fire"]
-            self.player.inventory = slot_data["inventory"]
-            self.wood_stockpile = slot_data["stockpile"]
+            self.player.inventory = Inventory(slot_data["inventory"])
+            self.wood_stockpile = Inventory(slot_data["stockpile"])
             self.automation_unlocked = slot_data["automation"]
             self.player.pos_x, self.player.pos_y = slot_data["pos"]
-            self.revealed_map = set(tuple(x) for x in slot_data["revealed"])
+            self.player.has_lantern = slot_data["lantern"]
+            self.minimap.reset(tuple(x) for x in slot_data["revealed"])
             self.tents = [tuple(x) for x in slot_data["tents"]]
+            self.world_map.reset(self.minimap, self.tents, self.lit_rooms())
             self.player.hp = slot_data.get("hp", PLAYER_MAX_HP)  # Load HP
             self.load_room(tuple(slot_data["room"]))
             self.state = "PLAY"
@@ -198,17 +329,117 @@ class Game:
 
     def get_room(self, coords):
         if coords not in self.rooms:
-            self.rooms[coords] = Room(coords)
+            with telemetry.timed("room_gen", room=coords) as info:
+                room = None
+                if self.baked and self.baked.seed == self.world_seed:
+                    try:
+                        room = self.baked.room(coords)
+                    except savecodec.SaveFormatError as e:
+                        print(f"Could not read baked room: {e}")
+                if room is None:
+                    room = Room(coords, self.world_seed)
+                delta = self.world_store.get(coords) if self.world_store else None
+                if delta:
+                    room.apply_delta(delta)
+                if telemetry.ENABLED:
+                    info.update(biome=room.biome, enemies=len(room.enemies))
+            self.rooms[coords] = room
         return self.rooms[coords]
 
     def load_room(self, coords):
+        # This room's sprites must be ready now; the neighbours' start
+        # decoding in the background so walking on does not stall
+        if self.assets:
+            self.assets.require_biome(biome_for(coords))
+            x, y = coords
+            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                self.assets.prefetch_biome(biome_for((x + dx, y + dy)))
+        if self.current_room:
+            self.current_room.last_tick = self.world_tick
+            telemetry.event("room", src=self.current_room_coords, dst=coords,
+                            tick=self.world_tick)
         self.current_room = self.get_room(coords)
         self.current_room_coords = coords
+        self.catch_up_room()
         self.visited_rooms.add(coords)
-        self.revealed_map.add(coords)
+        self.minimap.move(coords)
+        self.reveal_room(coords)
+        self.record(journal.EV_ROOM, coords)
         self.current_room.has_tent = coords in self.tents
         if self.current_room.biome in ['snow', 'glacier']:
             self.trigger_dialogue("It is freezing here...", 60)
+        elif self.current_room.haunted:
+            self.trigger_dialogue("Whispers everywhere...", 90)
+
+    def reveal_room(self, coords):
+        self.minimap.add(coords)
+        self.world_map.reveal(coords)
+
+    def lit_rooms(self):
+        # For the world map: saved rooms with a lit pyre, plus loaded ones
+        lit = set()
+        if self.world_store:
+            for coords in list(self.world_store.index):
+                if self.world_store.get(coords)["lit"]:
+                    lit.add(coords)
+        for coords, room in self.rooms.items():
+            if any(p.lit for p in room.pyres):
+                lit.add(coords)
+        return lit
+
+    def catch_up_room(self):
+        room = self.current_room
+        for idx in room.catch_up(self.world_tick):
+            self.record(journal.EV_ICE, self.current_room_coords, idx,
+                        room.fragile_ice[idx]['integrity'])
+
+    def can_rest(self):
+        # The save menu is also opened by crafting a tent, before one is
+        # pitched; only a tent already standing here can be slept in
+        return self.save_mode == "SAVE" and self.current_room.has_tent
+
+    def rest(self, minutes):
+        # Sleep at a tent. The hub fire, the keeper and the torch are advanced
+        # in closed form (see rest.py) and the room catches up like one the
+        # player has just walked back into, so a night costs no more than a
+        # nap. Waking is early if the fire gets low with nothing left to burn.
+        if self.fire_health <= REST_WAKE_FIRE and not (
+                self.automation_unlocked and len(self.wood_stockpile) > 0):
+            self.state = "PLAY"
+            self.trigger_dialogue("The fire is too low to sleep.", 120)
+            return
+        frames = minutes * 60 * FPS
+        fire, burned, elapsed = rest.fast_forward(
+            self.fire_health, len(self.wood_stockpile), frames,
+            self.automation_unlocked, REST_WAKE_FIRE)
+        self.fire_health = fire
+        self.wood_stockpile.pop_many(burned)
+        for _ in range(burned):
+            self.record(journal.EV_BURN)
+
+        if self.player.carrying_torch:
+            burn = 0.1
+            if self.current_room.biome in ['snow', 'glacier']:
+                burn += 0.15
+            self.player.torch_health -= burn * elapsed
+            if self.player.torch_health <= 0:
+                self.player.carrying_torch = False
+
+        self.current_room.last_tick = self.world_tick
+        self.world_tick += elapsed
+        self.catch_up_room()
+        self.record(journal.EV_VITALS, self.fire_health, self.player.hp,
+                    (self.player.pos_x, self.player.pos_y),
+                    self.automation_unlocked, self.player.has_lantern)
+
+        slept = elapsed // (60 * FPS)
+        text = f"Rested {slept // 60}h {slept % 60:02d}m. Fire: {int(self.fire_health)}%"
+        if burned:
+            text += f", the keeper burned {burned}"
+        if elapsed < frames:
+            text = "You wake to a dying fire. " + text
+        self.state = "PLAY"
+        self.trigger_dialogue(text, 180)
 
     def trigger_dialogue(self, text, duration):
         self.current_dialogue = text
@@ -216,20 +447,48 @@ class Game:
 
     def run(self):
         while True:
+            start = time.perf_counter()
             self.input()
             self.update()
             self.draw()
+            if telemetry.ENABLED and self.state == "PLAY":
+                telemetry.frame(time.perf_counter() - start,
+                                len(self.current_room.enemies))
             self.clock.tick(FPS)
 
+    def lose_fuel(self, amount, cause):
+        # A sudden loss; if the fire goes out it gets the blame, not the cold
+        self.fire_health -= amount
+        self.fuel_lost = (cause, self.world_tick)
+
+    def fire_death_cause(self):
+        cause, tick = self.fuel_lost
+        return cause if self.world_tick - tick <= 1 else "cold"
+
+    def game_over(self, cause):
+        if self.state != "GAME_OVER":
+            telemetry.event("death", cause=cause, room=self.current_room_coords,
+                            tick=self.world_tick)
+            self.death_cause = cause
+        self.state = "GAME_OVER"
+
     def input(self):
         for event in pygame.event.get():
             # 1. Quit
             if event.type == pygame.QUIT:
+                self.close_journal()
+                self.assets.close()
+                telemetry.close()
                 pygame.quit()
                 sys.exit()
 
             # 2. Mouse Inputs
-            if event.type == pygame.MOUSEBUTTONDOWN:
+            if self.state == "PLAY" and self.world_map_open:
+                if event.type == pygame.MOUSEWHEEL:
+                    self.world_map.zoom_by(1 if event.y > 0 else -1)
+                elif event.type == pygame.MOUSEMOTION and event.buttons[0]:
+                    self.world_map.pan_by(-event.rel[0], -event.rel[1])
+            elif event.type == pygame.MOUSEBUTTONDOWN:
                 if self.state == "PLAY":
                     if event.button == 1:  # Left Click
                         if self.player.attack():
@@ -254,6 +513,11 @@ class Game:
                     elif self.state == "SLOT_MENU":
                         self.state = "MENU"
 
+                # Button 4 (LB) - Bulk interact
+                if event.button == 4:
+                    if self.state == "PLAY":
+                        self.handle_bulk_interaction()
+
                 # Button 2 (X/Square) - Attack
                 if event.button == 2:
                     if self.state == "PLAY":
@@ -287,12 +551,16 @@ class Game:
                 if self.state == "TYPING":
                     if event.key == pygame.K_RETURN:
                         if len(self.input_text) > 0:
-                            self.perform_save(
-                                self.selected_slot, self.input_text)
-                            self.state = "PLAY"
+                            # Pitch the tent first so the save includes it
                             if self.current_room_coords not in self.tents:
                                 self.tents.append(self.current_room_coords)
+                                self.world_map.add_tent(self.current_room_coords)
                                 self.current_room.has_tent = True
+                                self.record(journal.EV_TENT,
+                                            self.current_room_coords)
+                            self.perform_save(
+                                self.selected_slot, self.input_text)
+                            self.state = "PLAY"
                     elif event.key == pygame.K_BACKSPACE:
                         self.input_text = self.input_text[:-1]
                     elif event.key == pygame.K_ESCAPE:
@@ -315,6 +583,11 @@ class Game:
                             self.state = "MENU"
                         else:
                             self.state = "PLAY"
+                    if self.can_rest():
+                        if event.key == pygame.K_r:
+                            self.rest(REST_MINUTES)
+                        if event.key == pygame.K_m:
+                            self.rest(REST_NIGHT_MINUTES)
                     if event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
                         if self.save_mode == "LOAD":
                             self.perform_load(self.selected_slot)
@@ -328,6 +601,8 @@ class Game:
                     self.free_crafting = not self.free_crafting
                     state = "ON" if self.free_crafting else "OFF"
                     self.trigger_dialogue(f"DEV: Free Crafting {state}", 60)
+                if event.key == pygame.K_F3:
+                    self.show_ai_stats = not self.show_ai_stats
 
                 # --- NORMAL GAMEPLAY ---
                 if self.state == "MENU":
@@ -340,44 +615,62 @@ class Game:
                         self.slots_data = self.load_all_slots()
 
                 elif self.state == "PLAY":
-                    if event.key == pygame.K_i:
-                        self.crafting_open = not self.crafting_open
-                    if self.crafting_open:
-                        if event.key == pygame.K_1:
-                            self.craft("Fabric")
-                        if event.key == pygame.K_2:
-                            self.craft("Campfire")
-                        if event.key == pygame.K_3:
-                            self.craft("Tent")
-                        if event.key == pygame.K_4:
-                            self.craft("Lantern")
+                    if event.key == pygame.K_n or (self.world_map_open and event.key == pygame.K_ESCAPE):
+                        self.world_map_open = not self.world_map_open
+                        self.crafting_open = False
+                    elif self.world_map_open:
+                        if event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                            self.world_map.zoom_by(1)
+                        if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                            self.world_map.zoom_by(-1)
+                        if event.key == pygame.K_c:
+                            self.world_map.recenter()
                     else:
-                        if event.key == pygame.K_SPACE:
-                            self.player.jump()
-                        if event.key == pygame.K_e:
-                            self.handle_interaction()
-                        if event.key == pygame.K_m:
-                            self.show_map = not self.show_map
+                        if event.key == pygame.K_i:
+                            self.crafting_open = not self.crafting_open
+                        if self.crafting_open:
+                            if event.key == pygame.K_1:
+                                self.craft("Fabric")
+                            if event.key == pygame.K_2:
+                                self.craft("Campfire")
+                            if event.key == pygame.K_3:
+                                self.craft("Tent")
+                            if event.key == pygame.K_4:
+                                self.craft("Lantern")
+                        else:
+                            if event.key == pygame.K_SPACE:
+                                self.player.jump()
+                            if event.key == pygame.K_e:
+                                # Shift: everything (feed until full / store all)
+                                # Ctrl: store every copy of the top item
+                                if event.mod & pygame.KMOD_SHIFT:
+                                    self.handle_bulk_interaction()
+                                elif event.mod & pygame.KMOD_CTRL:
+                                    self.handle_bulk_interaction(by_type=True)
+                                else:
+                                    self.handle_interaction()
+                            if event.key == pygame.K_t:
+                                self.withdraw()
+                            if event.key == pygame.K_m:
+                                self.show_map = not self.show_map
 
                 elif self.state == "GAME_OVER":
                     if event.key == pygame.K_r:
                         self.state = "MENU"
 
     def craft(self, item_name):
-        recipe = RECIPES[item_name]
-        can_craft = True
-
+        # Missing intermediate ingredients (e.g. Fabric for a Tent) are
+        # crafted on the way if the raw materials are there.
+        steps = [(item_name, 1)]
         if not self.free_crafting:
-            temp = self.player.inventory[:]
-            for k, v in recipe['cost'].items():
-                if temp.count(k) < v:
-                    can_craft = False
+            steps = self.crafter.plan(self.player.inventory, item_name)
 
-        if can_craft:
+        if steps:
+            for name, qty in steps:
+                for _ in range(qty):
+                    self.record(journal.EV_CRAFT, name, self.free_crafting)
             if not self.free_crafting:
-                for k, v in recipe['cost'].items():
-                    for _ in range(v):
-                        self.player.inventory.remove(k)
+                self.crafter.execute(self.player.inventory, steps)
 
             if item_name == "Tent":
                 if not self.current_room.has_tent:
@@ -396,6 +689,9 @@ class Game:
             else:
                 self.player.inventory.append(item_name)
                 self.trigger_dialogue(f"Crafted {item_name}", 60)
+            if len(steps) > 1 and item_name != "Tent":
+                made = ", ".join(f"{qty} {name}" for name, qty in steps[:-1])
+                self.trigger_dialogue(f"Crafted {item_name} (made {made})", 90)
         else:
             self.trigger_dialogue("Not enough materials.", 60)
 
@@ -405,6 +701,10 @@ class Game:
         for enemy in self.current_room.enemies[:]:
             if hitbox.colliderect(enemy.rect):
                 enemy.take_damage(PLAYER_DAMAGE)
+                self.current_room.dirty = True
+                if enemy.hp > 0:
+                    self.record(journal.EV_HURT, self.current_room_coords,
+                                enemy.uid, enemy.hp)
 
                 # Make the name look nice (e.g., "grey_wolf" -> "Grey Wolf")
                 display_name = enemy.name.replace("_", " ").title()
@@ -413,6 +713,10 @@ class Game:
 
                 if enemy.hp <= 0:
                     self.current_room.enemies.remove(enemy)
+                    telemetry.event("kill", enemy=enemy.name,
+                                    room=self.current_room_coords)
+                    self.record(journal.EV_SLAY,
+                                self.current_room_coords, enemy.uid)
                     self.trigger_dialogue(f"Slain {display_name}", 60)
     # -------------------------
 
@@ -423,17 +727,24 @@ class Game:
         for item in self.current_room.items[:]:
             if math.hypot(item.centerx - self.player.pos_x, item.centery - self.player.pos_y) < 50:
                 self.current_room.items.remove(item)
+                self.current_room.dirty = True
                 self.player.inventory.append(item.name)
+                self.record(journal.EV_PICK, self.current_room_coords,
+                            item.uid, item.name)
                 self.trigger_dialogue(f"Got {item.name}", 60)
                 return
 
         # 2. Pyres (Lighting beacons)
-        for pyre in self.current_room.pyres:
+        for idx, pyre in enumerate(self.current_room.pyres):
             if math.hypot(pyre.rect.centerx - self.player.pos_x, pyre.rect.centery - self.player.pos_y) < 60:
                 if not pyre.lit:
                     if self.player.has_lantern or self.player.carrying_torch or self.current_room_coords == (0, 0):
                         pyre.light()
-                        self.revealed_map.add(self.current_room_coords)
+                        self.current_room.dirty = True
+                        self.record(journal.EV_PYRE,
+                                    self.current_room_coords, idx)
+                        self.reveal_room(self.current_room_coords)
+                        self.world_map.mark_lit(self.current_room_coords)
                         self.trigger_dialogue("Signal lit.", 60)
                     else:
                         self.trigger_dialogue("Need a light source!", 60)
@@ -456,7 +767,9 @@ class Game:
                 if len(self.player.inventory) > 0:
                     # Feed fire manually
                     item = self.player.inventory.pop()
-                    self.fire_health = min(MAX_FUEL, self.fire_health + 15)
+                    self.record(journal.EV_FEED, item)
+                    self.fire_health = min(
+                        MAX_FUEL, self.fire_health + FIRE_PER_ITEM)
                     desc = ARTIFACT_DATA.get(item, ["It burns."])
                     if isinstance(desc, list):
                         desc = random.choice(desc)
@@ -490,31 +803,128 @@ class Game:
                     # Put item IN pile
                     item = self.player.inventory.pop()
                     self.wood_stockpile.append(item)
+                    self.record(journal.EV_STORE, item)
                     self.trigger_dialogue(f"Stored {item}", 60)
                 elif len(self.wood_stockpile) > 0:
                     # Take item OUT of pile
                     item = self.wood_stockpile.pop()
                     self.player.inventory.append(item)
+                    self.record(journal.EV_TAKE, item)
                     self.trigger_dialogue(f"Took {item}", 60)
 
-    def reset_game(self):
+    # --- BULK ACTIONS (Hub) ---
+    # Each of these is one transaction: a single inventory operation, one
+    # journal event and one line of dialogue, however many items move.
+    def near_main_fire(self):
+        return (self.current_room_coords == (0, 0) and
+                math.hypot(WIDTH//2 - self.player.pos_x, HEIGHT//2 - self.player.pos_y) < 70)
+
+    def at_stockpile(self):
+        return (self.current_room_coords == (0, 0) and
+                self.player.get_rect().colliderect(self.stockpile_rect))
+
+    def handle_bulk_interaction(self, by_type=False):
+        if self.near_main_fire():
+            self.feed_until_full()
+        elif self.at_stockpile():
+            if by_type:
+                self.deposit_type(self.player.inventory.peek())
+            else:
+                self.deposit_all()
+        else:
+            self.handle_interaction()
+
+    def feed_until_full(self):
+        inv = self.player.inventory
+        if len(inv) == 0:
+            self.handle_interaction()  # Nothing to burn: take a torch instead
+            return
+        needed = math.ceil((MAX_FUEL - self.fire_health) / FIRE_PER_ITEM)
+        n = min(needed, len(inv))
+        if n <= 0:
+            self.trigger_dialogue("The fire is already roaring.", 60)
+            return
+        inv.pop_many(n)
+        self.record(journal.EV_FEED_N, n)
+        self.fire_health = min(MAX_FUEL, self.fire_health + n * FIRE_PER_ITEM)
+        self.trigger_dialogue(f"Fed the fire {n} items.", 120)
+
+    def deposit_all(self):
+        inv = self.player.inventory
+        if len(inv) == 0:
+            self.trigger_dialogue("Nothing to store.", 60)
+            return
+        moved = inv.pop_many(len(inv))
+        self.wood_stockpile.extend(moved)
+        self.record(journal.EV_STORE_N, len(moved))
+        self.trigger_dialogue(f"Stored {len(moved)} items.", 60)
+
+    def deposit_type(self, name):
+        if name is None:
+            self.trigger_dialogue("Nothing to store.", 60)
+            return
+        n = self.player.inventory.take(name)
+        self.wood_stockpile.extend([name] * n)
+        self.record(journal.EV_STORE_TYPE, name, n)
+        self.trigger_dialogue(f"Stored {n} {name}.", 60)
+
+    def withdraw(self, n=WITHDRAW_BATCH):
+        if not self.at_stockpile():
+            return
+        if len(self.wood_stockpile) == 0:
+            self.trigger_dialogue("The pile is empty.", 60)
+            return
+        moved = self.wood_stockpile.pop_many(n)
+        self.player.inventory.extend(moved)
+        self.record(journal.EV_TAKE_N, len(moved))
+        self.trigger_dialogue(f"Took {len(moved)} items.", 60)
+
+    def reset_game(self, seed=None):
+        self.close_journal()
         self.fire_health = MAX_FUEL
-        self.wood_stockpile = []
+        self.wood_stockpile = Inventory()
         self.automation_unlocked = False
         self.player = Player(WIDTH//2, HEIGHT//2)
         self.rooms = {}
+        if seed is None:
+            seed = self.baked.seed if self.baked else random.randrange(2**31)
+        self.world_seed = seed
+        if self.world_store:
+            self.world_store.close()
+        self.world_store = None
+        self.world_store_slot = None
+        self.tents = []
+        self.visited_rooms = set()
+        self.minimap.reset()
+        self.world_map.reset()
+        self.current_room = None
+        self.world_tick = 0
+        self.fuel_lost = (None, -2)
+        self.death_cause = None
         self.load_room((0, 0))
 
     def update(self):
         self.frame_count += 1
+        if self.assets:
+            self.assets.poll()  # Pack any prefetched sprites that finished
 
         # Don't update game logic while in menu or saving
         if self.state != "PLAY":
             return
 
-        if not self.crafting_open:
+        # --- AUTOSAVE ---
+        self.check_compactor()
+        if self.journal and self.frame_count % (AUTOSAVE_SECONDS * FPS) == 0:
+            self.autosave()
+            if self.journal.size > JOURNAL_COMPACT_BYTES:
+                self.compact_save()
+
+        if self.world_map_open:
+            self.pan_world_map()
+        elif not self.crafting_open:
+            self.world_tick += 1
             self.player.update_animation()
-            self.fire_health -= 0.005
+            self.fire_health -= settings.FIRE_DECAY  # Read live: balance.py overrides it
 
             if self.player.carrying_torch:
                 self.player.torch_health -= 0.1
@@ -524,58 +934,69 @@ class Game:
                     self.player.carrying_torch = False
                     self.trigger_dialogue("Torch faded.", 120)
 
-            if self.automation_unlocked and self.fire_health < 30 and len(self.wood_stockpile) > 0:
+            if self.automation_unlocked and self.fire_health < KEEPER_THRESHOLD and len(self.wood_stockpile) > 0:
                 if random.randint(0, 100) < 2:
                     self.wood_stockpile.pop()
-                    self.fire_health += 15
+                    self.record(journal.EV_BURN)
+                    self.fire_health += FIRE_PER_ITEM
                     self.trigger_dialogue("NPC burned a log.", 60)
 
             if self.fire_health <= 0:
-                self.state = "GAME_OVER"
+                self.game_over(self.fire_death_cause())
 
             # --- UPDATE ENEMIES ---
-            for enemy in self.current_room.enemies:
-                # CRITICAL CHANGE: We now pass the 'enemies' list as the second argument
-                # This allows the wolf to see other wolves and push away from them.
-                enemy.update(self.player, self.current_room.enemies)
+            flow = None
+            if self.current_room.enemies:
+                # One search towards the player, shared by every enemy
+                flow = self.current_room.flow_field()
+                flow.update(self.player.pos_x, self.player.pos_y)
+            # Idle enemies far from the player think less often, see ai.py
+            self.ai.update(self.current_room.enemies, self.player, flow)
 
             if self.player.hp <= 0:
-                self.state = "GAME_OVER"
+                self.game_over(self.player.last_hit or "hp")
             # ---------------------------
 
-            self.player.move(self.current_room)
+            self.player.move(self.current_room, self.steer)
             p_rect = self.player.get_rect()
+            terrain = self.current_room.terrain_map()
+            cell = terrain.cell(self.player.pos_x, self.player.pos_y)
 
-            if self.current_room.biome == 'glacier':
-                for ice in self.current_room.fragile_ice:
-                    if p_rect.colliderect(ice['rect']):
+            underfoot = terrain.fragile[cell]
+            if underfoot and self.current_room.biome == 'glacier':
+                for idx, ice in enumerate(self.current_room.fragile_ice):
+                    if underfoot >> idx & 1:
                         if self.player.velocity_mag < 0.2:
                             ice['integrity'] -= 1
+                            self.current_room.dirty = True
+                            # Journal wear in steps rather than every frame
+                            if ice['integrity'] % 10 == 0:
+                                self.record(journal.EV_ICE, self.current_room_coords,
+                                            idx, ice['integrity'])
                             if ice['integrity'] <= 0:
-                                self.fire_health -= 15
+                                self.lose_fuel(15, "ice")
                                 self.player.pos_x = WIDTH//2
                                 self.trigger_dialogue(
                                     "Ice broke! -15 Fire", 120)
 
-            if self.player.z <= 0:
-                for w in self.current_room.water_tiles:
-                    if p_rect.colliderect(w):
-                        self.fire_health -= 10
-                        self.player.pos_x = WIDTH//2
-                        self.player.pos_y = HEIGHT//2
-                        self.trigger_dialogue("Fell in water.", 60)
-
-            for echo in self.current_room.echoes:
-                echo.update(self.player)
-                if p_rect.colliderect(echo.rect) and self.player.z < 10:
-                    if len(self.player.inventory) > 0:
-                        self.player.inventory.pop()
-                    else:
-                        self.fire_health -= 5
-                    angle = math.atan2(self.player.pos_y -
-                                       echo.y, self.player.pos_x - echo.x)
-                    self.player.pos_x += math.cos(angle)*80
-                    self.player.pos_y += math.sin(angle)*80
+            if self.player.z <= 0 and terrain.water[cell]:
+                self.lose_fuel(10, "water")
+                self.player.pos_x = WIDTH//2
+                self.player.pos_y = HEIGHT//2
+                self.trigger_dialogue("Fell in water.", 60)
+
+            echoes = self.current_room.echoes
+            echoes.update(self.player)
+            for i in echoes.hits(p_rect) if self.player.z < 10 else ():
+                if len(self.player.inventory) > 0:
+                    item = self.player.inventory.pop()
+                    self.record(journal.EV_LOSE, item)
+                else:
+                    self.lose_fuel(5, "echo")
+                dx, dy = echoes.knockback(
+                    i, self.player.pos_x, self.player.pos_y, 80)
+                self.player.pos_x += dx
+                self.player.pos_y += dy
 
             if self.player.pos_x > WIDTH:
                 self.load_room(
@@ -598,24 +1019,7 @@ class Game:
                 self.dialogue_timer -= 1
 
     def draw(self):
-        b = self.current_room.biome
-        c = COLOR_BG_FOREST
-        if b == 'snow':
-            c = COLOR_SNOW
-        elif b == 'desert':
-            c = COLOR_DESERT
-        elif b == 'mountain':
-            c = COLOR_MOUNTAIN
-        elif b == 'ocean':
-            c = COLOR_OCEAN
-        elif b == 'glacier':
-            c = COLOR_GLACIER
-        elif b == 'tundra':
-            c = COLOR_TUNDRA
-        elif b == 'swamp':
-            c = COLOR_SWAMP
-        elif b == 'badlands':
-            c = COLOR_BADLANDS
+        c = BIOME_COLORS.get(self.current_room.biome, COLOR_BG_FOREST)
         self.screen.fill(c)
 
         if self.state == "MENU":
@@ -625,6 +1029,9 @@ class Game:
                 "Press SPACE to Start | L to Load", True, (200, 200, 200))
             self.screen.blit(i, (WIDTH//2 - i.get_width()//2, 300))
 
+        elif self.state == "PLAY" and self.world_map_open:
+            self.world_map.draw(self.screen, self.current_room_coords, self.font)
+
         elif self.state in ["PLAY", "SLOT_MENU", "TYPING"]:
             self.draw_game()
             # Overlay menus if needed
@@ -635,28 +1042,35 @@ class Game:
 
         elif self.state == "GAME_OVER":
             self.draw_game()
-            o = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            o.fill((0, 0, 0, 200))
-            self.screen.blit(o, (0, 0))
-            t = self.title_font.render(
-                "THE COLD TOOK YOU", True, COLOR_PYRE_LIT)
-            self.screen.blit(t, (WIDTH//2 - t.get_width()//2, HEIGHT//2))
+            self.screen.blit(self.ui.panel("game_over", self.build_game_over), (0, 0))
 
         pygame.display.flip()
+        profiler.first_frame()
 
     ### UI DRAWING METHODS ###
-    def draw_slot_menu(self):
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        self.screen.blit(overlay, (0, 0))
-
+    def build_game_over(self):
+        panel = backdrop((WIDTH, HEIGHT), (0, 0, 0, 200))
+        t = self.title_font.render("THE COLD TOOK YOU", True, COLOR_PYRE_LIT)
+        blit_centered(panel, t, WIDTH//2, HEIGHT//2)
+        return panel
+
+    def build_slot_menu(self):
+        panel = backdrop((WIDTH, HEIGHT), (0, 0, 0, 180))
         title = self.title_font.render(
             f"{self.save_mode} GAME", True, (255, 255, 255))
-        self.screen.blit(title, (WIDTH//2 - title.get_width()//2, 100))
-
+        blit_centered(panel, title, WIDTH//2, 100)
         hint = self.font.render(
             "Press 1, 2, or 3 to Select | ENTER to Confirm | ESC to Cancel", True, (180, 180, 180))
-        self.screen.blit(hint, (WIDTH//2 - hint.get_width()//2, HEIGHT - 50))
+        blit_centered(panel, hint, WIDTH//2, HEIGHT - 50)
+        if self.can_rest():
+            hint = self.font.render(
+                f"R: Rest {REST_MINUTES} min | M: Rest until morning", True, (180, 180, 180))
+            blit_centered(panel, hint, WIDTH//2, HEIGHT - 80)
+        return panel
+
+    def draw_slot_menu(self):
+        self.screen.blit(self.ui.panel(("slot_menu", self.save_mode, self.can_rest()),
+                                       self.build_slot_menu), (0, 0))
 
         # Draw 3 Slots
         start_y = 250
@@ -683,47 +1097,46 @@ class Game:
                 slot_name = data.get("name", f"Slot {i}")
                 info = f"HP: {data.get('hp', 100)} | Fire: {int(data['fire'])}%"
 
-            t1 = self.ui_title.render(
-                f"{i}. {slot_name}", True, (255, 255, 255))
-            t2 = self.font.render(info, True, (200, 200, 200))
-
+            t1 = self.ui.render(self.ui_title, f"{i}. {slot_name}", (255, 255, 255))
+            t2 = self.ui.render(self.font, info, (200, 200, 200))
             self.screen.blit(t1, (rect.x + 20, rect.y + 15))
             self.screen.blit(t2, (rect.x + 20, rect.y + 50))
 
             start_y += 100
 
-    def draw_typing_menu(self):
+    def build_typing_menu(self):
         # Darken background
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200))
-        self.screen.blit(overlay, (0, 0))
+        panel = backdrop((WIDTH, HEIGHT), (0, 0, 0, 200))
 
         # Box
         center_x, center_y = WIDTH//2, HEIGHT//2
-        pygame.draw.rect(self.screen, (30, 30, 30),
+        pygame.draw.rect(panel, (30, 30, 30),
                          (center_x - 200, center_y - 100, 400, 200))
-        pygame.draw.rect(self.screen, (255, 255, 255),
+        pygame.draw.rect(panel, (255, 255, 255),
                          (center_x - 200, center_y - 100, 400, 200), 2)
 
         title = self.ui_title.render("NAME YOUR SAVE", True, (255, 255, 255))
-        self.screen.blit(
-            title, (center_x - title.get_width()//2, center_y - 70))
+        blit_centered(panel, title, center_x, center_y - 70)
 
         # Input Field
-        pygame.draw.rect(self.screen, (0, 0, 0),
+        pygame.draw.rect(panel, (0, 0, 0),
                          (center_x - 150, center_y, 300, 40))
 
+        help_t = self.font.render("Press ENTER to Save", True, (150, 150, 150))
+        blit_centered(panel, help_t, center_x, center_y + 60)
+        return panel
+
+    def draw_typing_menu(self):
+        self.screen.blit(self.ui.panel("typing", self.build_typing_menu), (0, 0))
+
         # Blinking cursor logic
         txt = self.input_text
         if self.frame_count % 60 < 30:
             txt += "|"
 
-        inp = self.font.render(txt, True, (255, 255, 255))
-        self.screen.blit(inp, (center_x - 140, center_y + 10))
+        inp = self.ui.render(self.font, txt, (255, 255, 255))
+        self.screen.blit(inp, (WIDTH//2 - 140, HEIGHT//2 + 10))
 
-        help_t = self.font.render("Press ENTER to Save", True, (150, 150, 150))
-        self.screen.blit(
-            help_t, (center_x - help_t.get_width()//2, center_y + 60))
     ### -------------------------- ###
 
     def draw_game(self):
@@ -762,8 +1175,8 @@ class Game:
                 {"y": o['rect'].bottom, "type": "obs", "obj": o})
         for i in self.current_room.items:
             render_list.append({"y": i.rect.bottom, "type": "item", "obj": i})
-        for e in self.current_room.echoes:
-            render_list.append({"y": e.y, "type": "echo", "obj": e})
+        for x, y in self.current_room.echoes:
+            render_list.append({"y": y, "type": "echo", "pos": (x, y)})
 
         # --- NEW: ADD ENEMIES TO RENDER LIST ---
         for e in self.current_room.enemies:
@@ -786,7 +1199,7 @@ class Game:
                     r['obj'].name), r['obj'].rect)
             elif r['type'] == "echo":
                 pygame.draw.circle(
-                    self.screen, (200, 200, 255, 100), r['obj'].rect.center, 15)
+                    self.screen, (200, 200, 255, 100), r['pos'], 15)
             elif r['type'] == "enemy":
                 r['obj'].draw(self.screen)
             elif r['type'] == "obs":
@@ -813,8 +1226,8 @@ class Game:
         pygame.draw.rect(self.screen, (50, 0, 0), (20, 50, 200, 20))
         ratio = max(0, self.player.hp / self.player.max_hp)
         pygame.draw.rect(self.screen, (0, 255, 0), (20, 50, 200*ratio, 20))
-        hp_text = self.font.render(
-            f"HP: {self.player.hp}", True, (255, 255, 255))
+        hp_text = self.ui.render(
+            self.font, f"HP: {self.player.hp}", (255, 255, 255))
         self.screen.blit(hp_text, (25, 52))
 
         # Debug: Attack Box
@@ -826,20 +1239,21 @@ class Game:
         self.draw_lighting()
 
         if self.current_dialogue:
-            t = self.dialogue_font.render(
-                f"\"{self.current_dialogue}\"", True, (255, 255, 200))
-            bg = pygame.Surface((t.get_width()+20, t.get_height()+10))
-            bg.fill((0, 0, 0))
-            bg.set_alpha(180)
-            self.screen.blit(
-                bg, (WIDTH//2 - t.get_width()//2 - 10, HEIGHT - 100))
+            t = self.ui.render(self.dialogue_font,
+                               f"\"{self.current_dialogue}\"", (255, 255, 200))
+            bg = pygame.Rect(WIDTH//2 - t.get_width()//2 - 10, HEIGHT - 100,
+                             t.get_width()+20, t.get_height()+10)
+            self.ui.box(self.screen, bg, (0, 0, 0), 180)
             self.screen.blit(t, (WIDTH//2 - t.get_width()//2, HEIGHT - 95))
 
         hud_c = (20, 20, 20) if self.current_room.biome in [
             'snow', 'glacier'] else (200, 200, 200)
-        hud = self.font.render(
-            f"Fire: {int(self.fire_health)}% | LOCATION: {self.current_room.biome.upper()}", True, hud_c)
+        hud = self.ui.render(
+            self.font, f"Fire: {int(self.fire_health)}% | LOCATION: {self.current_room.biome.upper()}", hud_c)
         self.screen.blit(hud, (20, 20))
+        if self.show_ai_stats:
+            ai_t = self.ui.render(self.font, f"AI: {self.ai.summary()}", hud_c)
+            self.screen.blit(ai_t, (20, 80))
 
         if self.show_map:
             self.draw_map_overlay()
@@ -847,7 +1261,8 @@ class Game:
             self.draw_crafting()
 
     def draw_lighting(self):
-        dark = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        # One overlay surface, refilled every frame rather than reallocated
+        dark = self.ui.panel("darkness", lambda: pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA))
         alpha = 200
         if self.current_room_coords == (0, 0):
             alpha = max(50, 255 - int(self.fire_health*3))
@@ -874,86 +1289,102 @@ class Game:
 
         self.screen.blit(dark, (0, 0), special_flags=pygame.BLEND_RGBA_SUB)
 
-    def draw_crafting(self):
-        overlay = pygame.Surface((600, 500))
-        overlay.fill((20, 20, 25))
-        overlay.set_alpha(240)
-        self.screen.blit(overlay, (WIDTH//2 - 300, HEIGHT//2 - 250))
+    def build_crafting(self):
+        panel = backdrop((600, 500), (20, 20, 25, 240))
 
         # Titles
         head = self.ui_title.render("SURVIVAL MENU", True, (255, 255, 255))
-        self.screen.blit(
-            head, (WIDTH//2 - head.get_width()//2, HEIGHT//2 - 230))
+        blit_centered(panel, head, 300, 20)
 
         if self.free_crafting:
             t = self.font.render(
                 "-- DEV MODE: FREE CRAFTING --", True, (255, 0, 0))
-            self.screen.blit(t, (WIDTH//2 - t.get_width()//2, HEIGHT//2 - 200))
+            blit_centered(panel, t, 300, 50)
 
-        # --- LEFT SIDE: BACKPACK ---
         pack_t = self.font.render("BACKPACK", True, (200, 200, 255))
-        self.screen.blit(pack_t, (WIDTH//2 - 250, HEIGHT//2 - 180))
-
-        # Count Items
-        counts = {}
-        for i in self.player.inventory:
-            counts[i] = counts.get(i, 0) + 1
+        panel.blit(pack_t, (50, 70))
+        craft_t = self.font.render("RECIPES", True, (255, 200, 200))
+        panel.blit(craft_t, (350, 70))
+        return panel
 
+    def draw_crafting(self):
+        panel = self.ui.panel(("crafting", self.free_crafting), self.build_crafting)
+        self.screen.blit(panel, (WIDTH//2 - 300, HEIGHT//2 - 250))
+
+        # Both lists are only re-rendered when the backpack changes
+        inv = self.player.inventory
+        key = (inv, inv.version)
+        if self.backpack_panel_key != key:
+            self.backpack_panel = self.render_backpack_panel()
+            self.backpack_panel_key = key
+        self.screen.blit(self.backpack_panel, (WIDTH//2 - 250, HEIGHT//2 - 150))
+
+        key = (inv, inv.version, self.free_crafting)
+        if self.recipe_panel_key != key:
+            self.recipe_panel = self.render_recipe_panel()
+            self.recipe_panel_key = key
+        self.screen.blit(self.recipe_panel, (WIDTH//2 + 50, HEIGHT//2 - 150))
+
+    def render_backpack_panel(self):
+        counts = self.player.inventory.counts()
+        panel = pygame.Surface((250, 25 * max(1, len(counts))), pygame.SRCALPHA)
         y_off = 0
         for item, count in counts.items():
             t = self.font.render(f"{item}: x{count}", True, (255, 255, 255))
-            self.screen.blit(t, (WIDTH//2 - 250, HEIGHT//2 - 150 + y_off))
+            panel.blit(t, (0, y_off))
             y_off += 25
 
         if not counts:
             t = self.font.render("(Empty)", True, (100, 100, 100))
-            self.screen.blit(t, (WIDTH//2 - 250, HEIGHT//2 - 150))
-
-        # --- RIGHT SIDE: CRAFTING ---
-        craft_t = self.font.render("RECIPES", True, (255, 200, 200))
-        self.screen.blit(craft_t, (WIDTH//2 + 50, HEIGHT//2 - 180))
+            panel.blit(t, (0, 0))
+        return panel
 
+    def render_recipe_panel(self):
+        status = self.crafter.status(self.player.inventory)
+        panel = pygame.Surface((250, 60 * len(RECIPES)), pygame.SRCALPHA)
         y = 0
         idx = 1
         for name, data in RECIPES.items():
             cost_s = ", ".join([f"{k} x{v}" for k, v in data['cost'].items()])
-            # Check afford
-            afford = True
-            temp = self.player.inventory[:]
-            for k, v in data['cost'].items():
-                if temp.count(k) < v:
-                    afford = False
-
+            # Check afford (sub-crafts count, e.g. Reeds for a Tent's Fabric)
+            count, multi = status[name]
+            label = f"[{idx}] {name}"
             if self.free_crafting:
-                afford = True
+                c = (255, 255, 255)
+            elif count == 0:
+                c = (100, 100, 100)
+            elif multi:
+                c = (255, 220, 150)
+                label += f" x{count} (auto)"
+            else:
+                c = (255, 255, 255)
+                label += f" x{count}"
 
-            c = (255, 255, 255) if afford else (100, 100, 100)
-            t1 = self.font.render(f"[{idx}] {name}", True, c)
+            t1 = self.font.render(label, True, c)
             t2 = self.font.render(f"Cost: {cost_s}", True, (150, 150, 150))
-            self.screen.blit(t1, (WIDTH//2 + 50, HEIGHT//2 - 150 + y))
-            self.screen.blit(t2, (WIDTH//2 + 50, HEIGHT//2 - 130 + y))
+            panel.blit(t1, (0, y))
+            panel.blit(t2, (0, y + 20))
             y += 60
             idx += 1
+        return panel
+
+    def pan_world_map(self):
+        keys = pygame.key.get_pressed()
+        dx = (keys[pygame.K_RIGHT] or keys[pygame.K_d]) - (keys[pygame.K_LEFT] or keys[pygame.K_a])
+        dy = (keys[pygame.K_DOWN] or keys[pygame.K_s]) - (keys[pygame.K_UP] or keys[pygame.K_w])
+        if dx or dy:
+            self.world_map.pan_by(dx * MAP_PAN_SPEED, dy * MAP_PAN_SPEED)
 
     def draw_map_overlay(self):
-        s = pygame.Surface((200, 200))
-        s.fill((0, 0, 0))
-        s.set_alpha(200)
-        cx, cy = 100, 100
-        for c in self.revealed_map:
-            off_x = c[0] - self.current_room_coords[0]
-            off_y = c[1] - self.current_room_coords[1]
-            dx = cx + (off_x*15)
-            dy = cy + (off_y*15)
-            if 0 <= dx < 200 and 0 <= dy < 200:
-                col = COLOR_MAP_VISITED
-                if c == (0, 0):
-                    col = COLOR_MAP_HUB   # Red Hub
-                if c == self.current_room_coords:
-                    col = COLOR_MAP_CURRENT  # Yellow Current
-                pygame.draw.rect(s, col, (dx, dy, 12, 12))
-        self.screen.blit(s, (WIDTH-220, 20))
+        self.minimap.draw(self.screen, (WIDTH-220, 20))
+
+
+def world_arg():
+    # `python main.py --world world.knw` plays a world baked by worldgen.py
+    if "--world" in sys.argv[:-1]:
+        return sys.argv[sys.argv.index("--world") + 1]
+    return None
 
 
 if __name__ == "__main__":
-    Game().run()
+    Game(world=world_arg()).run()
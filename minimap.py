@@ -0,0 +1,78 @@
+import pygame
+
+from settings import COLOR_MAP_VISITED, COLOR_MAP_CURRENT, COLOR_MAP_HUB
+
+MAP_SIZE = 200  # Pixels, square
+MAP_CELL = 15   # Pixels per room
+MAP_ROOM = 12   # Drawn size of a room inside its cell
+MAP_ALPHA = 200
+
+
+class Minimap:
+    # The corner map of revealed rooms. Its surface persists between frames:
+    # revealing a room draws just that cell, and moving to another room
+    # redraws only the cells in view, looking each one up in the revealed set.
+    # Nothing ever walks the whole set, so the cost stays flat no matter how
+    # much of the world has been explored.
+    def __init__(self, revealed=(), center=(0, 0)):
+        half = MAP_SIZE // 2
+        # Room offsets from the centre that land on the surface
+        self.offsets = [o for o in range(-half, half + 1)
+                        if 0 <= half + o * MAP_CELL < MAP_SIZE]
+        self.surface = pygame.Surface((MAP_SIZE, MAP_SIZE))
+        self.surface.set_alpha(MAP_ALPHA)
+        self.reset(revealed, center)
+
+    def reset(self, revealed=(), center=(0, 0)):
+        self.revealed = set(revealed)
+        self.center = center
+        self.stale = True
+
+    def add(self, coords):
+        if coords in self.revealed:
+            return
+        self.revealed.add(coords)
+        if not self.stale:
+            self.draw_cell(coords)
+
+    def move(self, coords):
+        if coords != self.center:
+            self.center = coords
+            self.stale = True
+
+    def __iter__(self):
+        return iter(self.revealed)
+
+    def __len__(self):
+        return len(self.revealed)
+
+    def __contains__(self, coords):
+        return coords in self.revealed
+
+    # --- DRAWING ---
+    def draw_cell(self, coords):
+        x = MAP_SIZE // 2 + (coords[0] - self.center[0]) * MAP_CELL
+        y = MAP_SIZE // 2 + (coords[1] - self.center[1]) * MAP_CELL
+        if not (0 <= x < MAP_SIZE and 0 <= y < MAP_SIZE):
+            return
+        col = COLOR_MAP_VISITED
+        if coords == (0, 0):
+            col = COLOR_MAP_HUB   # Red Hub
+        if coords == self.center:
+            col = COLOR_MAP_CURRENT  # Yellow Current
+        pygame.draw.rect(self.surface, col, (x, y, MAP_ROOM, MAP_ROOM))
+
+    def rebuild(self):
+        self.surface.fill((0, 0, 0))
+        cx, cy = self.center
+        for ox in self.offsets:
+            for oy in self.offsets:
+                coords = (cx + ox, cy + oy)
+                if coords in self.revealed:
+                    self.draw_cell(coords)
+        self.stale = False
+
+    def draw(self, screen, pos):
+        if self.stale:
+            self.rebuild()
+        screen.blit(self.surface, pos)
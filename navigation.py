@@ -0,0 +1,104 @@
+import math
+from array import array
+from collections import deque
+
+from settings import WIDTH, HEIGHT
+
+NAV_CELL = 20       # Pixels per flow field cell
+NAV_CLEARANCE = 15  # Obstacles are grown by this much (half an enemy) before rasterising
+
+# Neighbour offsets; diagonals last so a straight step wins ties
+NEIGHBOURS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+
+class FlowField:
+    # Per-room navigation for enemies. The room is rasterised once into a
+    # coarse grid of blocked cells (obstacles and water). A breadth-first
+    # search from the player's cell gives every cell its step distance to the
+    # player; it only reruns when the player moves into another cell. Enemies
+    # then read a direction for their own cell in O(1), so any number of them
+    # share a single search.
+    def __init__(self, room):
+        self.cols = math.ceil(WIDTH / NAV_CELL)
+        self.rows = math.ceil(HEIGHT / NAV_CELL)
+        self.blocked = bytearray(self.cols * self.rows)
+        rects = [o['rect'] for o in room.obstacles] + list(room.water_tiles)
+        for rect in rects:
+            self.block(rect.inflate(NAV_CLEARANCE * 2, NAV_CLEARANCE * 2))
+        self.goal = None
+        self.dist = None
+        self.steer = {}  # cell -> unit vector, filled as enemies ask
+
+    def block(self, rect):
+        # Every cell whose centre lies inside rect
+        half = NAV_CELL // 2
+        c0 = max(0, math.ceil((rect.left - half) / NAV_CELL))
+        c1 = min(self.cols, math.ceil((rect.right - half) / NAV_CELL))
+        r0 = max(0, math.ceil((rect.top - half) / NAV_CELL))
+        r1 = min(self.rows, math.ceil((rect.bottom - half) / NAV_CELL))
+        for row in range(r0, r1):
+            self.blocked[row * self.cols + c0:row * self.cols + c1] = b"\1" * max(0, c1 - c0)
+
+    def cell(self, x, y):
+        col = min(self.cols - 1, max(0, int(x // NAV_CELL)))
+        row = min(self.rows - 1, max(0, int(y // NAV_CELL)))
+        return row * self.cols + col
+
+    def is_blocked(self, x, y):
+        return self.blocked[self.cell(x, y)] == 1
+
+    # --- SEARCH ---
+    def update(self, x, y):
+        goal = self.cell(x, y)
+        if goal == self.goal:
+            return
+        self.goal = goal
+        self.steer = {}
+        cols, rows = self.cols, self.rows
+        blocked = self.blocked
+        dist = array("i", [-1]) * (cols * rows)
+        dist[goal] = 0  # Searched even if the player stands in a blocked cell
+        queue = deque([goal])
+        while queue:
+            idx = queue.popleft()
+            d = dist[idx] + 1
+            row, col = divmod(idx, cols)
+            if col > 0 and dist[idx - 1] < 0 and not blocked[idx - 1]:
+                dist[idx - 1] = d
+                queue.append(idx - 1)
+            if col < cols - 1 and dist[idx + 1] < 0 and not blocked[idx + 1]:
+                dist[idx + 1] = d
+                queue.append(idx + 1)
+            if row > 0 and dist[idx - cols] < 0 and not blocked[idx - cols]:
+                dist[idx - cols] = d
+                queue.append(idx - cols)
+            if row < rows - 1 and dist[idx + cols] < 0 and not blocked[idx + cols]:
+                dist[idx + cols] = d
+                queue.append(idx + cols)
+        self.dist = dist
+
+    def direction(self, x, y):
+        # Unit vector along the shortest path from (x, y), or None when the
+        # player is a step away (or unreachable) and a straight line will do
+        if self.dist is None:
+            return None
+        idx = self.cell(x, y)
+        if idx in self.steer:
+            return self.steer[idx]
+        here = self.dist[idx]
+        best = None
+        if here > 1 or (here < 0 and self.blocked[idx]):
+            row, col = divmod(idx, self.cols)
+            best_d = here if here >= 0 else 1 << 30
+            for dc, dr in NEIGHBOURS:
+                c, r = col + dc, row + dr
+                if not (0 <= c < self.cols and 0 <= r < self.rows):
+                    continue
+                if dc and dr and (self.blocked[row * self.cols + c] or self.blocked[r * self.cols + col]):
+                    continue  # No cutting corners round an obstacle
+                d = self.dist[r * self.cols + c]
+                if 0 <= d < best_d:
+                    best_d = d
+                    best = (dc / math.hypot(dc, dr), dr / math.hypot(dc, dr))
+        self.steer[idx] = best
+        return best
@@ -1,6 +1,7 @@
 import pygame
 import math
 from settings import *
+from inventory import Inventory
 
 
 class Player:
@@ -13,13 +14,14 @@ class Player:
         # Stats
         self.hp = PLAYER_MAX_HP
         self.max_hp = PLAYER_MAX_HP
-        self.inventory = []
+        self.inventory = Inventory()
 
         # Equipment
         self.has_lantern = False
         self.carrying_torch = False
         self.torch_health = 0.0
         self.weapon_equipped = "Fists"
+        self.last_hit = None  # Name of whatever hurt the player last
 
         # Movement
         self.speed = MOVE_SPEED
@@ -61,8 +63,9 @@ class Player:
             return True
         return False
 
-    def take_damage(self, amount):
+    def take_damage(self, amount, source=None):
         self.hp -= amount
+        self.last_hit = source
         if self.facing == "left":
             self.pos_x += 10
         elif self.facing == "right":
@@ -83,7 +86,7 @@ class Player:
             if self.attack_cooldown < 10:
                 self.is_attacking = False
 
-    def move(self, room):
+    def read_input(self):
         # 1. Keyboard Input
         keys = pygame.key.get_pressed()
         dx, dy = 0, 0
@@ -107,6 +110,11 @@ class Player:
                 dx = jx
             if abs(jy) > 0.2:
                 dy = jy
+        return dx, dy
+
+    def move(self, room, steer=None):
+        # steer: (dx, dy) in [-1, 1] from code instead of the input devices
+        dx, dy = steer if steer is not None else self.read_input()
 
         # 3. Apply Movement Logic
         if dx != 0 or dy != 0:
@@ -128,24 +136,16 @@ class Player:
         if len(self.inventory) > MAX_CARRY_BASE:
             current_speed = max(1, self.speed - 1)
 
-        p_rect = self.get_rect()
-
-        if room.biome == 'swamp':
-            for m in room.mud_patches:
-                if p_rect.colliderect(m):
-                    current_speed *= 0.4
+        terrain = room.terrain_map()
+        cell = terrain.cell(self.pos_x, self.pos_y)
+        current_speed *= terrain.speed[cell]  # Mud
 
         wind_x, wind_y = 0, 0
         if room.biome == 'tundra':
             wind_x = 0.5
             wind_y = 0.1
 
-        on_ice = False
-        for ice in room.ice_patches:
-            if p_rect.colliderect(ice):
-                on_ice = True
-
-        if on_ice or room.biome == 'glacier':
+        if terrain.slippery[cell]:
             self.pos_x += dx * (current_speed * 0.3) + (dx*1.5)
             self.pos_y += dy * (current_speed * 0.3) + (dy*1.5)
         else:
@@ -163,15 +163,12 @@ class Player:
                 self.z = 0
                 self.vel_z = 0
 
-        p_rect = self.get_rect()
-        for obs in room.obstacles:
-            if p_rect.colliderect(obs['rect']):
-                if self.z < obs['height']:
-                    if dx > 0:
-                        self.pos_x -= 5
-                    if dx < 0:
-                        self.pos_x += 5
-                    if dy > 0:
-                        self.pos_y -= 5
-                    if dy < 0:
-                        self.pos_y += 5
+        if self.z < terrain.height[terrain.cell(self.pos_x, self.pos_y)]:
+            if dx > 0:
+                self.pos_x -= 5
+            if dx < 0:
+                self.pos_x += 5
+            if dy > 0:
+                self.pos_y -= 5
+            if dy < 0:
+                self.pos_y += 5
@@ -0,0 +1,83 @@
+import builtins
+import contextlib
+import os
+import sys
+import time
+
+# --- STARTUP PROFILER ---
+# `python main.py --profile-startup` (or KINDLE_PROFILE_STARTUP=1) times every
+# import, font lookup, asset load and Game init step until the first frame is
+# on screen, then prints a report. Import this before anything else so the
+# import hook sees the heavy modules. When off, step() hands back one shared
+# no-op context and nothing is recorded.
+ENABLED = "--profile-startup" in sys.argv or bool(os.environ.get("KINDLE_PROFILE_STARTUP"))
+REPORT_TOP = 8  # Rows shown per category
+
+START = time.perf_counter()
+timings = []  # (category, label, seconds); asset loader threads append too
+_real_import = builtins.__import__
+_import_depth = 0
+_reported = False
+marks = {}  # label -> seconds since start, first time only
+_NOOP = contextlib.nullcontext()
+
+
+class _Step:
+    def __init__(self, category, label):
+        self.category = category
+        self.label = label
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        timings.append((self.category, self.label, time.perf_counter() - self.start))
+
+
+def step(label, category="init"):
+    return _Step(category, label) if ENABLED else _NOOP
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Only first loads reached from our own code are timed (inclusive of
+    # whatever they pull in), so nothing is counted twice
+    global _import_depth
+    if level or name in sys.modules or _import_depth:
+        return _real_import(name, globals, locals, fromlist, level)
+    _import_depth += 1
+    start = time.perf_counter()
+    try:
+        return _real_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_depth -= 1
+        timings.append(("import", name, time.perf_counter() - start))
+
+
+def mark(label):
+    if ENABLED and label not in marks:
+        marks[label] = time.perf_counter() - START
+
+
+def first_frame():
+    # Call after every game frame is flipped; reports once
+    global _reported
+    if not ENABLED or _reported:
+        return
+    _reported = True
+    builtins.__import__ = _real_import
+    total = time.perf_counter() - START
+    print(f"--- Startup profile: first frame after {total * 1000:.0f}ms ---")
+    for label, seconds in marks.items():
+        print(f"{label} on screen after {seconds * 1000:.0f}ms")
+    # Asset jobs overlap on the loader threads, so that total is CPU time
+    for category in ("import", "init", "font", "asset"):
+        rows = sorted((t for t in timings if t[0] == category), key=lambda t: -t[2])
+        if not rows:
+            continue
+        print(f"{category:<8}{sum(t[2] for t in rows) * 1000:8.1f}ms  ({len(rows)})")
+        for _, label, seconds in rows[:REPORT_TOP]:
+            print(f"    {seconds * 1000:8.1f}ms  {label}")
+
+
+if ENABLED:
+    builtins.__import__ = _timed_import
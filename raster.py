@@ -0,0 +1,125 @@
+import math
+import time
+import weakref
+
+import numpy as np
+
+from settings import WIDTH, HEIGHT
+
+RASTER_CELL = 20  # Pixels per grid cell by default (64 x 36 for the room)
+
+# Channel order of the grid. The first four never change once a room is
+# generated and are rasterised once per room; the rest are redrawn per call.
+CHANNELS = ["obstacle", "mud", "ice", "water",
+            "fragile_ice", "pyre", "item", "enemy", "echo", "player"]
+STATIC = 4
+OBSTACLE, MUD, ICE, WATER, FRAGILE, PYRE, ITEM, ENEMY, ECHO, PLAYER = range(len(CHANNELS))
+HEIGHT_SCALE = 100  # Obstacle height that maps to 1.0
+
+
+class Rasterizer:
+    # Turns a Room and the player into a (channels, rows, cols) float32 grid
+    # without touching pygame's drawing. Terrain is rasterised once per room
+    # and kept while the room is alive; each call then copies it in only if
+    # the room changed, redraws the handful of fragile ice and pyre rects, and
+    # clears just the cells the moving things were in last time before
+    # stamping their new ones. The returned array is reused by the next call.
+    #   obstacle: tallest obstacle height over the cell / HEIGHT_SCALE
+    #   mud, ice, water, pyre: coverage (pyre 0.5 unlit, 1 lit)
+    #   fragile_ice: integrity / 100
+    #   item, echo: how many are centred in the cell
+    #   enemy: hp fraction of the healthiest enemy centred in the cell
+    #   player: 1 in the player's cell
+    def __init__(self, cell=RASTER_CELL):
+        self.cell = cell
+        self.cols = math.ceil(WIDTH / cell)
+        self.rows = math.ceil(HEIGHT / cell)
+        self.grid = np.zeros((len(CHANNELS), self.rows, self.cols), np.float32)
+        self.static = weakref.WeakKeyDictionary()  # Room -> its terrain channels
+        self.room = None
+        self.stamped = []  # Flat indices into grid set by the last call
+
+    def slices(self, rect):
+        # Rows and columns of every cell the rect overlaps
+        c = self.cell
+        return (slice(max(0, rect.top // c), max(0, min(self.rows, -(-rect.bottom // c)))),
+                slice(max(0, rect.left // c), max(0, min(self.cols, -(-rect.right // c)))))
+
+    def build_static(self, room):
+        layers = np.zeros((STATIC, self.rows, self.cols), np.float32)
+        for obs in room.obstacles:
+            rows, cols = self.slices(obs['rect'])
+            np.maximum(layers[OBSTACLE, rows, cols], obs['height'] / HEIGHT_SCALE,
+                       out=layers[OBSTACLE, rows, cols])
+        for channel, rects in ((MUD, room.mud_patches), (ICE, room.ice_patches),
+                               (WATER, room.water_tiles)):
+            for rect in rects:
+                layers[(channel,) + self.slices(rect)] = 1
+        return layers
+
+    def cells(self, x, y):
+        # Flat cell indices (within one channel) for arrays of centres
+        col = np.clip((np.asarray(x) // self.cell).astype(np.intp), 0, self.cols - 1)
+        row = np.clip((np.asarray(y) // self.cell).astype(np.intp), 0, self.rows - 1)
+        return row * self.cols + col
+
+    def render(self, room, player):
+        grid = self.grid
+        plane = self.rows * self.cols
+        if room is not self.room:
+            static = self.static.get(room)
+            if static is None:
+                static = self.static[room] = self.build_static(room)
+            grid[:STATIC] = static
+            self.room = room
+
+        grid[FRAGILE] = 0
+        for ice in room.fragile_ice:
+            grid[(FRAGILE,) + self.slices(ice['rect'])] = ice['integrity'] / 100
+        grid[PYRE] = 0
+        for pyre in room.pyres:
+            grid[(PYRE,) + self.slices(pyre.rect)] = 1.0 if pyre.lit else 0.5
+
+        flat = grid.reshape(-1)
+        flat[self.stamped] = 0
+        stamped = []
+        if room.items:
+            idx = ITEM * plane + self.cells([i.centerx for i in room.items],
+                                            [i.centery for i in room.items])
+            np.add.at(flat, idx, 1)
+            stamped.append(idx)
+        if len(room.echoes):
+            idx = ECHO * plane + self.cells(room.echoes.pos[:, 0], room.echoes.pos[:, 1])
+            np.add.at(flat, idx, 1)
+            stamped.append(idx)
+        if room.enemies:
+            idx = ENEMY * plane + self.cells([e.rect.centerx for e in room.enemies],
+                                             [e.rect.centery for e in room.enemies])
+            np.maximum.at(flat, idx, [e.hp / e.max_hp for e in room.enemies])
+            stamped.append(idx)
+        idx = PLAYER * plane + self.cells([player.pos_x], [player.pos_y])
+        flat[idx] = 1
+        stamped.append(idx)
+        self.stamped = np.concatenate(stamped)
+        return grid
+
+
+def benchmark(frames=5000, cell=RASTER_CELL):
+    # Grids per second while walking the player through a few rooms
+    from world import Room
+    from player import Player
+    rooms = [Room((x, y), 1) for x in range(-3, 4) for y in range(-3, 4)]
+    player = Player(WIDTH // 2, HEIGHT // 2)
+    raster = Rasterizer(cell)
+    start = time.perf_counter()
+    for i in range(frames):
+        room = rooms[i // 100 % len(rooms)]
+        player.pos_x = (player.pos_x + 7) % WIDTH
+        raster.render(room, player)
+    elapsed = time.perf_counter() - start
+    print(f"{raster.cols}x{raster.rows}x{len(CHANNELS)} grid: "
+          f"{frames / elapsed:.0f} renders/s ({elapsed / frames * 1e6:.0f}us each)")
+
+
+if __name__ == "__main__":
+    benchmark()
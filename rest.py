@@ -0,0 +1,54 @@
+import math
+import random
+
+import settings
+from settings import FIRE_PER_ITEM, KEEPER_THRESHOLD, KEEPER_CHANCE
+
+
+def frames_until_below(fire, level):
+    # Frames of decay until fire < level, at least 1
+    return max(1, math.floor((fire - level) / settings.FIRE_DECAY) + 1)
+
+
+def frames_until_out(fire, level=0):
+    # Frames of decay until fire <= level, at least 1
+    return max(1, math.ceil((fire - level) / settings.FIRE_DECAY))
+
+
+def fast_forward(fire, logs, frames, automated, wake=0, rng=random):
+    # Advances the hub fire `frames` updates in one go, with the same rules as
+    # Game.update: it decays every frame, and once it is below the threshold
+    # the keeper (if hired) burns a log from the pile with a 2/101 chance a
+    # frame. Between burns the decay is a straight line and the wait for the
+    # next burn is one draw from the geometric distribution, so the cost is
+    # one loop per log burned rather than one per frame.
+    # Stops early the first frame the fire is at or below `wake` with nothing
+    # left to save it. Returns (fire, logs burned, frames elapsed).
+    burned = 0
+    elapsed = 0
+    log_p = math.log(1 - KEEPER_CHANCE)
+    while elapsed < frames:
+        left = frames - elapsed
+        keeper = automated and burned < logs
+        if keeper and fire >= KEEPER_THRESHOLD:
+            n = min(left, frames_until_below(fire, KEEPER_THRESHOLD))
+            fire -= n * settings.FIRE_DECAY
+            elapsed += n
+            continue
+
+        out = frames_until_out(fire, wake)
+        if keeper:
+            # Frames up to and including the next burn
+            wait = math.ceil(math.log(1.0 - rng.random()) / log_p) or 1
+            if wait <= min(left, out):
+                fire += FIRE_PER_ITEM - wait * settings.FIRE_DECAY
+                burned += 1
+                elapsed += wait
+                continue
+
+        n = min(left, out)
+        fire -= n * settings.FIRE_DECAY
+        elapsed += n
+        if n == out:
+            break
+    return fire, burned, elapsed
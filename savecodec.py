@@ -0,0 +1,414 @@
+import itertools
+import json
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from settings import SAVE_FILE, LEGACY_SAVE_FILE, SAVE_COMPRESSION
+
+# --- BINARY SAVE FORMAT ---
+# Header: magic, format version, flags. The body (optionally zlib'd) holds a
+# string table of interned item names followed by the save slots. Item lists
+# are stored as ordered (item_id, count) runs so "pop the last item" order
+# survives a round trip, coordinate sets are sorted, delta encoded and packed as
+# int32 pairs (the deltas are mostly 0/1, which zlib flattens), and the
+# remaining integers are zigzag varints.
+MAGIC = b"KNDL"
+FORMAT_VERSION = 3
+FLAG_ZLIB = 1
+HEADER = struct.Struct("<4sBB")
+F64 = struct.Struct("<d")
+SAVE_ZLIB_LEVEL = 3  # Saves happen mid-game; favour speed over the last few bytes
+
+SLOT_KEYS = ("1", "2", "3")
+
+# Field layout of a slot, per format version. Decoding an older version reads
+# its own layout and MIGRATIONS fill in whatever later versions added.
+SLOT_SCHEMAS = {
+    1: [
+        ("name", "str"),
+        ("fire", "num"),
+        ("hp", "num"),
+        ("automation", "bool"),
+        ("room", "coord"),
+        ("pos", "point"),
+        ("inventory", "items"),
+        ("stockpile", "items"),
+        ("revealed", "coordset"),
+        ("tents", "coordlist"),
+    ],
+}
+# v2: world seed, so rooms regenerate identically and only deltas are stored
+SLOT_SCHEMAS[2] = SLOT_SCHEMAS[1] + [("seed", "num")]
+
+
+def _migrate_v2(data):
+    data.setdefault("seed", 0)
+    return data
+
+
+# v3: lantern, and the last journal event folded into this snapshot
+SLOT_SCHEMAS[3] = SLOT_SCHEMAS[2] + [("lantern", "bool"), ("jseq", "num")]
+
+
+def _migrate_v3(data):
+    data.setdefault("lantern", False)
+    data.setdefault("jseq", 0)
+    return data
+
+
+MIGRATIONS = {2: _migrate_v2, 3: _migrate_v3}
+
+SLOT_DEFAULTS = {
+    "name": "Unnamed",
+    "fire": 100,
+    "hp": 100,
+    "automation": False,
+    "room": (0, 0),
+    "pos": (0.0, 0.0),
+    "inventory": [],
+    "stockpile": [],
+    "revealed": [],
+    "tents": [],
+    "seed": 0,
+    "lantern": False,
+    "jseq": 0,
+}
+
+
+class SaveFormatError(ValueError):
+    pass
+
+
+class Writer:
+    def __init__(self, strings):
+        self.buf = bytearray()
+        self.strings = strings
+
+    def varint(self, n):
+        n = (n << 1) ^ (n >> 63)  # zigzag
+        while n > 0x7F:
+            self.buf.append((n & 0x7F) | 0x80)
+            n >>= 7
+        self.buf.append(n)
+
+    def uvarint(self, n):
+        while n > 0x7F:
+            self.buf.append((n & 0x7F) | 0x80)
+            n >>= 7
+        self.buf.append(n)
+
+    def raw_str(self, s):
+        b = s.encode("utf-8")
+        self.uvarint(len(b))
+        self.buf += b
+
+    def str(self, s):
+        self.raw_str(str(s))
+
+    def num(self, v):
+        # Tag 0: integer, tag 1: float64
+        if isinstance(v, int) or (isinstance(v, float) and v.is_integer() and abs(v) < 2**53):
+            self.buf.append(0)
+            self.varint(int(v))
+        else:
+            self.buf.append(1)
+            self.buf += F64.pack(v)
+
+    def bool(self, v):
+        self.buf.append(1 if v else 0)
+
+    def coord(self, c):
+        self.varint(int(c[0]))
+        self.varint(int(c[1]))
+
+    def point(self, p):
+        self.buf += F64.pack(p[0])
+        self.buf += F64.pack(p[1])
+
+    def items(self, seq):
+        runs = []
+        for name in seq:
+            if runs and runs[-1][0] == name:
+                runs[-1][1] += 1
+            else:
+                runs.append([name, 1])
+        self.uvarint(len(runs))
+        for name, count in runs:
+            if name not in self.strings:
+                self.strings[name] = len(self.strings)
+            self.uvarint(self.strings[name])
+            self.uvarint(count)
+
+    def coordset(self, coords):
+        coords = list(coords)
+        arr = np.fromiter(itertools.chain.from_iterable(coords), dtype="<i4",
+                          count=len(coords) * 2).reshape(-1, 2)
+        self.uvarint(len(arr))
+        if len(arr):
+            arr = arr[np.lexsort((arr[:, 1], arr[:, 0]))]
+            arr[1:] -= arr[:-1].copy()
+            self.buf += arr.tobytes()
+
+    def coordlist(self, coords):
+        coords = list(coords)
+        self.uvarint(len(coords))
+        for c in coords:
+            self.coord(c)
+
+
+class Reader:
+    def __init__(self, data, strings=None):
+        self.data = data
+        self.pos = 0
+        self.strings = strings
+
+    def uvarint(self, _=None):
+        shift = 0
+        n = 0
+        data = self.data
+        while True:
+            if self.pos >= len(data):
+                raise SaveFormatError("truncated save data")
+            b = data[self.pos]
+            self.pos += 1
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def varint(self, _=None):
+        n = self.uvarint()
+        return (n >> 1) ^ -(n & 1)
+
+    def raw_str(self):
+        n = self.uvarint()
+        s = bytes(self.data[self.pos:self.pos + n])
+        if len(s) != n:
+            raise SaveFormatError("truncated string")
+        self.pos += n
+        return s.decode("utf-8")
+
+    def str(self):
+        return self.raw_str()
+
+    def f64(self):
+        if self.pos + 8 > len(self.data):
+            raise SaveFormatError("truncated float")
+        v = F64.unpack_from(self.data, self.pos)[0]
+        self.pos += 8
+        return v
+
+    def num(self):
+        if self.pos >= len(self.data):
+            raise SaveFormatError("truncated number")
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == 0:
+            return self.varint()
+        if tag == 1:
+            return self.f64()
+        raise SaveFormatError(f"bad number tag {tag}")
+
+    def bool(self):
+        if self.pos >= len(self.data):
+            raise SaveFormatError("truncated bool")
+        v = self.data[self.pos]
+        self.pos += 1
+        return v != 0
+
+    def coord(self):
+        return (self.varint(), self.varint())
+
+    def point(self):
+        return (self.f64(), self.f64())
+
+    def items(self):
+        out = []
+        for _ in range(self.uvarint()):
+            idx = self.uvarint()
+            count = self.uvarint()
+            try:
+                name = self.strings[idx]
+            except IndexError:
+                raise SaveFormatError(f"unknown item id {idx}")
+            out.extend([name] * count)
+        return out
+
+    def coordset(self):
+        n = self.uvarint()
+        size = n * 8
+        if self.pos + size > len(self.data):
+            raise SaveFormatError("truncated coordinate set")
+        arr = np.frombuffer(self.data, dtype="<i4", count=n * 2, offset=self.pos)
+        self.pos += size
+        arr = np.cumsum(arr.reshape(-1, 2), axis=0)
+        return list(zip(arr[:, 0].tolist(), arr[:, 1].tolist()))
+
+    def coordlist(self):
+        return [self.coord() for _ in range(self.uvarint())]
+
+
+# --- ENCODE / DECODE ---
+def encode_slots(slots, compress=SAVE_COMPRESSION):
+    strings = {}
+    body = Writer(strings)
+    schema = SLOT_SCHEMAS[FORMAT_VERSION]
+
+    keys = [k for k in slots if k in SLOT_KEYS] or list(SLOT_KEYS)
+    body.uvarint(len(keys))
+    for key in keys:
+        body.raw_str(key)
+        data = slots.get(key)
+        body.bool(bool(data))
+        if data:
+            for field, kind in schema:
+                getattr(body, kind)(data.get(field, SLOT_DEFAULTS[field]))
+
+    # The string table goes first so the reader can resolve ids in one pass
+    table = Writer(None)
+    names = sorted(strings, key=strings.get)
+    table.uvarint(len(names))
+    for name in names:
+        table.raw_str(name)
+    payload = bytes(table.buf + body.buf)
+
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload, SAVE_ZLIB_LEVEL)
+        flags |= FLAG_ZLIB
+    return HEADER.pack(MAGIC, FORMAT_VERSION, flags) + payload
+
+
+def decode_slots(blob):
+    if len(blob) < HEADER.size:
+        raise SaveFormatError("save too short")
+    magic, version, flags = HEADER.unpack_from(blob, 0)
+    if magic != MAGIC:
+        raise SaveFormatError("not a binary save")
+    if version not in SLOT_SCHEMAS:
+        raise SaveFormatError(f"unsupported save version {version}")
+
+    payload = blob[HEADER.size:]
+    if flags & FLAG_ZLIB:
+        try:
+            payload = zlib.decompress(payload)
+        except zlib.error as e:
+            raise SaveFormatError(f"corrupt save: {e}")
+
+    r = Reader(payload)
+    r.strings = [r.raw_str() for _ in range(r.uvarint())]
+
+    schema = SLOT_SCHEMAS[version]
+    slots = {k: None for k in SLOT_KEYS}
+    for _ in range(r.uvarint()):
+        key = r.raw_str()
+        if not r.bool():
+            slots[key] = None
+            continue
+        data = {field: getattr(r, kind)() for field, kind in schema}
+        for v in range(version + 1, FORMAT_VERSION + 1):
+            data = MIGRATIONS[v](data)
+        slots[key] = data
+    return slots
+
+
+def migrate_legacy(raw):
+    # Old saves were a plain JSON object. Early builds also wrote a bare
+    # (unnamed) slot at the top level, which no slot key points at; drop it.
+    slots = {k: None for k in SLOT_KEYS}
+    for key in SLOT_KEYS:
+        data = raw.get(key) if isinstance(raw, dict) else None
+        if not data:
+            continue
+        slot = dict(SLOT_DEFAULTS)
+        slot.update(data)
+        slot["room"] = tuple(slot["room"])
+        slot["pos"] = tuple(slot["pos"])
+        slot["revealed"] = [tuple(c) for c in slot["revealed"]]
+        slot["tents"] = [tuple(c) for c in slot["tents"]]
+        for v in range(2, FORMAT_VERSION + 1):
+            slot = MIGRATIONS[v](slot)
+        slots[key] = slot
+    return slots
+
+
+# --- FILE IO ---
+def load_slots(path=SAVE_FILE, legacy_path=LEGACY_SAVE_FILE):
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return decode_slots(f.read())
+    if legacy_path and os.path.exists(legacy_path):
+        with open(legacy_path, "r") as f:
+            try:
+                return migrate_legacy(json.load(f))
+            except ValueError as e:
+                raise SaveFormatError(f"corrupt legacy save: {e}")
+    return {k: None for k in SLOT_KEYS}
+
+
+def save_slots(slots, path=SAVE_FILE, compress=SAVE_COMPRESSION):
+    blob = encode_slots(slots, compress)
+    # Write then rename so a crash mid-save never leaves a half-written file
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(blob)
+    os.replace(tmp, path)
+    return len(blob)
+
+
+# --- BENCHMARK ---
+def _make_bench_slot(explored, rng):
+    items = ["branch", "Wood", "Reeds", "Flint", "Fur", "Oil", "Iron", "Fabric"]
+    side = int(explored ** 0.5) + 1
+    revealed = set()
+    while len(revealed) < explored:
+        revealed.add((rng.randint(-side, side), rng.randint(-side, side)))
+    return {
+        "name": "bench",
+        "fire": rng.uniform(0, 100),
+        "hp": 75,
+        "automation": True,
+        "room": (3, -2),
+        "pos": (rng.uniform(0, 1280), rng.uniform(0, 720)),
+        "inventory": [rng.choice(items) for _ in range(40)],
+        "stockpile": sorted(rng.choice(items) for _ in range(400)),
+        "revealed": list(revealed),
+        "tents": list(revealed)[:50],
+    }
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def benchmark(sizes=(100, 10000, 100000), repeat=5):
+    import random
+    rng = random.Random(1)
+    print(f"{'rooms':>8} {'codec':<12} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+    for explored in sizes:
+        slots = {"1": _make_bench_slot(explored, rng), "2": None, "3": None}
+
+        as_json = json.dumps(slots)
+        rows = [("json", len(as_json),
+                 _time(lambda: json.dumps(slots), repeat),
+                 _time(lambda: json.loads(as_json), repeat))]
+        for name, compress in (("binary", False), ("binary+zlib", True)):
+            blob = encode_slots(slots, compress)
+            rows.append((name, len(blob),
+                         _time(lambda: encode_slots(slots, compress), repeat),
+                         _time(lambda: decode_slots(blob), repeat)))
+        for name, size, enc, dec in rows:
+            print(f"{explored:>8} {name:<12} {size:>10} {enc:>10.2f} {dec:>10.2f}")
+
+
+if __name__ == "__main__":
+    benchmark()
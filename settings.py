@@ -1,6 +1,3 @@
-import pygame
-import os
-
 # --- CONFIGURATION ---
 WIDTH, HEIGHT = 1280, 720
 FPS = 60
@@ -9,6 +6,11 @@ JUMP_FORCE = 10
 GRAVITY_Z = 0.8
 MAX_FUEL = 100
 MAX_CARRY_BASE = 5
+FIRE_PER_ITEM = 15  # Fuel gained per item fed to the hub fire
+FIRE_DECAY = 0.005  # Fuel the hub fire loses per frame
+KEEPER_THRESHOLD = 30  # The keeper only tends a fire below this
+KEEPER_CHANCE = 2 / 101  # Per frame, matching random.randint(0, 100) < 2
+WITHDRAW_BATCH = 5  # Items taken per bulk withdraw from the stockpile
 
 ### --- DEV TOOLS CONFIGURATION --- ###
 # Set to True to enable cheats by default, or toggle with '0' key in-game
@@ -27,6 +29,9 @@ COLOR_PYRE_LIT = (255, 140, 0)
 COLOR_MAP_VISITED = (100, 100, 100)
 COLOR_MAP_CURRENT = (255, 200, 0)
 COLOR_MAP_HUB = (255, 50, 50)
+COLOR_MAP_BG = (60, 60, 70)         # Unexplored, on the world map
+COLOR_MAP_FOREST = (40, 70, 40)     # The forest floor is too dark to read as a map cell
+COLOR_MAP_TENT = (255, 255, 255)
 
 # Biomes
 COLOR_SNOW = (240, 245, 255)       # North
@@ -38,6 +43,18 @@ COLOR_TUNDRA = (200, 200, 210)     # NE
 COLOR_SWAMP = (25, 35, 20)         # SW
 COLOR_BADLANDS = (160, 80, 40)     # SE
 
+BIOME_COLORS = {
+    'forest': COLOR_BG_FOREST,
+    'snow': COLOR_SNOW,
+    'desert': COLOR_DESERT,
+    'mountain': COLOR_MOUNTAIN,
+    'ocean': COLOR_OCEAN,
+    'glacier': COLOR_GLACIER,
+    'tundra': COLOR_TUNDRA,
+    'swamp': COLOR_SWAMP,
+    'badlands': COLOR_BADLANDS,
+}
+
 # Hazards / Terrain
 COLOR_MUD = (45, 30, 15)
 COLOR_WATER = (50, 100, 200)
@@ -64,8 +81,49 @@ RECIPES = {
     "Lantern": {"cost": {"Iron": 2, "Oil": 1}, "desc": "Permanent light source."}
 }
 
+# --- ECHOES ---
+ECHO_SPEED = 1.5
+ECHO_SIZE = (20, 30)
+HAUNTED_CHANCE = 0.05   # Rooms that spawn a whole swarm of echoes
+HAUNTED_ECHOES = 40
+
+# --- OFF-SCREEN ROOMS ---
+ICE_REGEN_RATE = 100 / (60 * FPS)  # Integrity per tick; worn ice refreezes fully in a minute
+ECHO_DRIFT = 1.0                   # Echo random walk, px per sqrt(tick)
+
+# --- RESTING (at a tent) ---
+REST_MINUTES = 10              # One press of R
+REST_NIGHT_MINUTES = 8 * 60    # "Until morning"
+REST_WAKE_FIRE = 10            # Woken early when the hub fire falls this low with no logs left
+
+# --- AI ---
+AI_MAX_STRIDE = 15       # Most frames an idle, distant enemy may sleep
+AI_APPROACH_SPEED = 6    # Px/frame the player is assumed to close in at (faster than they move)
+AI_STATS_FRAMES = FPS    # Window for the per-state timing shown with F3
+
+# --- ASSETS ---
+ASSET_PACK = "assets.pack"  # Built by `python assetpack.py`; optional
+ASSET_WORKERS = 4  # Decoder threads when loading from the PNGs
+
+# --- STARTUP ---
+FONT_CACHE_FILE = "fontcache.json"  # Resolved system font files, see fonts.py
+
+# --- TELEMETRY (off unless --telemetry, see telemetry.py) ---
+TELEMETRY_FILE = "telemetry.jsonl"
+TELEMETRY_MAX_BYTES = 4 * 1024 * 1024  # Rotated to telemetry.1.jsonl past this
+TELEMETRY_BACKUPS = 3
+TELEMETRY_BUFFER = 8192        # Events held before the oldest are dropped
+TELEMETRY_FLUSH_SECONDS = 2
+TELEMETRY_WINDOW = 10 * FPS    # Frames per frame-time histogram
+
 # --- SAVES ---
-SAVE_FILE = "savegame.json"
+SAVE_FILE = "savegame.dat"
+LEGACY_SAVE_FILE = "savegame.json"  # Migrated to SAVE_FILE on first save
+SAVE_COMPRESSION = True
+WORLD_FILE = "savegame_slot{slot}.rooms"  # Per-slot explored room changes
+JOURNAL_FILE = "savegame_slot{slot}.journal"  # Events since the last snapshot
+AUTOSAVE_SECONDS = 5
+JOURNAL_COMPACT_BYTES = 256 * 1024
 COLOR_SLOT_EMPTY = (50, 50, 50)
 COLOR_SLOT_USED = (100, 100, 150)
 COLOR_SLOT_HOVER = (150, 150, 200)
@@ -0,0 +1,147 @@
+import bisect
+import collections
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+from settings import (TELEMETRY_FILE, TELEMETRY_MAX_BYTES, TELEMETRY_BACKUPS,
+                      TELEMETRY_BUFFER, TELEMETRY_FLUSH_SECONDS, TELEMETRY_WINDOW)
+
+# --- TELEMETRY ---
+# `python main.py --telemetry` (or KINDLE_TELEMETRY=1) records what a play
+# session did: frame time histograms, room transitions and generation times,
+# save times, enemy counts and deaths. Events go into a bounded ring buffer
+# (the oldest are dropped if the writer falls behind) and a background thread
+# writes them out in batches as JSON lines, rotating the file by size. When
+# off, nothing is started and the per-frame hook is behind a single flag test.
+ENABLED = "--telemetry" in sys.argv or bool(os.environ.get("KINDLE_TELEMETRY"))
+FRAME_BUCKETS = [4, 8, 12, 16.7, 20, 25, 33.3, 50, 100]  # ms; last bucket is everything slower
+
+START = time.perf_counter()
+_buffer = collections.deque(maxlen=TELEMETRY_BUFFER)
+_appended = 0  # Events ever appended; minus those written, the rest were dropped
+_written = 0
+_writer = None
+_NOOP = contextlib.nullcontext()
+
+# Frame window, reset every TELEMETRY_WINDOW frames
+_hist = [0] * (len(FRAME_BUCKETS) + 1)
+_frames = 0
+_frame_total = 0.0
+_frame_max = 0.0
+_enemy_total = 0
+_enemy_max = 0
+
+
+def event(kind, **fields):
+    global _appended
+    if ENABLED:
+        _buffer.append((round(time.perf_counter() - START, 4), kind, fields))
+        _appended += 1
+
+
+class _Timed:
+    def __init__(self, kind, fields):
+        self.kind = kind
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.fields
+
+    def __exit__(self, *exc):
+        event(self.kind, ms=round((time.perf_counter() - self.start) * 1000, 3), **self.fields)
+
+
+def timed(kind, **fields):
+    # `with timed("save", slot=1) as f:` records one event with its duration;
+    # fields added to f inside the block are recorded too
+    return _Timed(kind, fields) if ENABLED else _NOOP
+
+
+def frame(seconds, enemies):
+    # Once per frame, only when ENABLED (callers test the flag first)
+    global _frames, _frame_total, _frame_max, _enemy_total, _enemy_max
+    ms = seconds * 1000
+    _hist[bisect.bisect_left(FRAME_BUCKETS, ms)] += 1
+    _frames += 1
+    _frame_total += ms
+    if ms > _frame_max:
+        _frame_max = ms
+    _enemy_total += enemies
+    if enemies > _enemy_max:
+        _enemy_max = enemies
+    if _frames >= TELEMETRY_WINDOW:
+        event("frames", n=_frames, hist=list(_hist), mean_ms=round(_frame_total / _frames, 3),
+              max_ms=round(_frame_max, 3), enemies_mean=round(_enemy_total / _frames, 2),
+              enemies_max=_enemy_max)
+        for i in range(len(_hist)):
+            _hist[i] = 0
+        _frames = 0
+        _frame_total = _frame_max = 0.0
+        _enemy_total = _enemy_max = 0
+
+
+# --- WRITER ---
+class _Writer(threading.Thread):
+    def __init__(self, path):
+        super().__init__(name="telemetry", daemon=True)
+        self.path = path
+        self.stop = threading.Event()
+
+    def run(self):
+        while not self.stop.wait(TELEMETRY_FLUSH_SECONDS):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        global _written
+        lines = []
+        while _buffer:
+            t, kind, fields = _buffer.popleft()
+            lines.append(json.dumps(dict(t=t, ev=kind, **fields), separators=(",", ":")))
+        if not lines:
+            return
+        try:
+            with open(self.path, "a") as f:
+                f.write("\n".join(lines) + "\n")
+                size = f.tell()
+            if size > TELEMETRY_MAX_BYTES:
+                rotate(self.path)
+        except OSError as e:
+            print(f"Telemetry write failed: {e}")
+        _written += len(lines)
+
+
+def rotate(path):
+    # telemetry.jsonl -> telemetry.1.jsonl -> ... -> telemetry.N.jsonl (dropped)
+    base, ext = os.path.splitext(path)
+    for i in range(TELEMETRY_BACKUPS - 1, 0, -1):
+        if os.path.exists(f"{base}.{i}{ext}"):
+            os.replace(f"{base}.{i}{ext}", f"{base}.{i + 1}{ext}")
+    if TELEMETRY_BACKUPS:
+        os.replace(path, f"{base}.1{ext}")
+    else:
+        os.remove(path)
+
+
+def start(path=TELEMETRY_FILE):
+    global _writer
+    if ENABLED and _writer is None:
+        _writer = _Writer(path)
+        _writer.start()
+        event("session", pid=os.getpid())
+
+
+def close():
+    # Writes out whatever is still buffered
+    global _writer
+    if _writer is None:
+        return
+    event("end", dropped=_appended - _written - len(_buffer))
+    _writer.stop.set()
+    _writer.join()
+    _writer = None
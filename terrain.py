@@ -0,0 +1,77 @@
+import math
+from array import array
+
+import numpy as np
+
+from settings import WIDTH, HEIGHT
+
+TERRAIN_CELL = 8           # Pixels per terrain cell
+FOOTPRINT = (20, 16)       # Player.get_rect() size, centred on the player's position
+MUD_SLOW = 0.4             # Speed multiplier per mud patch underfoot
+
+
+class TerrainMap:
+    # What the ground does to the player, rasterised once per room so a
+    # movement query is a single array lookup instead of a pass over every
+    # mud, ice, water and obstacle rect. Each rect is grown by the player's
+    # footprint before it is rasterised (so "the player's rect overlaps it"
+    # becomes "the player's position is inside it") and marks the cells whose
+    # centre it covers, which is exact to within half a cell. The rect lists
+    # on the Room stay as they are for drawing and saving.
+    #   speed:   movement multiplier, MUD_SLOW per overlapping mud patch
+    #   slippery: on ice (everywhere in a glacier)
+    #   water:   falling in
+    #   height:  tallest obstacle overlapping (the player is blocked below it)
+    #   fragile: bit i set where fragile_ice[i] is underfoot
+    def __init__(self, room, footprint=FOOTPRINT):
+        self.cols = math.ceil(WIDTH / TERRAIN_CELL)
+        self.rows = math.ceil(HEIGHT / TERRAIN_CELL)
+        shape = (self.rows, self.cols)
+        speed = np.ones(shape, np.float32)
+        slippery = np.zeros(shape, bool)
+        water = np.zeros(shape, bool)
+        height = np.zeros(shape, np.uint8)
+        fragile = np.zeros(shape, np.uint32)
+        grow = lambda rect: self.cells(rect.inflate(*footprint))
+
+        if room.biome == 'swamp':
+            for rect in room.mud_patches:
+                speed[grow(rect)] *= MUD_SLOW
+        if room.biome == 'glacier':
+            slippery[:] = True
+        for rect in room.ice_patches:
+            slippery[grow(rect)] = True
+        for rect in room.water_tiles:
+            water[grow(rect)] = True
+        for obs in room.obstacles:
+            cells = grow(obs['rect'])
+            np.maximum(height[cells], obs['height'], out=height[cells])
+        for idx, ice in enumerate(room.fragile_ice):
+            fragile[grow(ice['rect'])] |= 1 << idx
+
+        # Flat, so a lookup is one index from cell(), and held as bytes and
+        # arrays rather than numpy, whose scalar indexing is several times
+        # slower than a plain sequence's
+        self.speed = array("f", speed.tobytes())
+        self.slippery = slippery.tobytes()
+        self.water = water.tobytes()
+        self.height = height.tobytes()
+        self.fragile = array("I", fragile.tobytes())
+
+    def cells(self, rect):
+        # Rows and columns of every cell whose centre lies inside rect
+        half = TERRAIN_CELL // 2
+        c0 = max(0, math.ceil((rect.left - half) / TERRAIN_CELL))
+        c1 = max(c0, min(self.cols, math.ceil((rect.right - half) / TERRAIN_CELL)))
+        r0 = max(0, math.ceil((rect.top - half) / TERRAIN_CELL))
+        r1 = max(r0, min(self.rows, math.ceil((rect.bottom - half) / TERRAIN_CELL)))
+        return slice(r0, r1), slice(c0, c1)
+
+    def cell(self, x, y):
+        # Called several times a frame, so the usual on-screen case skips the
+        # clamping
+        if 0 <= x < WIDTH and 0 <= y < HEIGHT:
+            return int(y) // TERRAIN_CELL * self.cols + int(x) // TERRAIN_CELL
+        col = min(self.cols - 1, max(0, int(x // TERRAIN_CELL)))
+        row = min(self.rows - 1, max(0, int(y // TERRAIN_CELL)))
+        return row * self.cols + col
@@ -0,0 +1,53 @@
+import pygame
+
+TEXT_CACHE_MAX = 512  # Rendered strings kept before the cache is emptied
+BOX_STEP = 32         # Pooled backgrounds are rounded up to this many pixels
+
+
+class UICache:
+    # Menu and overlay surfaces, built once and reused every frame they are on
+    # screen. Static chrome (dimmed backdrop, frames, titles, hints) lives in
+    # panels keyed by whatever it depends on; changing text goes through the
+    # text cache, so only strings that actually changed are rendered again.
+    def __init__(self):
+        self.panels = {}
+        self.text = {}
+        self.boxes = {}
+
+    def panel(self, key, build):
+        surface = self.panels.get(key)
+        if surface is None:
+            surface = self.panels[key] = build()
+        return surface
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.text.get(key)
+        if surface is None:
+            if len(self.text) >= TEXT_CACHE_MAX:
+                self.text.clear()
+            surface = self.text[key] = font.render(text, True, color)
+        return surface
+
+    def box(self, screen, rect, color, alpha):
+        # Translucent background for a rect of any size, blitted from a pooled
+        # surface that is at least that big
+        w = -(-rect.width // BOX_STEP) * BOX_STEP
+        h = -(-rect.height // BOX_STEP) * BOX_STEP
+        key = (w, h, color, alpha)
+        surface = self.boxes.get(key)
+        if surface is None:
+            surface = self.boxes[key] = pygame.Surface((w, h))
+            surface.fill(color)
+            surface.set_alpha(alpha)
+        screen.blit(surface, rect.topleft, (0, 0, rect.width, rect.height))
+
+
+def backdrop(size, rgba):
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill(rgba)
+    return surface
+
+
+def blit_centered(surface, text, x, y):
+    surface.blit(text, (x - text.get_width()//2, y))
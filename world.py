@@ -1,30 +1,105 @@
 import pygame
 import random
 import math
+import hashlib
+import struct
+import numpy as np
 from settings import *
 from enemy import Enemy  # Make sure this import is here
+from navigation import FlowField
+from terrain import TerrainMap
+
+ROOM_SEED = struct.Struct("<qqq")  # world seed, x, y
+
+
+def room_seed(world_seed, coords):
+    # Each room gets its own stream so rooms regenerate identically no matter
+    # what order they were first visited in. Hashed rather than mixed by hand:
+    # random.Random seeds from abs(), so a sum or xor of the coordinates gives
+    # mirrored rooms (and many others) the same stream.
+    digest = hashlib.blake2b(ROOM_SEED.pack(world_seed, *coords), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def biome_for(coords):
+    # Biomes are fixed by direction from the hub, so this needs no Room
+    x, y = coords
+    if x > 1 and y < -1:
+        return 'tundra'
+    elif x < -1 and y < -1:
+        return 'glacier'
+    elif x > 1 and y > 1:
+        return 'badlands'
+    elif x < -1 and y > 1:
+        return 'swamp'
+    elif y < -1:
+        return 'snow'
+    elif y > 1:
+        return 'desert'
+    elif x > 1:
+        return 'mountain'
+    elif x < -1:
+        return 'ocean'
+    return 'forest'
 
 
 class Item:
-    def __init__(self, x, y, name):
+    def __init__(self, x, y, name, uid=0):
         self.rect = pygame.Rect(x, y, 20, 20)
         self.name = name
+        self.uid = uid
         self.centerx = x + 10
         self.centery = y + 10
 
 
-class Echo:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.rect = pygame.Rect(x, y, 20, 30)
-        self.speed = 1.5
+class EchoSwarm:
+    # Every echo in a room, updated together. Positions (centres) and speeds
+    # live in arrays; each frame all of them step towards the player along
+    # the normalised offset, the same pursuit the old per-echo atan2/cos/sin
+    # gave, so a haunted room of dozens costs about the same as a single echo.
+    def __init__(self):
+        self.pos = np.empty((0, 2))
+        self.speed = np.empty(0)
+
+    def add(self, x, y, speed=ECHO_SPEED):
+        self.pos = np.vstack((self.pos, (x, y)))
+        self.speed = np.append(self.speed, speed)
+
+    def __len__(self):
+        return len(self.speed)
+
+    def __iter__(self):
+        return iter(self.pos.tolist())
 
     def update(self, player):
-        angle = math.atan2(player.pos_y - self.y, player.pos_x - self.x)
-        self.x += math.cos(angle) * self.speed
-        self.y += math.sin(angle) * self.speed
-        self.rect.center = (self.x, self.y)
+        if not len(self):
+            return
+        offset = np.array((player.pos_x, player.pos_y)) - self.pos
+        dist = np.hypot(offset[:, 0], offset[:, 1])
+        step = np.divide(self.speed, dist, out=np.zeros_like(dist), where=dist > 0)
+        self.pos += offset * step[:, None]
+
+    def hits(self, rect):
+        # Indices of echoes whose body overlaps rect
+        x, y = self.pos[:, 0], self.pos[:, 1]
+        w, h = ECHO_SIZE[0] / 2, ECHO_SIZE[1] / 2
+        return np.flatnonzero((x - w < rect.right) & (x + w > rect.left) &
+                              (y - h < rect.bottom) & (y + h > rect.top)).tolist()
+
+    def knockback(self, i, x, y, dist):
+        # Offset that pushes (x, y) dist pixels straight away from echo i
+        dx, dy = x - self.pos[i, 0], y - self.pos[i, 1]
+        length = math.hypot(dx, dy)
+        if not length:
+            return dist, 0.0
+        return dx * dist / length, dy * dist / length
+
+    def drift(self, rng, spread):
+        if not len(self):
+            return
+        noise = np.random.default_rng(rng.getrandbits(32))
+        self.pos += noise.normal(0, spread, self.pos.shape)
+        np.clip(self.pos, 0, (WIDTH, HEIGHT), out=self.pos)
 
 
 class SignalPyre:
@@ -54,11 +129,15 @@ class NPC:
 
 
 class Room:
-    def __init__(self, coords):
+    def __init__(self, coords, world_seed=0, generate=True):
+        # generate=False leaves the room empty for a stored copy to fill in
+        # (see worldstore.decode_room)
         self.coords = coords
+        self.rng = random.Random(room_seed(world_seed, coords))
         self.obstacles = []
         self.items = []
-        self.echoes = []
+        self.echoes = EchoSwarm()
+        self.haunted = False
         self.decorations = []
         self.pyres = []
         self.ice_patches = []
@@ -67,32 +146,23 @@ class Room:
         self.fragile_ice = []
         self.enemies = []  # Initialize empty enemy list
         self.has_tent = False
+        self.dirty = False  # Changed since it was last written to the save
+        self.item_uids = []
+        self.enemy_uids = []
+        self.flow = None  # Built on first use, see flow_field()
+        self.terrain = None  # Likewise, see terrain_map()
+        self.last_tick = None  # World tick this room was last simulated at
 
         # --- BIOME DETERMINATION ---
         # This MUST happen before we generate enemies
-        x, y = coords
-        if x > 1 and y < -1:
-            self.biome = 'tundra'
-        elif x < -1 and y < -1:
-            self.biome = 'glacier'
-        elif x > 1 and y > 1:
-            self.biome = 'badlands'
-        elif x < -1 and y > 1:
-            self.biome = 'swamp'
-        elif y < -1:
-            self.biome = 'snow'
-        elif y > 1:
-            self.biome = 'desert'
-        elif x > 1:
-            self.biome = 'mountain'
-        elif x < -1:
-            self.biome = 'ocean'
-        else:
-            self.biome = 'forest'
+        self.biome = biome_for(coords)
+        if not generate:
+            return
 
+        rng = self.rng
         for _ in range(20):
             self.decorations.append(
-                (random.randint(0, WIDTH), random.randint(0, HEIGHT)))
+                (rng.randint(0, WIDTH), rng.randint(0, HEIGHT)))
 
         # If this is the Hub (0,0), stop here.
         if coords == (0, 0):
@@ -102,83 +172,101 @@ class Room:
         self.generate_terrain()
         self.generate_items()
         self.generate_enemies()  # Calls the method below
+        self.item_uids = [i.uid for i in self.items]
+        self.enemy_uids = [e.uid for e in self.enemies]
+
+        # Rolled last so it leaves everything above as it always was
+        if rng.random() < HAUNTED_CHANCE:
+            self.haunt()
 
     def generate_enemies(self):
         if self.coords == (0, 0):
             return  # No enemies in hub
 
         # Difficulty scaling: further from center = more enemies
+        rng = self.rng
         dist = max(abs(self.coords[0]), abs(self.coords[1]))
-        count = random.randint(1, 2) + int(dist/2)
+        count = rng.randint(1, 2) + int(dist/2)
 
-        for _ in range(count):
-            ex = random.randint(50, WIDTH-50)
-            ey = random.randint(50, HEIGHT-50)
+        for uid in range(count):
+            ex = rng.randint(50, WIDTH-50)
+            ey = rng.randint(50, HEIGHT-50)
             # Pass the biome so the Enemy class knows what stats to load
-            self.enemies.append(Enemy(ex, ey, self.biome))
+            enemy = Enemy(ex, ey, self.biome, rng)
+            enemy.uid = uid
+            self.enemies.append(enemy)
 
     def generate_terrain(self):
+        rng = self.rng
         w, h = WIDTH, HEIGHT
 
         if self.biome == 'swamp':
             for _ in range(6):
                 self.mud_patches.append(pygame.Rect(
-                    random.randint(0, w), random.randint(0, h), 120, 120))
+                    rng.randint(0, w), rng.randint(0, h), 120, 120))
             for _ in range(5):
-                self.obstacles.append({'rect': pygame.Rect(random.randint(
-                    0, w), random.randint(0, h), 20, 60), 'height': 100, 'type': 'tree'})
+                self.obstacles.append({'rect': pygame.Rect(rng.randint(
+                    0, w), rng.randint(0, h), 20, 60), 'height': 100, 'type': 'tree'})
 
         elif self.biome == 'glacier':
             self.water_tiles.append(pygame.Rect(0, 0, 100, h))
             for _ in range(8):
-                r = pygame.Rect(random.randint(100, w),
-                                random.randint(0, h), 80, 80)
+                r = pygame.Rect(rng.randint(100, w),
+                                rng.randint(0, h), 80, 80)
                 self.fragile_ice.append({'rect': r, 'integrity': 100})
 
         elif self.biome == 'badlands':
             for _ in range(15):
-                self.obstacles.append({'rect': pygame.Rect(random.randint(
-                    0, w), random.randint(0, h), 40, 40), 'height': 100, 'type': 'rock'})
+                self.obstacles.append({'rect': pygame.Rect(rng.randint(
+                    0, w), rng.randint(0, h), 40, 40), 'height': 100, 'type': 'rock'})
 
         elif self.biome == 'tundra':
             for _ in range(5):
-                self.obstacles.append({'rect': pygame.Rect(random.randint(
-                    0, w), random.randint(0, h), 30, 20), 'height': 50, 'type': 'rock'})
+                self.obstacles.append({'rect': pygame.Rect(rng.randint(
+                    0, w), rng.randint(0, h), 30, 20), 'height': 50, 'type': 'rock'})
 
         elif self.biome == 'mountain':
             for _ in range(10):
-                width = random.randint(50, 200)
-                z = random.choice([5, 12, 100])
-                self.obstacles.append({'rect': pygame.Rect(random.randint(
-                    0, w), random.randint(0, h), width, 30), 'height': z, 'type': 'cliff'})
+                width = rng.randint(50, 200)
+                z = rng.choice([5, 12, 100])
+                self.obstacles.append({'rect': pygame.Rect(rng.randint(
+                    0, w), rng.randint(0, h), width, 30), 'height': z, 'type': 'cliff'})
 
         elif self.biome == 'snow':
             for _ in range(4):
-                self.ice_patches.append(pygame.Rect(random.randint(
-                    0, w-200), random.randint(0, h-200), 200, 150))
+                self.ice_patches.append(pygame.Rect(rng.randint(
+                    0, w-200), rng.randint(0, h-200), 200, 150))
             for _ in range(5):
-                self.obstacles.append({'rect': pygame.Rect(random.randint(
-                    0, w), random.randint(0, h), 30, 40), 'height': 100, 'type': 'tree'})
+                self.obstacles.append({'rect': pygame.Rect(rng.randint(
+                    0, w), rng.randint(0, h), 30, 40), 'height': 100, 'type': 'tree'})
 
         elif self.biome == 'ocean':
             self.water_tiles.append(pygame.Rect(200, 200, 600, 400))
 
         elif self.biome == 'desert':
             for _ in range(12):
-                self.obstacles.append({'rect': pygame.Rect(random.randint(
-                    0, w), random.randint(0, h), 30, 60), 'height': 100, 'type': 'cactus'})
+                self.obstacles.append({'rect': pygame.Rect(rng.randint(
+                    0, w), rng.randint(0, h), 30, 60), 'height': 100, 'type': 'cactus'})
 
         else:
             for _ in range(8):
-                self.obstacles.append({'rect': pygame.Rect(random.randint(
-                    0, w), random.randint(0, h), 30, 40), 'height': 100, 'type': 'tree'})
-
-        if random.random() < 0.3:
-            self.pyres.append(SignalPyre(random.randint(
-                100, WIDTH-100), random.randint(100, HEIGHT-100)))
-        if random.random() < 0.2:
-            self.echoes.append(
-                Echo(random.randint(0, WIDTH), random.randint(0, HEIGHT)))
+                self.obstacles.append({'rect': pygame.Rect(rng.randint(
+                    0, w), rng.randint(0, h), 30, 40), 'height': 100, 'type': 'tree'})
+
+        if rng.random() < 0.3:
+            self.pyres.append(SignalPyre(rng.randint(
+                100, WIDTH-100), rng.randint(100, HEIGHT-100)))
+        if rng.random() < 0.2:
+            self.echoes.add(rng.randint(0, WIDTH), rng.randint(0, HEIGHT))
+
+    def haunt(self):
+        # A room crowded with echoes, at mixed speeds so they string out
+        # behind the player instead of moving as one blob
+        rng = self.rng
+        self.haunted = True
+        for _ in range(HAUNTED_ECHOES):
+            self.echoes.add(rng.randint(0, WIDTH), rng.randint(0, HEIGHT),
+                            rng.uniform(0.6, ECHO_SPEED))
 
     def generate_items(self):
         res_map = {
@@ -192,9 +280,86 @@ class Room:
             'ocean': ['Reeds'],
             'snow': ['branch']
         }
+        rng = self.rng
         possibilities = res_map.get(self.biome, ['Wood'])
-        for _ in range(random.randint(2, 4)):
-            name = random.choice(possibilities)
-            x, y = random.randint(50, WIDTH-50), random.randint(50, HEIGHT-50)
+        for uid in range(rng.randint(2, 4)):
+            name = rng.choice(possibilities)
+            x, y = rng.randint(50, WIDTH-50), rng.randint(50, HEIGHT-50)
             if not any(w.collidepoint(x, y) for w in self.water_tiles):
-                self.items.append(Item(x, y, name))
+                self.items.append(Item(x, y, name, uid))
+
+    # --- OFF-SCREEN ---
+    def catch_up(self, tick):
+        # Nothing in a room runs while the player is elsewhere. On re-entry
+        # this stands in for every frame missed, in one step: enemies give up
+        # and walk home, worn ice refreezes and echoes wander (a random walk,
+        # so their spread grows with the square root of the time away).
+        # Returns the indices of ice whose integrity changed.
+        if self.last_tick is None:
+            self.last_tick = tick
+            return []
+        elapsed = tick - self.last_tick
+        self.last_tick = tick
+        if elapsed <= 0:
+            return []
+
+        for enemy in self.enemies:
+            enemy.return_home(elapsed)
+
+        changed = []
+        regen = int(elapsed * ICE_REGEN_RATE)
+        for idx, ice in enumerate(self.fragile_ice):
+            if ice['integrity'] < 100 and regen:
+                ice['integrity'] = min(100, ice['integrity'] + regen)
+                changed.append(idx)
+        if changed:
+            self.dirty = True
+
+        self.echoes.drift(self.rng, ECHO_DRIFT * math.sqrt(elapsed))
+        return changed
+
+    # --- GRIDS ---
+    # Built on first use and kept with the room
+    def flow_field(self):
+        # Enemy navigation grid; obstacles and water never move, so one per room
+        if self.flow is None:
+            self.flow = FlowField(self)
+        return self.flow
+
+    def terrain_map(self):
+        # Movement lookups for the player; the ground never moves either
+        if self.terrain is None:
+            self.terrain = TerrainMap(self)
+        return self.terrain
+
+    # --- SAVE DELTAS ---
+    # Rooms regenerate from the world seed, so a save only needs what the
+    # player changed. Enemy positions are not kept; survivors respawn at their
+    # spawn point with whatever HP they had left.
+    def get_delta(self):
+        present = {i.uid for i in self.items}
+        alive = {e.uid: e for e in self.enemies}
+        return {
+            "taken": [uid for uid in self.item_uids if uid not in present],
+            "slain": [uid for uid in self.enemy_uids if uid not in alive],
+            "hurt": [(uid, e.hp) for uid, e in alive.items() if e.hp < e.max_hp],
+            "lit": [i for i, p in enumerate(self.pyres) if p.lit],
+            "ice": [(i, ice['integrity']) for i, ice in enumerate(self.fragile_ice)
+                    if ice['integrity'] != 100],
+        }
+
+    def apply_delta(self, delta):
+        taken = set(delta["taken"])
+        slain = set(delta["slain"])
+        hurt = dict(delta["hurt"])
+        self.items = [i for i in self.items if i.uid not in taken]
+        self.enemies = [e for e in self.enemies if e.uid not in slain]
+        for e in self.enemies:
+            if e.uid in hurt:
+                e.hp = hurt[e.uid]
+        for i in delta["lit"]:
+            if i < len(self.pyres):
+                self.pyres[i].lit = True
+        for i, integrity in delta["ice"]:
+            if i < len(self.fragile_ice):
+                self.fragile_ice[i]['integrity'] = integrity
@@ -0,0 +1,93 @@
+import argparse
+import collections
+import multiprocessing
+import random
+import time
+
+from world import Room
+import worldstore
+
+# --- BULK WORLD GENERATION ---
+# `python worldgen.py --size 200 --seed 7 --out world.knw` generates every
+# room of a size x size square centred on the hub across a pool of worker
+# processes and writes them to a baked world (worldstore.BakedWorld), which
+# `python main.py --world world.knw` then plays instead of generating rooms
+# on the fly. Each worker generates whole regions and writes their region
+# files itself, so nothing funnels through the parent. Prints rooms/s and
+# what each biome costs to generate, so it doubles as a stress test for the
+# generator.
+
+
+def generate_region(seed, region, bounds, out):
+    # Worker: every room of one region file inside bounds (x0, y0, x1, y1,
+    # exclusive ends). Returns per-biome [rooms, generation seconds, encoded
+    # bytes] and the size of the file written.
+    x0, y0, x1, y1 = bounds
+    ox, oy = region[0] * worldstore.REGION, region[1] * worldstore.REGION
+    records = []
+    costs = {}
+    for y in range(max(y0, oy), min(y1, oy + worldstore.REGION)):
+        for x in range(max(x0, ox), min(x1, ox + worldstore.REGION)):
+            start = time.perf_counter()
+            room = Room((x, y), seed)
+            elapsed = time.perf_counter() - start
+            payload = worldstore.encode_room(room, seed)
+            records.append(((x, y), payload))
+            cost = costs.setdefault(room.biome, [0, 0.0, 0])
+            cost[0] += 1
+            cost[1] += elapsed
+            cost[2] += len(payload)
+    return costs, worldstore.write_region(out, region, records)
+
+
+def generate(size, seed, out, workers=None):
+    workers = workers or multiprocessing.cpu_count()
+    half = size // 2
+    bounds = (-half, -half, size - half, size - half)
+    first = worldstore.region_of(bounds[:2])
+    last = worldstore.region_of((bounds[2] - 1, bounds[3] - 1))
+    tasks = [(seed, (rx, ry), bounds, out)
+             for ry in range(first[1], last[1] + 1)
+             for rx in range(first[0], last[0] + 1)]
+    worldstore.write_manifest(out, seed)
+    costs = collections.defaultdict(lambda: [0, 0.0, 0])
+    disk = 0
+    start = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        for region_costs, nbytes in pool.starmap(generate_region, tasks, chunksize=1):
+            disk += nbytes
+            for biome, (n, seconds, raw) in region_costs.items():
+                total = costs[biome]
+                total[0] += n
+                total[1] += seconds
+                total[2] += raw
+    elapsed = time.perf_counter() - start
+    return costs, len(tasks), disk, elapsed
+
+
+def report(costs, regions, disk, elapsed, workers, out):
+    rooms = sum(c[0] for c in costs.values())
+    raw = sum(c[2] for c in costs.values())
+    print(f"{rooms} rooms in {regions} region files on {workers} workers: {elapsed:.2f}s "
+          f"({rooms / elapsed:.0f} rooms/s)")
+    print(f"{out}: {disk / 1e6:.1f} MB on disk ({raw / 1e6:.1f} MB of records before compression)")
+    print("biome         rooms   gen us/room   bytes/room")
+    for biome, (n, seconds, nbytes) in sorted(costs.items(), key=lambda c: -c[1][1] / c[1][0]):
+        print(f"{biome:<12}{n:8d}{seconds / n * 1e6:14.0f}{nbytes / n:13.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate a square region of rooms")
+    parser.add_argument("--size", type=int, default=200, help="Rooms per side, centred on the hub")
+    parser.add_argument("--seed", type=int, default=None, help="World seed (default: random)")
+    parser.add_argument("--out", default="world.knw")
+    parser.add_argument("--workers", type=int, default=None, help="Default: one per core")
+    args = parser.parse_args()
+    seed = args.seed if args.seed is not None else random.randrange(2**31)
+    workers = args.workers or multiprocessing.cpu_count()
+    print(f"World seed {seed}")
+    report(*generate(args.size, seed, args.out, workers), workers, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+from collections import OrderedDict
+import pygame
+
+from settings import (WIDTH, HEIGHT, BIOME_COLORS, COLOR_MAP_BG, COLOR_MAP_FOREST,
+                      COLOR_MAP_HUB, COLOR_MAP_CURRENT, COLOR_MAP_TENT,
+                      COLOR_PYRE_LIT, COLOR_TEXT_MAIN)
+from world import biome_for
+
+MAP_CHUNK = 16                  # Rooms per side of a cached tile
+MAP_ZOOMS = [2, 4, 8, 16, 32]   # Pixels per room
+MAP_DEFAULT_ZOOM = 2            # Index into MAP_ZOOMS
+MAP_PAN_SPEED = 12              # Screen pixels per frame while a pan key is held
+MAP_TILE_BUDGET = 8 * 1024 * 1024  # Cached tile pixels before the oldest are dropped
+
+MAP_BIOME_COLORS = dict(BIOME_COLORS, forest=COLOR_MAP_FOREST)
+
+
+class WorldMap:
+    # Full screen map of every explored room. The world is cut into chunks of
+    # MAP_CHUNK x MAP_CHUNK rooms and each chunk is drawn once per zoom level
+    # into a cached tile; revealing a room, pitching a tent or lighting a pyre
+    # only throws away that room's chunk. A frame is then one blit per
+    # visible chunk, however many rooms have been explored.
+    def __init__(self):
+        self.zoom = MAP_DEFAULT_ZOOM
+        self.pan = [0.0, 0.0]  # View centre, in rooms, relative to the player
+        self.tiles = OrderedDict()  # (chunk, cell size) -> Surface, oldest first
+        self.tile_pixels = 0
+        self.label = None
+        self.label_key = None
+        self.reset()
+
+    def reset(self, revealed=(), tents=(), lit=()):
+        self.chunks = {}  # chunk -> set of revealed rooms in it
+        self.tents = set(tents)
+        self.lit = set(lit)
+        self.tiles.clear()
+        self.tile_pixels = 0
+        self.rooms = 0
+        for coords in revealed:
+            self.reveal(coords)
+
+    @staticmethod
+    def chunk_of(coords):
+        return (coords[0] // MAP_CHUNK, coords[1] // MAP_CHUNK)
+
+    def touch(self, coords):
+        chunk = self.chunk_of(coords)
+        for cell in MAP_ZOOMS:
+            tile = self.tiles.pop((chunk, cell), None)
+            if tile:
+                self.tile_pixels -= tile.get_width() * tile.get_height()
+
+    def reveal(self, coords):
+        rooms = self.chunks.setdefault(self.chunk_of(coords), set())
+        if coords not in rooms:
+            rooms.add(coords)
+            self.rooms += 1
+            self.touch(coords)
+
+    def add_tent(self, coords):
+        if coords not in self.tents:
+            self.tents.add(coords)
+            self.touch(coords)
+
+    def mark_lit(self, coords):
+        if coords not in self.lit:
+            self.lit.add(coords)
+            self.touch(coords)
+
+    # --- VIEW ---
+    def cell(self):
+        return MAP_ZOOMS[self.zoom]
+
+    def zoom_by(self, step):
+        self.zoom = max(0, min(len(MAP_ZOOMS) - 1, self.zoom + step))
+
+    def pan_by(self, dx, dy):
+        # Screen pixels, so panning feels the same at every zoom
+        self.pan[0] += dx / self.cell()
+        self.pan[1] += dy / self.cell()
+
+    def recenter(self):
+        self.pan = [0.0, 0.0]
+
+    # --- TILES ---
+    def build_tile(self, chunk, cell):
+        size = MAP_CHUNK * cell
+        tile = pygame.Surface((size, size), pygame.SRCALPHA)
+        tile.fill((0, 0, 0, 0))
+        gap = 1 if cell >= 4 else 0
+        ox, oy = chunk[0] * MAP_CHUNK, chunk[1] * MAP_CHUNK
+        for coords in self.chunks[chunk]:
+            rect = pygame.Rect((coords[0] - ox) * cell, (coords[1] - oy) * cell,
+                               cell - gap, cell - gap)
+            col = MAP_BIOME_COLORS.get(biome_for(coords), COLOR_MAP_FOREST)
+            if coords == (0, 0):
+                col = COLOR_MAP_HUB
+            if cell < 8:
+                # Too small for markers; colour the whole cell instead
+                if coords in self.lit:
+                    col = COLOR_PYRE_LIT
+                if coords in self.tents:
+                    col = COLOR_MAP_TENT
+            tile.fill(col, rect)
+            if cell >= 8:
+                if coords in self.lit:
+                    pygame.draw.circle(tile, COLOR_PYRE_LIT, rect.center, cell // 4)
+                if coords in self.tents:
+                    mark = pygame.Rect(0, 0, cell // 3, cell // 3)
+                    mark.bottomright = rect.bottomright
+                    tile.fill(COLOR_MAP_TENT, mark)
+        return tile
+
+    def tile(self, chunk, cell):
+        key = (chunk, cell)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            return tile
+        tile = self.tiles[key] = self.build_tile(chunk, cell)
+        self.tile_pixels += tile.get_width() * tile.get_height()
+        while self.tile_pixels > MAP_TILE_BUDGET and len(self.tiles) > 1:
+            _, old = self.tiles.popitem(last=False)
+            self.tile_pixels -= old.get_width() * old.get_height()
+        return tile
+
+    # --- DRAWING ---
+    def draw(self, screen, current, font):
+        cell = self.cell()
+        vx = current[0] + self.pan[0]
+        vy = current[1] + self.pan[1]
+
+        def to_screen(rx, ry):
+            return (round(WIDTH / 2 + (rx - vx) * cell),
+                    round(HEIGHT / 2 + (ry - vy) * cell))
+
+        screen.fill(COLOR_MAP_BG)
+        span = MAP_CHUNK * cell
+        x0 = int((vx - WIDTH / 2 / cell) // MAP_CHUNK)
+        y0 = int((vy - HEIGHT / 2 / cell) // MAP_CHUNK)
+        for cy in range(y0, y0 + HEIGHT // span + 2):
+            for cx in range(x0, x0 + WIDTH // span + 2):
+                if (cx, cy) in self.chunks:
+                    screen.blit(self.tile((cx, cy), cell),
+                                to_screen(cx * MAP_CHUNK, cy * MAP_CHUNK))
+
+        x, y = to_screen(*current)
+        pygame.draw.rect(screen, COLOR_MAP_CURRENT,
+                         (x - 1, y - 1, cell + 1, cell + 1), 2 if cell >= 8 else 1)
+
+        key = (cell, self.rooms)
+        if self.label_key != key:
+            self.label = font.render(
+                f"WORLD MAP  {self.rooms} rooms  x{cell}  |  Arrows/drag: pan  "
+                f"Wheel/+/-: zoom  C: centre  N: close", True, COLOR_TEXT_MAIN)
+            self.label_key = key
+        screen.blit(self.label, (20, HEIGHT - 40))
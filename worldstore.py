@@ -0,0 +1,425 @@
+import mmap
+import os
+import random
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+from savecodec import Writer, Reader, SaveFormatError
+from settings import WORLD_FILE
+from world import Room, Item, SignalPyre, room_seed
+from enemy import Enemy
+
+# --- ROOM DELTA STORE ---
+# One file per save slot. Each save appends a record for every room that
+# changed since the last save; the newest record for a room wins. Older
+# records become dead weight and are squeezed out once they outnumber the
+# live ones, so a save costs O(rooms changed) rather than O(rooms explored).
+MAGIC = b"KNRM"
+STORE_VERSION = 2  # 2: rooms seeded by hash (uids changed)
+HEADER = struct.Struct("<4sB")
+RECORD_LEN = struct.Struct("<I")
+COMPACT_MIN_BYTES = 64 * 1024
+
+
+def encode_delta(coords, delta):
+    w = Writer(None)
+    w.coord(coords)
+    for key in ("taken", "slain", "lit"):
+        w.uvarint(len(delta[key]))
+        for v in delta[key]:
+            w.uvarint(v)
+    for key in ("hurt", "ice"):
+        w.uvarint(len(delta[key]))
+        for i, v in delta[key]:
+            w.uvarint(i)
+            w.num(v)
+    return bytes(w.buf)
+
+
+def decode_delta(payload):
+    r = Reader(payload)
+    coords = r.coord()
+    delta = {}
+    for key in ("taken", "slain", "lit"):
+        delta[key] = [r.uvarint() for _ in range(r.uvarint())]
+    for key in ("hurt", "ice"):
+        delta[key] = [(r.uvarint(), r.num()) for _ in range(r.uvarint())]
+    return coords, delta
+
+
+def encode_rooms(rooms):
+    return [(room.coords, encode_delta(room.coords, room.get_delta())) for room in rooms]
+
+
+def store_path(slot_num):
+    return WORLD_FILE.format(slot=slot_num)
+
+
+class RoomStore:
+    def __init__(self, path):
+        self.path = path
+        self.index = {}  # coords -> (offset, length) of the newest record
+        self.live_bytes = 0
+        # Saves may be compacted on a background thread (see journal.py)
+        self.lock = threading.RLock()
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, STORE_VERSION))
+        self.file = open(path, "r+b")
+        self.scan()
+
+    def scan(self):
+        data = self.file.read()
+        if len(data) < HEADER.size:
+            raise SaveFormatError(f"{self.path}: too short")
+        magic, version = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != STORE_VERSION:
+            raise SaveFormatError(f"{self.path}: not a room store")
+
+        pos = HEADER.size
+        while pos + RECORD_LEN.size <= len(data):
+            (length,) = RECORD_LEN.unpack_from(data, pos)
+            start = pos + RECORD_LEN.size
+            if start + length > len(data):
+                break  # Torn write at the tail; drop it
+            coords = Reader(data[start:start + length]).coord()
+            self.remember(coords, start, length)
+            pos = start + length
+        self.end = pos
+        self.file.truncate(pos)
+
+    def remember(self, coords, offset, length):
+        old = self.index.get(coords)
+        if old:
+            self.live_bytes -= old[1]
+        self.index[coords] = (offset, length)
+        self.live_bytes += length
+
+    def get(self, coords):
+        # Looked up under the lock too: a compaction swaps the index and the
+        # file underneath us
+        with self.lock:
+            entry = self.index.get(coords)
+            if entry is None:
+                return None
+            offset, length = entry
+            self.file.seek(offset)
+            payload = self.file.read(length)
+        return decode_delta(payload)[1]
+
+    def write(self, rooms):
+        self.write_records(encode_rooms(rooms))
+
+    def write_records(self, records):
+        with self.lock:
+            chunks = []
+            pos = self.end
+            for coords, payload in records:
+                chunks.append(RECORD_LEN.pack(len(payload)))
+                chunks.append(payload)
+                self.remember(coords, pos + RECORD_LEN.size, len(payload))
+                pos += RECORD_LEN.size + len(payload)
+            self.file.seek(self.end)
+            self.file.write(b"".join(chunks))
+            self.file.flush()
+            self.end = pos
+
+            dead = self.end - HEADER.size - self.live_bytes - RECORD_LEN.size * len(self.index)
+            if dead > COMPACT_MIN_BYTES and dead > self.live_bytes:
+                self.compact()
+
+    def live_records(self):
+        with self.lock:
+            chunks = [HEADER.pack(MAGIC, STORE_VERSION)]
+            for offset, length in self.index.values():
+                self.file.seek(offset)
+                chunks.append(RECORD_LEN.pack(length))
+                chunks.append(self.file.read(length))
+        return b"".join(chunks)
+
+    def copy_to(self, path):
+        # Snapshot the live records into a fresh store (e.g. saving to a new slot)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.live_records())
+        os.replace(tmp, path)
+
+    def compact(self):
+        with self.lock:
+            data = self.live_records()
+            self.file.close()
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+            self.index = {}
+            self.live_bytes = 0
+            self.file = open(self.path, "r+b")
+            self.scan()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+# --- BAKED WORLDS ---
+# Whole rooms as generated, written ahead of time by worldgen.py so the game
+# can read a room instead of generating it. A record holds everything a
+# Room's generator produces (uids and list order included, so save deltas
+# apply to it unchanged); enemies keep their rolled variant, and the room's
+# rng is left where generation left it, so later draws (catch_up) match too.
+#
+# A baked world is a directory: a small manifest with the world seed, and
+# one region file per REGION x REGION block of rooms. A region file starts
+# with a fixed table of (offset, length) for every room slot in the block,
+# followed by the zlib-compressed room records. Files are mapped into memory
+# and only the most recently used few stay open, so fetching a room is a
+# table lookup and one decompress however big the world is, and memory
+# stays bounded.
+REGION = 32  # Rooms per side of a region file
+REGION_OPEN = 16  # Region files kept mapped at once
+WORLD_MAGIC = b"KNWB"
+REGION_MAGIC = b"KNRG"
+BAKED_VERSION = 4
+WORLD_HEADER = struct.Struct("<4sBqH")  # magic, version, world seed, REGION
+REGION_HEADER = struct.Struct("<4sBii")  # magic, version, region x, region y
+SLOT = struct.Struct("<II")  # offset, length; length 0 = no room
+MANIFEST = "world"
+COMPRESS_LEVEL = 6
+RNG_MAX_BLOCKS = 64  # Refills of a room's rng rng_words() will look through
+
+RECT = struct.Struct("<4h")   # x, y, w, h
+POINT = struct.Struct("<2h")
+
+
+def _rects(w, rects):
+    w.uvarint(len(rects))
+    w.buf += b"".join(RECT.pack(*rect) for rect in rects)
+
+
+def _take(r, st, n):
+    # n fixed-size structs straight from the payload, no per-field decoding
+    size = st.size * n
+    if r.pos + size > len(r.data):
+        raise SaveFormatError("truncated room record")
+    chunk = r.data[r.pos:r.pos + size]
+    r.pos += size
+    return st.iter_unpack(chunk)
+
+
+def _read_rects(r):
+    return [pygame.Rect(t) for t in _take(r, RECT, r.uvarint())]
+
+
+def rng_words(room, world_seed):
+    # How many 32-bit words generation drew from room.rng. The room keeps
+    # drawing from it afterwards (catch_up), so a decoded room advances a
+    # fresh one by this much to carry on exactly where the generated one
+    # would. Storing the count beats storing getstate(), which is 2.5KB of
+    # incompressible noise.
+    state = room.rng.getstate()[1]
+    fresh = random.Random(room_seed(world_seed, room.coords))
+    if fresh.getstate()[1] == state:
+        return 0
+    # Mersenne Twister refills its 624 words at a time; find how many refills
+    # it has done, then the position within the last one is the state index
+    for block in range(RNG_MAX_BLOCKS):
+        fresh.getrandbits(32 * 624)
+        if fresh.getstate()[1][:-1] == state[:-1]:
+            return block * 624 + state[-1]
+    raise ValueError(f"room {room.coords}: rng is not from world seed {world_seed}")
+
+
+def encode_room(room, world_seed):
+    # Geometry is packed as int16 structs, which decode far faster than
+    # varints; the rest is tagged savecodec fields
+    w = Writer(None)
+    w.coord(room.coords)
+    w.uvarint(rng_words(room, world_seed))
+    w.bool(room.haunted)
+    w.uvarint(len(room.decorations))
+    w.buf += b"".join(POINT.pack(x, y) for x, y in room.decorations)
+    _rects(w, room.mud_patches)
+    _rects(w, room.ice_patches)
+    _rects(w, room.water_tiles)
+    _rects(w, [o['rect'] for o in room.obstacles])
+    for obs in room.obstacles:
+        w.uvarint(obs['height'])
+        w.raw_str(obs['type'])
+    _rects(w, [ice['rect'] for ice in room.fragile_ice])
+    for ice in room.fragile_ice:
+        w.num(ice['integrity'])
+    _rects(w, [pyre.rect for pyre in room.pyres])
+    for pyre in room.pyres:
+        w.bool(pyre.lit)
+    _rects(w, [item.rect for item in room.items])
+    for item in room.items:
+        w.raw_str(item.name)
+        w.uvarint(item.uid)
+    _rects(w, [pygame.Rect(enemy.home, (0, 0)) for enemy in room.enemies])
+    for enemy in room.enemies:
+        w.raw_str(enemy.name)
+        w.uvarint(enemy.uid)
+    w.uvarint(len(room.echoes))
+    echoes = np.column_stack((room.echoes.pos, room.echoes.speed))
+    w.buf += echoes.astype("<f8").tobytes()
+    return bytes(w.buf)
+
+
+def decode_room(payload, world_seed):
+    r = Reader(payload)
+    room = Room(r.coord(), world_seed, generate=False)
+    words = r.uvarint()
+    if words:
+        room.rng.getrandbits(32 * words)
+    room.haunted = r.bool()
+    room.decorations = list(_take(r, POINT, r.uvarint()))
+    room.mud_patches = _read_rects(r)
+    room.ice_patches = _read_rects(r)
+    room.water_tiles = _read_rects(r)
+    room.obstacles = [{'rect': rect, 'height': r.uvarint(), 'type': r.raw_str()}
+                      for rect in _read_rects(r)]
+    room.fragile_ice = [{'rect': rect, 'integrity': r.num()} for rect in _read_rects(r)]
+    for rect in _read_rects(r):
+        pyre = SignalPyre(rect.x, rect.y)
+        pyre.lit = r.bool()
+        room.pyres.append(pyre)
+    room.items = [Item(rect.x, rect.y, r.raw_str(), r.uvarint()) for rect in _read_rects(r)]
+    for rect in _read_rects(r):
+        enemy = Enemy(rect.x, rect.y, room.biome, variant=r.raw_str())
+        enemy.uid = r.uvarint()
+        room.enemies.append(enemy)
+    n = r.uvarint()
+    if n:
+        if r.pos + n * 24 > len(r.data):
+            raise SaveFormatError("truncated room record")
+        echoes = np.frombuffer(r.data, "<f8", n * 3, r.pos).reshape(n, 3)
+        r.pos += n * 24
+        room.echoes.pos = echoes[:, :2].astype(float)
+        room.echoes.speed = echoes[:, 2].astype(float)
+    room.item_uids = [i.uid for i in room.items]
+    room.enemy_uids = [e.uid for e in room.enemies]
+    return room
+
+
+def region_of(coords):
+    return (coords[0] // REGION, coords[1] // REGION)
+
+
+def region_path(path, region):
+    return os.path.join(path, f"r.{region[0]}.{region[1]}.knr")
+
+
+def write_manifest(path, world_seed):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, MANIFEST), "wb") as f:
+        f.write(WORLD_HEADER.pack(WORLD_MAGIC, BAKED_VERSION, world_seed, REGION))
+
+
+def write_region(path, region, records):
+    # records: (coords, encode_room payload) for rooms inside region; any
+    # slot left out reads back as "not baked"
+    table = bytearray(SLOT.size * REGION * REGION)
+    blobs = []
+    pos = REGION_HEADER.size + len(table)
+    ox, oy = region[0] * REGION, region[1] * REGION
+    for (x, y), payload in records:
+        blob = zlib.compress(payload, COMPRESS_LEVEL)
+        SLOT.pack_into(table, ((y - oy) * REGION + (x - ox)) * SLOT.size, pos, len(blob))
+        blobs.append(blob)
+        pos += len(blob)
+    final = region_path(path, region)
+    tmp = final + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(REGION_HEADER.pack(REGION_MAGIC, BAKED_VERSION, *region))
+        f.write(table)
+        f.write(b"".join(blobs))
+    os.replace(tmp, final)
+    return pos
+
+
+class BakedWorld:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST), "rb") as f:
+            data = f.read()
+        if len(data) < WORLD_HEADER.size:
+            raise SaveFormatError(f"{path}: not a baked world")
+        magic, version, self.seed, size = WORLD_HEADER.unpack_from(data)
+        if magic != WORLD_MAGIC or version != BAKED_VERSION or size != REGION:
+            raise SaveFormatError(f"{path}: not a baked world (or an old one)")
+        self.regions = OrderedDict()  # region -> mmap, or None if no file
+
+    def mapping(self, region):
+        if region in self.regions:
+            self.regions.move_to_end(region)
+            return self.regions[region]
+        mm = None
+        try:
+            with open(region_path(self.path, region), "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            pass  # Outside the baked area (or empty): rooms get generated
+        if mm is not None:
+            bad = len(mm) < REGION_HEADER.size + SLOT.size * REGION * REGION
+            if not bad:
+                magic, version, rx, ry = REGION_HEADER.unpack_from(mm)
+                bad = magic != REGION_MAGIC or version != BAKED_VERSION or (rx, ry) != region
+            if bad:
+                # Remembered as missing, so the rest of the region is
+                # generated without complaining once per room
+                mm.close()
+                self.regions[region] = None
+                raise SaveFormatError(f"{region_path(self.path, region)}: bad region file")
+        self.regions[region] = mm
+        while len(self.regions) > REGION_OPEN:
+            _, old = self.regions.popitem(last=False)
+            if old is not None:
+                old.close()
+        return mm
+
+    def slot(self, coords):
+        # (mmap, offset, length) of the room's record; length 0 if not baked
+        region = region_of(coords)
+        mm = self.mapping(region)
+        if mm is None:
+            return None, 0, 0
+        slot = (coords[1] - region[1] * REGION) * REGION + (coords[0] - region[0] * REGION)
+        offset, length = SLOT.unpack_from(mm, REGION_HEADER.size + slot * SLOT.size)
+        if length and (offset < REGION_HEADER.size + SLOT.size * REGION * REGION or
+                       offset + length > len(mm)):
+            raise SaveFormatError(f"{region_path(self.path, region)}: room {coords} out of bounds")
+        return mm, offset, length
+
+    def payload(self, coords):
+        mm, offset, length = self.slot(coords)
+        if not length:
+            return None
+        try:
+            return zlib.decompress(mm[offset:offset + length])
+        except zlib.error as e:
+            raise SaveFormatError(f"{self.path}: room {coords}: {e}") from e
+
+    def __contains__(self, coords):
+        return self.slot(coords)[2] > 0
+
+    def room(self, coords):
+        # None if the room was not baked; SaveFormatError if it is damaged
+        payload = self.payload(coords)
+        if not payload:
+            return None
+        try:
+            return decode_room(payload, self.seed)
+        except (struct.error, ValueError, IndexError, KeyError) as e:
+            raise SaveFormatError(f"{self.path}: room {coords}: {e}") from e
+
+    def close(self):
+        for mm in self.regions.values():
+            if mm is not None:
+                mm.close()
+        self.regions.clear()